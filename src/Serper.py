@@ -1,15 +1,24 @@
 import re
-import chess.pgn
 from collections import Counter, defaultdict
-import io
 import sys
 
+from pgn_io import open_pgn
+from pgn_scan import iter_parsed_games, ParseErrorLog
+from dedup import GameDeduplicator, game_link, record_key
+from elo_stats import EloEngine, print_elo_report
+from clock_stats import extract_clocks, analyze_time_trouble, print_time_trouble_report
+from temporal_stats import header_timestamps, analyze_duration_stats, print_temporal_report
+from time_control import CategoryIndex, category_performance, time_control_fields
+
 
 class PGNAnalyzer:
     def __init__(self, pgn_content, player_name):
         self.pgn_content = pgn_content
         self.player_name = player_name.lower()
         self.games = []
+        self.parse_errors = ParseErrorLog()
+        self.dedup = GameDeduplicator()
+        self.category_index = CategoryIndex()
         self.parse_pgn()
 
     def identify_opening(self, moves):
@@ -53,13 +62,8 @@ class PGNAnalyzer:
             return "Unknown Opening"
 
     def parse_pgn(self):
-        pgn_io = io.StringIO(self.pgn_content)
-        while True:
+        for game in iter_parsed_games(self.pgn_content, self.parse_errors):
             try:
-                game = chess.pgn.read_game(pgn_io)
-                if game is None:
-                    break
-
                 white = game.headers.get("White", "").lower()
                 black = game.headers.get("Black", "").lower()
                 if self.player_name not in white and self.player_name not in black:
@@ -80,22 +84,30 @@ class PGNAnalyzer:
                     node = next_node
 
                 opening = self.identify_opening(moves)
+                start_time, end_time = header_timestamps(game.headers)
+                time_control = game.headers.get("TimeControl", "Unknown")
 
                 game_info = {
                     'white': white, 'black': black, 'result': result,
                     'white_elo': int(white_elo) if white_elo.isdigit() else 0,
                     'black_elo': int(black_elo) if black_elo.isdigit() else 0,
                     'opening': opening, 'moves': moves,
-                    'pgn_text': str(game), 'game_length': game_length,
+                    'pgn_text': str(game), 'link': game_link(game.headers), 'game_length': game_length,
+                    'clocks': extract_clocks(game),
                     'termination': game.headers.get("Termination", "Normal"),
-                    'time_control': game.headers.get("TimeControl", "Unknown"),
-                    'date': game.headers.get("Date", "")
+                    'time_control': time_control,
+                    **time_control_fields(time_control),
+                    'date': game.headers.get("Date", ""),
+                    'start_time': start_time, 'end_time': end_time
                 }
-                self.games.append(game_info)
+                if not self.dedup.is_duplicate(record_key(game_info)):
+                    self.games.append(game_info)
+
+            except Exception as e:
+                self.parse_errors.record(game.headers, e)
 
-            except Exception:
-                sys.stderr.write("⚠️ Aviso: Ocorreu um erro ao processar uma partida. Pulando...\n")
-                continue
+        self.parse_errors.print_summary(file=sys.stderr)
+        self.dedup.print_summary(file=sys.stderr)
 
     def get_opening_stats(self):
         white_openings = [g['opening'] for g in self.games if self.player_name in g['white']]
@@ -137,24 +149,7 @@ class PGNAnalyzer:
     def analyze_performance_vs_rating(self):
         rating_ranges = {'Under 1200': (0, 1199), '1200-1399': (1200, 1399), '1400-1599': (1400, 1599),
                          '1600-1799': (1600, 1799), '1800-1999': (1800, 1999), '2000+': (2000, 9999)}
-        performance = {}
-        for range_name, (min_rating, max_rating) in rating_ranges.items():
-            wins, losses, draws = 0, 0, 0
-            for game in self.games:
-                is_white = self.player_name in game['white']
-                opponent_rating = game['black_elo'] if is_white else game['white_elo']
-                if min_rating <= opponent_rating <= max_rating:
-                    if (is_white and game['result'] == '1-0') or (not is_white and game['result'] == '0-1'):
-                        wins += 1
-                    elif (is_white and game['result'] == '0-1') or (not is_white and game['result'] == '1-0'):
-                        losses += 1
-                    elif game['result'] == '1/2-1/2':
-                        draws += 1
-            total = wins + losses + draws
-            if total > 0:
-                performance[range_name] = {'wins': wins, 'losses': losses, 'draws': draws, 'total': total,
-                                           'win_rate': (wins / total) * 100}
-        return performance
+        return EloEngine.from_games(self.games, self.player_name).rating_ranges(rating_ranges)
 
     def analyze_game_length_stats(self):
         white_lengths = [g['game_length'] for g in self.games if self.player_name in g['white']]
@@ -175,21 +170,7 @@ class PGNAnalyzer:
         return terminations, wins_by_termination
 
     def analyze_time_control_performance(self):
-        time_controls = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'total': 0})
-        for game in self.games:
-            tc = game.get('time_control', 'Unknown')
-            is_white = self.player_name in game['white']
-            time_controls[tc]['total'] += 1
-            if (is_white and game['result'] == '1-0') or (not is_white and game['result'] == '0-1'):
-                time_controls[tc]['wins'] += 1
-            elif (is_white and game['result'] == '0-1') or (not is_white and game['result'] == '1-0'):
-                time_controls[tc]['losses'] += 1
-            elif game['result'] == '1/2-1/2':
-                time_controls[tc]['draws'] += 1
-        for tc in time_controls:
-            if time_controls[tc]['total'] > 0:
-                time_controls[tc]['win_rate'] = (time_controls[tc]['wins'] / time_controls[tc]['total']) * 100
-        return dict(time_controls)
+        return category_performance(self.games, self.player_name, self.category_index)
 
     def find_consecutive_wins(self):
         if not self.games: return 0, []
@@ -263,6 +244,7 @@ class PGNAnalyzer:
         for r, stats in perf_vs_rating.items():
             if stats['total'] > 0: print(f"• {r}: {stats['wins']}/{stats['total']} ({stats['win_rate']:.1f}% win rate)")
         print()
+        print_elo_report(self.games, self.player_name)
 
         white_openings, black_openings = self.get_opening_stats()
         print("🔸 TOP 5 ABERTURAS MAIS JOGADAS DE BRANCAS:")
@@ -284,6 +266,10 @@ class PGNAnalyzer:
         if 'avg' in length_stats['black']: print(f"• Como pretas - Média: {length_stats['black']['avg']:.1f} lances")
         print()
 
+        time_stats = analyze_time_trouble(self.games, self.player_name)
+        if time_stats: print_time_trouble_report(time_stats)
+        if analyze_duration_stats(self.games, self.player_name): print_temporal_report(self.games, self.player_name)
+
         print("🔥 SEQUÊNCIAS DE VITÓRIAS:")
         max_streak, _ = self.find_consecutive_wins()
         print(f"• Maior sequência: {max_streak} vitórias consecutivas")
@@ -318,10 +304,9 @@ def main():
     player_name = sys.argv[2]
 
     try:
-        with open(pgn_file_path, 'r', encoding='utf-8') as file:
-            pgn_content = file.read()
-
-        analyzer = PGNAnalyzer(pgn_content, player_name)
+        # Aceita .pgn ou .pgn.gz/.bz2/.xz/.zst, lido em streaming
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
         analyzer.generate_report()
 
     except FileNotFoundError:
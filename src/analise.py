@@ -1,13 +1,24 @@
 import re
-import chess.pgn
 from collections import Counter, defaultdict
-import io
+
+from pgn_io import open_pgn
+from pgn_scan import iter_parsed_games, ParseErrorLog
+from dedup import GameDeduplicator, game_link, record_key
+from elo_stats import EloEngine, print_elo_report
+from clock_stats import extract_clocks, analyze_time_trouble, print_time_trouble_report
+from temporal_stats import header_timestamps, print_temporal_report
+from time_control import CategoryIndex, category_performance, time_control_fields
+from ply_features import PlyFeatureBuilder
+from termination import ending_label, record_ending
 
 
 class PGNAnalyzer:
     def __init__(self, pgn_content):
         self.pgn_content = pgn_content
         self.games = []
+        self.parse_errors = ParseErrorLog()
+        self.dedup = GameDeduplicator()
+        self.category_index = CategoryIndex()
         self.parse_pgn()
 
     def identify_opening(self, moves):
@@ -152,15 +163,10 @@ class PGNAnalyzer:
             return "Unknown Opening"
 
     def parse_pgn(self):
-        """Parse o conteúdo PGN e extrai informações das partidas"""
-        pgn_io = io.StringIO(self.pgn_content)
-
-        while True:
+        """Parse o conteúdo PGN (string ou arquivo aberto) e extrai informações das partidas"""
+        # Partidas com erro vão para self.parse_errors; o parse segue na próxima partida
+        for game in iter_parsed_games(self.pgn_content, self.parse_errors, visitor=PlyFeatureBuilder):
             try:
-                game = chess.pgn.read_game(pgn_io)
-                if game is None:
-                    break
-
                 # Extrair informações básicas
                 white = game.headers.get("White", "").lower()
                 black = game.headers.get("Black", "").lower()
@@ -180,6 +186,8 @@ class PGNAnalyzer:
 
                 # Identificar abertura pelos lances
                 opening = self.identify_opening(moves)
+                start_time, end_time = header_timestamps(game.headers)
+                time_control = game.headers.get("TimeControl", "Unknown")
 
                 game_info = {
                     'white': white,
@@ -190,16 +198,29 @@ class PGNAnalyzer:
                     'opening': opening,
                     'eco': eco,
                     'moves': moves,
-                    'pgn_text': str(game)
+                    'game_length': len(moves) // 2,
+                    'date': game.headers.get("Date", ""),
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'termination': game.headers.get("Termination", "Normal"),
+                    'time_control': time_control,
+                    **time_control_fields(time_control),
+                    'clocks': extract_clocks(game),
+                    'pgn_text': str(game),
+                    'link': game_link(game.headers),
+                    'final': game.final,
                 }
 
                 # Só adicionar se juniorsatanas estava jogando
                 if 'juniorsatanas' in white or 'juniorsatanas' in black:
-                    self.games.append(game_info)
+                    if not self.dedup.is_duplicate(record_key(game_info)):
+                        self.games.append(game_info)
 
             except Exception as e:
-                print(f"Erro ao processar partida: {e}")
-                continue
+                self.parse_errors.record(game.headers, e)
+
+        self.parse_errors.print_summary()
+        self.dedup.print_summary()
 
     def get_opening_stats(self):
         """Analisa estatísticas de aberturas"""
@@ -297,44 +318,7 @@ class PGNAnalyzer:
             '1800-1999': (1800, 1999),
             '2000+': (2000, 9999)
         }
-
-        performance = {}
-
-        for range_name, (min_rating, max_rating) in rating_ranges.items():
-            wins = losses = draws = 0
-
-            for game in self.games:
-                opponent_rating = 0
-                is_white = 'juniorsatanas' in game['white']
-
-                if is_white:
-                    opponent_rating = game['black_elo']
-                    if min_rating <= opponent_rating <= max_rating:
-                        if game['result'] == '1-0':
-                            wins += 1
-                        elif game['result'] == '0-1':
-                            losses += 1
-                        elif game['result'] == '1/2-1/2':
-                            draws += 1
-                else:
-                    opponent_rating = game['white_elo']
-                    if min_rating <= opponent_rating <= max_rating:
-                        if game['result'] == '0-1':
-                            wins += 1
-                        elif game['result'] == '1-0':
-                            losses += 1
-                        elif game['result'] == '1/2-1/2':
-                            draws += 1
-
-            total = wins + losses + draws
-            if total > 0:
-                win_rate = (wins / total) * 100
-                performance[range_name] = {
-                    'wins': wins, 'losses': losses, 'draws': draws,
-                    'total': total, 'win_rate': win_rate
-                }
-
-        return performance
+        return EloEngine.from_games(self.games, 'juniorsatanas').rating_ranges(rating_ranges)
 
     def analyze_game_length_stats(self):
         """Analisa estatísticas de duração das partidas"""
@@ -375,16 +359,12 @@ class PGNAnalyzer:
         }
 
     def analyze_termination_methods(self):
-        """Analisa como as partidas terminaram"""
+        """Analisa como as partidas terminaram (tabuleiro final + cabeçalho Termination, ver termination.py)"""
         terminations = Counter()
         wins_by_termination = Counter()
 
         for game in self.games:
-            # Verificação de segurança para termination
-            term = game.get('termination', 'Normal')
-            if not term or term.strip() == '':
-                term = 'Normal'
-
+            term = ending_label(record_ending(game))
             terminations[term] += 1
 
             # Se juniorsatanas ganhou
@@ -397,32 +377,8 @@ class PGNAnalyzer:
         return terminations, wins_by_termination
 
     def analyze_time_control_performance(self):
-        """Analisa performance por controle de tempo"""
-        time_controls = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0})
-
-        for game in self.games:
-            # Verificação de segurança para time_control
-            tc = game.get('time_control', 'Unknown')
-            if not tc or tc.strip() == '':
-                tc = 'Unknown'
-
-            is_white = 'juniorsatanas' in game['white']
-
-            if (is_white and game['result'] == '1-0') or (not is_white and game['result'] == '0-1'):
-                time_controls[tc]['wins'] += 1
-            elif (is_white and game['result'] == '0-1') or (not is_white and game['result'] == '1-0'):
-                time_controls[tc]['losses'] += 1
-            elif game['result'] == '1/2-1/2':
-                time_controls[tc]['draws'] += 1
-
-        # Calcular win rate
-        for tc in time_controls:
-            total = time_controls[tc]['wins'] + time_controls[tc]['losses'] + time_controls[tc]['draws']
-            if total > 0:
-                time_controls[tc]['total'] = total
-                time_controls[tc]['win_rate'] = (time_controls[tc]['wins'] / total) * 100
-
-        return dict(time_controls)
+        """Analisa performance por categoria de controle de tempo (bullet, blitz, rapid...)"""
+        return category_performance(self.games, 'juniorsatanas', self.category_index)
 
     def find_consecutive_wins(self):
         """Encontra sequências de vitórias consecutivas"""
@@ -647,6 +603,7 @@ class PGNAnalyzer:
             print(f"• {rating_range}: {stats['wins']}/{stats['total']} "
                   f"({stats['win_rate']:.1f}% win rate)")
         print()
+        print_elo_report(self.games, 'juniorsatanas')
 
         # 3. Aberturas mais jogadas
         white_openings, black_openings = self.get_opening_stats()
@@ -694,6 +651,9 @@ class PGNAnalyzer:
             print("• Como pretas - Dados de duração não disponíveis")
         print()
 
+        print_time_trouble_report(analyze_time_trouble(self.games, 'juniorsatanas'))
+        print_temporal_report(self.games, 'juniorsatanas')
+
         # 6. Métodos de finalização
         terminations, wins_by_term = self.analyze_termination_methods()
         print("🏁 COMO AS PARTIDAS TERMINARAM:")
@@ -792,12 +752,11 @@ def analyze_juniorsatanas_games(pgn_file_path):
         pgn_file_path (str): Caminho para o arquivo PGN
     """
     try:
-        # Ler arquivo PGN
-        with open(pgn_file_path, 'r', encoding='utf-8') as file:
-            pgn_content = file.read()
+        # Ler arquivo PGN (comprimido ou não) e criar analisador
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file)
 
-        # Criar analisador e gerar relatório
-        analyzer = PGNAnalyzer(pgn_content)
+        # Gerar relatório
         analyzer.generate_report()
 
     except FileNotFoundError:
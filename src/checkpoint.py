@@ -0,0 +1,169 @@
+import json
+import os
+import pickle
+
+CHECKPOINT_DIR = '.checkpoints'
+# Intervalo mínimo entre checkpoints do parse
+CHECKPOINT_INTERVAL = 30.0
+
+
+def atomic_write(path, data):
+    """Grava em um arquivo temporário e renomeia: um checkpoint nunca fica pela metade"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class DownloadCheckpoint:
+    """
+    Arquivos mensais já baixados e os jogos deles, para retomar um download longo.
+
+    Cada mês concluído é acrescentado a <jogador>_download.games.ndjson e só
+    depois marcado como concluído no <jogador>_download.json, com o intervalo
+    de bytes dos seus jogos; ao retomar, esses meses são lidos do disco em vez
+    da rede, na mesma ordem do download original.
+    """
+
+    def __init__(self, username, resume=False, directory=CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{username.lower()}_download")
+        self.state_path = base + '.json'
+        self.games_path = base + '.games.ndjson'
+        self.completed = {}
+        self.games_size = 0
+
+        if resume and self._load():
+            print(f"♻️ Retomando download: {len(self.completed)} arquivos mensais já baixados")
+        else:
+            self.finish()
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            # Descarta jogos de um mês que estava sendo gravado quando o processo parou
+            if os.path.getsize(self.games_path) > state['games_size']:
+                os.truncate(self.games_path, state['games_size'])
+        except (OSError, ValueError, KeyError):
+            return False
+        self.completed = state['completed']
+        self.games_size = state['games_size']
+        return True
+
+    def replay(self, archive_url):
+        """Gera os jogos salvos de um mês já concluído"""
+        start, end = self.completed[archive_url]
+        with open(self.games_path, 'rb') as f:
+            f.seek(start)
+            for line in f.read(end - start).splitlines():
+                yield json.loads(line)
+
+    def complete(self, archive_url, games):
+        """Grava os jogos de um mês baixado por inteiro e o marca como concluído"""
+        start = self.games_size
+        with open(self.games_path, 'a', encoding='utf-8') as f:
+            for game in games:
+                # ijson devolve Decimal para números com casas decimais
+                f.write(json.dumps(game, ensure_ascii=False, default=float) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+            self.games_size = f.tell()
+
+        self.completed[archive_url] = [start, self.games_size]
+        state = {'completed': self.completed, 'games_size': self.games_size}
+        atomic_write(self.state_path, json.dumps(state).encode('utf-8'))
+
+    def finish(self):
+        """Remove o checkpoint (download concluído ou recomeçado do zero)"""
+        _remove(self.state_path, self.games_path)
+        self.completed = {}
+        self.games_size = 0
+
+
+class ParseCheckpoint:
+    """Offset da próxima partida e agregados parciais de um parse longo"""
+
+    def __init__(self, pgn_path, player_name, directory=CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.pgn_path = pgn_path
+        name = f"{os.path.basename(pgn_path)}_{player_name.lower()}_parse.pkl"
+        self.path = os.path.join(directory, name)
+
+    def load(self):
+        """Retorna o estado salvo ou None se não houver checkpoint válido para este arquivo"""
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+            pgn_size = os.path.getsize(self.pgn_path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if state.get('pgn_path') != os.path.abspath(self.pgn_path) or state.get('pgn_size') != pgn_size:
+            print("⚠️ Checkpoint de outro arquivo ou arquivo modificado - recomeçando do início")
+            return None
+        return state
+
+    def save(self, offset, game_number, aggregates, dedup=None, similar=None):
+        state = {
+            'pgn_path': os.path.abspath(self.pgn_path),
+            'pgn_size': os.path.getsize(self.pgn_path),
+            'offset': offset,
+            'game_number': game_number,
+            'aggregates': aggregates,
+            # Hashes já vistos, para a deduplicação continuar valendo depois do --resume
+            'dedup': dedup,
+            # Assinaturas MinHash das partidas já lidas (similar_games.LSHIndex)
+            'similar': similar,
+        }
+        atomic_write(self.path, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def finish(self):
+        _remove(self.path)
+
+
+class ReportCache:
+    """
+    Relatório já renderizado de um PGN, reaproveitado enquanto o arquivo não mudar.
+
+    A chave é o caminho, o tamanho e o mtime do PGN, o jogador e o formato: um
+    acerto imprime o relatório sem carregar o python-chess nem o numpy.
+    """
+    VERSION = 2
+
+    def __init__(self, pgn_path, player_name, fmt='text', directory=CHECKPOINT_DIR):
+        self.pgn_path = pgn_path
+        self.player_name = player_name.lower()
+        self.fmt = fmt
+        name = f"{os.path.basename(pgn_path)}_{self.player_name}_report.{fmt}.json"
+        self.path = os.path.join(directory, name)
+
+    def _key(self):
+        stat = os.stat(self.pgn_path)
+        return [self.VERSION, os.path.abspath(self.pgn_path), stat.st_size, stat.st_mtime_ns,
+                self.player_name, self.fmt]
+
+    def load(self):
+        """Retorna o relatório salvo ou None se não houver um válido para o arquivo atual"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['key'] != self._key():
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return cached['report']
+
+    def save(self, rendered):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = json.dumps({'key': self._key(), 'report': rendered}, ensure_ascii=False)
+        atomic_write(self.path, data.encode('utf-8'))
@@ -0,0 +1,183 @@
+import re
+
+import numpy as np
+
+from ply_features import white_first
+from time_control import parse_time_control
+
+CLOCK_RE = re.compile(r'\[%clk (\d+):(\d+):(\d+(?:\.\d+)?)\]')
+# Comentário (grupo 1) ou lance/parêntese (grupo 2); cabeçalhos, números de lance, NAGs e resultado são pulados
+MOVETEXT_TOKEN_RE = re.compile(r'^\[[^\]\n]*\]\s*$|\{([^}]*)\}|;[^\n]*|\$\d+|\d+\.+|1-0|0-1|1/2-1/2|\*'
+                               r'|([()]|[^\s{}()\[\];.$][^\s{}()]*)', re.M)
+
+# Limite (em segundos) para considerar que o jogador está em apuros de tempo
+TIME_TROUBLE_SECONDS = 10.0
+
+# Fases da partida por número de meios-lances: abertura < 20, meio-jogo < 60, final >= 60
+PHASE_NAMES = ['Abertura', 'Meio-jogo', 'Final']
+PHASE_PLY_BOUNDARIES = [20, 60]
+
+
+def extract_clocks(game):
+    """Extrai o relógio restante após cada lance (%clk) de uma partida python-chess"""
+    clocks = [node.clock() for node in game.mainline()]
+    return np.array([np.nan if c is None else c for c in clocks], dtype=np.float32)
+
+
+def clocks_from_movetext(pgn_text):
+    """
+    Extrai o %clk de cada lance direto do texto PGN, sem replay das jogadas
+
+    Como extract_clocks: uma posição por meio-lance da linha principal, NaN
+    quando o lance não tem %clk (variações e cabeçalhos ficam de fora).
+    """
+    clocks = []
+    depth = 0
+    for match in MOVETEXT_TOKEN_RE.finditer(pgn_text):
+        comment, token = match.group(1), match.group(2)
+        if comment is not None:
+            clock = CLOCK_RE.search(comment)
+            if clock and depth == 0 and clocks and np.isnan(clocks[-1]):
+                h, m, sec = clock.groups()
+                clocks[-1] = int(h) * 3600 + int(m) * 60 + float(sec)
+        elif token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(0, depth - 1)
+        elif token is not None and depth == 0:
+            clocks.append(np.nan)
+    return np.array(clocks, dtype=np.float32)
+
+
+def _player_results(games, player_name):
+    """Resultado de cada partida do ponto de vista do jogador: 1 vitória, 0 empate, -1 derrota"""
+    is_white = np.array([player_name in g['white'] for g in games], dtype=bool)
+    result = np.array([g['result'] for g in games])
+    white_score = np.where(result == '1-0', 1, np.where(result == '0-1', -1, 0)).astype(np.int8)
+    return is_white, np.where(is_white, white_score, -white_score)
+
+
+def time_trouble_totals(games, player_name, trouble_seconds=TIME_TROUBLE_SECONDS):
+    """
+    Calcula os totais (somáveis entre lotes) do uso do relógio do jogador, com numpy
+
+    Args:
+        games (list): partidas com o campo 'clocks' (array float32 por meio-lance)
+        player_name (str): nome do jogador analisado
+        trouble_seconds (float): limite de apuro de tempo
+
+    Returns:
+        dict: contagens e somas que merge_time_trouble_totals pode acumular, ou
+        None se nenhuma partida tiver relógio
+    """
+    # Sem %clk, extract_clocks devolve só NaN: a partida não tem relógio
+    games = [g for g in games if np.isfinite(g.get('clocks', ())).any()]
+    if not games:
+        return None
+
+    player_name = player_name.lower()
+    lengths = np.array([len(g['clocks']) for g in games], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    clocks = np.concatenate([g['clocks'] for g in games]).astype(np.float64)
+
+    game_idx = np.repeat(np.arange(len(games)), lengths)
+    ply = np.arange(len(clocks)) - np.repeat(offsets, lengths)
+
+    base, increment, _ = np.array([parse_time_control(g.get('time_control')) for g in games]).T
+    is_white, outcome = _player_results(games, player_name)
+
+    # Tempo gasto = relógio anterior do mesmo lado - relógio atual + incremento
+    previous = np.empty_like(clocks)
+    previous[2:] = clocks[:-2]
+    first_moves = ply < 2
+    previous[first_moves] = base[game_idx[first_moves]]
+    spent = previous - clocks + increment[game_idx]
+
+    # Partidas a partir de um [FEN] com as pretas a jogar começam pelo lance delas
+    first = np.array([white_first(g) for g in games], dtype=bool)
+    player_ply = (ply % 2 == 0) == (is_white == first)[game_idx]
+    valid = player_ply & np.isfinite(spent) & (spent >= 0)
+
+    # Apuros de tempo: menor relógio do jogador em cada partida
+    player_clocks = np.where(player_ply & np.isfinite(clocks), clocks, np.inf)
+    min_clock = np.minimum.reduceat(player_clocks, offsets)
+    in_trouble = min_clock < trouble_seconds
+    trouble_outcomes = outcome[in_trouble]
+
+    # Tempo de reflexão por fase da partida
+    phase = np.digitize(ply[valid], PHASE_PLY_BOUNDARIES)
+
+    return {
+        'trouble_seconds': trouble_seconds,
+        'games_with_clock': len(games),
+        'spent_total': float(spent[valid].sum()),
+        'spent_count': int(valid.sum()),
+        'trouble_games': int(in_trouble.sum()),
+        'trouble_wins': int((trouble_outcomes == 1).sum()),
+        'trouble_losses': int((trouble_outcomes == -1).sum()),
+        'trouble_draws': int((trouble_outcomes == 0).sum()),
+        'phase_total': np.bincount(phase, weights=spent[valid], minlength=len(PHASE_NAMES)),
+        'phase_count': np.bincount(phase, minlength=len(PHASE_NAMES)),
+    }
+
+
+def merge_time_trouble_totals(totals, other):
+    """Soma os totais de dois lotes de partidas (qualquer um pode ser None)"""
+    if totals is None or other is None:
+        return totals if other is None else other
+    return {key: value if key == 'trouble_seconds' else value + other[key] for key, value in totals.items()}
+
+
+def summarize_time_trouble(totals):
+    """Converte os totais no resumo usado pelo relatório"""
+    if totals is None:
+        return {}
+
+    phase_total, phase_count = totals['phase_total'], totals['phase_count']
+    return {
+        'games_with_clock': totals['games_with_clock'],
+        'avg_time_per_move': totals['spent_total'] / totals['spent_count'] if totals['spent_count'] else 0.0,
+        'trouble_seconds': totals['trouble_seconds'],
+        'time_trouble': {
+            'games': totals['trouble_games'],
+            'wins': totals['trouble_wins'],
+            'losses': totals['trouble_losses'],
+            'draws': totals['trouble_draws'],
+        },
+        'avg_time_by_phase': {
+            name: float(phase_total[i] / phase_count[i])
+            for i, name in enumerate(PHASE_NAMES) if phase_count[i] > 0
+        },
+    }
+
+
+def analyze_time_trouble(games, player_name, trouble_seconds=TIME_TROUBLE_SECONDS):
+    """Analisa o uso do relógio do jogador em todas as partidas de uma vez (numpy)"""
+    return summarize_time_trouble(time_trouble_totals(games, player_name, trouble_seconds))
+
+
+def format_time_trouble_lines(stats):
+    """Linhas da seção de gestão do tempo do relatório"""
+    if not stats:
+        return ["• Dados de relógio não disponíveis"]
+
+    trouble = stats['time_trouble']
+    lines = [
+        f"• Partidas com relógio: {stats['games_with_clock']}",
+        f"• Tempo médio por lance: {stats['avg_time_per_move']:.1f}s",
+    ]
+    if trouble['games'] > 0:
+        lines.append(f"• Com menos de {stats['trouble_seconds']:.0f}s no relógio: {trouble['games']} partidas "
+                     f"({trouble['wins']}V/{trouble['losses']}D/{trouble['draws']}E, "
+                     f"{trouble['wins'] / trouble['games'] * 100:.1f}% win rate)")
+    for phase, avg in stats['avg_time_by_phase'].items():
+        lines.append(f"  {phase}: {avg:.1f}s por lance")
+    return lines
+
+
+def print_time_trouble_report(stats):
+    """Imprime a seção de gestão do tempo do relatório"""
+    print("⏱️ GESTÃO DO TEMPO (%clk):")
+    for line in format_time_trouble_lines(stats):
+        print(line)
+    print()
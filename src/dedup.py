@@ -0,0 +1,110 @@
+import hashlib
+import math
+
+# Datas incompletas ('????.??.??', '2023.??.??') são comparadas só pela parte conhecida
+UNKNOWN_DATE_PARTS = {'????', '??'}
+
+
+def normalize_date(date):
+    parts = (date or '').strip().replace('/', '.').replace('-', '.').split('.')
+    known = []
+    for part in parts:
+        if not part or part in UNKNOWN_DATE_PARTS:
+            break
+        known.append(part)
+    return '.'.join(known)
+
+
+def game_link(headers):
+    """Endereço que identifica a partida: Link (Chess.com) ou Site quando é uma URL (Lichess)"""
+    site = headers.get('Site') or ''
+    return headers.get('Link') or (site if '://' in site else '')
+
+
+def game_key(white, black, result, date, moves, start_time=None):
+    """
+    Hash de 128 bits dos cabeçalhos normalizados e da sequência de lances (UCI)
+
+    Event/Site genérico/Elo ficam de fora: a mesma partida costuma vir de
+    fontes que preenchem esses campos de formas diferentes. O horário de
+    início entra quando existe, para que partidas distintas do mesmo dia com
+    os mesmos lances (ex.: várias abortadas sem lances) não virem uma só.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    header = '\x1f'.join((white.strip().lower(), black.strip().lower(), result.strip(), normalize_date(date)))
+    digest.update(header.encode('utf-8'))
+    if start_time is not None and math.isfinite(start_time):
+        digest.update(f"\x1f{start_time:.0f}".encode('utf-8'))
+    digest.update(b'\x1e')
+    digest.update(' '.join(moves).encode('utf-8'))
+    return digest.digest()
+
+
+def identity_key(identifier):
+    """Hash de 128 bits de um identificador único da partida (URL da partida, uuid da API)"""
+    return hashlib.blake2b(b'id\x1f' + identifier.strip().encode('utf-8'), digest_size=16).digest()
+
+
+def record_key(record):
+    """
+    Chave de um registro de partida dos analisadores
+
+    Com endereço da partida ('link': [Link] do Chess.com, Site do Lichess ou a
+    URL do JSON) a chave é só ele, igual nos caminhos PGN e JSON e sem
+    precisar dos lances; sem endereço, cabeçalhos e lances em UCI.
+    """
+    if record.get('link'):
+        return identity_key(record['link'])
+    return game_key(record['white'], record['black'], record['result'], record.get('date', ''), record['moves'],
+                    record.get('start_time'))
+
+
+class BloomFilter:
+    """Conjunto aproximado com memória fixa: sem falsos negativos, falsos positivos com taxa error_rate"""
+
+    def __init__(self, capacity, error_rate=1e-6):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key):
+        """Marca a chave (bytes de um hash); retorna True se ela provavelmente já estava presente"""
+        # Double hashing: as k posições saem das duas metades do hash de 128 bits
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:16], 'little') | 1
+        present = True
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.size
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                present = False
+                self.bits[byte] |= mask
+        return present
+
+
+class GameDeduplicator:
+    """
+    Detecta partidas repetidas em streaming, com custo O(1) por partida.
+
+    Sem capacity usa um set de hashes (exato, ~100 bytes por partida); com
+    capacity usa um Bloom filter de tamanho fixo para acervos muito grandes.
+    """
+
+    def __init__(self, capacity=None, error_rate=1e-6):
+        self.seen = set() if capacity is None else BloomFilter(capacity, error_rate)
+        self.duplicates = 0
+
+    def is_duplicate(self, key):
+        """Registra a chave e diz se ela já tinha aparecido"""
+        if isinstance(self.seen, set):
+            duplicate = key in self.seen
+            self.seen.add(key)
+        else:
+            duplicate = self.seen.add(key)
+        if duplicate:
+            self.duplicates += 1
+        return duplicate
+
+    def print_summary(self, file=None):
+        if self.duplicates:
+            print(f"🔁 {self.duplicates} partidas duplicadas ignoradas", file=file)
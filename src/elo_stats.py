@@ -0,0 +1,320 @@
+import math
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Limites das faixas usadas historicamente no relatório (a última vai até 9999)
+DEFAULT_RATING_EDGES = [0, 1200, 1400, 1600, 1800, 2000, 10000]
+PERCENTILES = [10, 25, 50, 75, 90]
+# Janela das sequências de performance (em partidas)
+ROLLING_WINDOW = 50
+# Score máximo considerado na performance: 100% ou 0% dariam ±infinito (±798 pontos como na tabela da FIDE)
+PERFORMANCE_SCORE_CLIP = 0.99
+
+
+def expected_score(player_elo, opponent_elo):
+    """Score esperado pela fórmula do Elo, para escalares ou arrays"""
+    return 1.0 / (1.0 + 10.0 ** ((np.asarray(opponent_elo, dtype=np.float64) - player_elo) / 400.0))
+
+
+def rating_difference(score_rate):
+    """Diferença de rating que corresponde a um score (inverso da curva do Elo)"""
+    p = np.clip(score_rate, 1 - PERFORMANCE_SCORE_CLIP, PERFORMANCE_SCORE_CLIP)
+    return 400.0 * np.log10(p / (1 - p))
+
+
+def ranges_to_edges(rating_ranges):
+    """Converte {'nome': (min, max)} contíguos em limites para searchsorted"""
+    bounds = sorted(rating_ranges.values())
+    return [low for low, _ in bounds] + [bounds[-1][1] + 1]
+
+
+def bucket_labels(edges):
+    """Rótulos no estilo do relatório: 'Under 1200', '1200-1399', ..., '2000+'"""
+    labels = []
+    for i, (low, high) in enumerate(zip(edges[:-1], edges[1:])):
+        if i == 0 and low <= 0:
+            labels.append(f"Under {high}")
+        elif i == len(edges) - 2 and high >= DEFAULT_RATING_EDGES[-1]:
+            labels.append(f"{low}+")
+        else:
+            labels.append(f"{low}-{high - 1}")
+    return labels
+
+
+def parse_rating_edges(text):
+    """Lê faixas definidas pelo usuário, ex. '1000,1500,2000' -> [0, 1000, 1500, 2000, 10000]"""
+    edges = sorted({int(value) for value in text.split(',') if value.strip()})
+    if not edges or edges[0] > 0:
+        edges.insert(0, 0)
+    if edges[-1] < DEFAULT_RATING_EDGES[-1]:
+        edges.append(DEFAULT_RATING_EDGES[-1])
+    return edges
+
+
+def elo_samples(games, player_name):
+    """
+    Arrays de rating e resultado do ponto de vista do jogador
+
+    Returns:
+        tuple: (rating do jogador int32, rating do oponente int32, score float32
+        com 1/0.5/0 e NaN para resultado desconhecido, início da partida float64)
+    """
+    player_name = player_name.lower()
+    is_white = np.array([player_name in g['white'] for g in games], dtype=bool)
+    white_elo = np.array([g['white_elo'] for g in games], dtype=np.int32)
+    black_elo = np.array([g['black_elo'] for g in games], dtype=np.int32)
+    result = np.array([g['result'] for g in games], dtype=str)
+    start = np.array([g.get('start_time', math.nan) for g in games], dtype=np.float64)
+
+    white_score = np.select([result == '1-0', result == '1/2-1/2', result == '0-1'], [1.0, 0.5, 0.0], np.nan)
+    score = np.where(is_white, white_score, 1.0 - white_score).astype(np.float32)
+    return (np.where(is_white, white_elo, black_elo), np.where(is_white, black_elo, white_elo), score, start)
+
+
+class EloEngine:
+    """
+    Score esperado, performance rating e faixas de rating sobre arrays numpy.
+
+    Tudo é calculado de uma vez sobre os arrays (searchsorted + bincount), sem
+    laço por faixa ou por partida. Ratings 0 (desconhecidos) contam nas faixas
+    de vitórias/derrotas, mas ficam fora do esperado e da performance.
+    """
+
+    def __init__(self, player_elo, opponent_elo, score, start_time=None):
+        self.player_elo = np.asarray(player_elo, dtype=np.float64)
+        self.opponent_elo = np.asarray(opponent_elo, dtype=np.float64)
+        self.score = np.asarray(score, dtype=np.float64)
+        self.start_time = np.full(len(self.score), np.nan) if start_time is None else \
+            np.asarray(start_time, dtype=np.float64)
+        self.valid = np.isfinite(self.score)
+        self.rated = self.valid & (self.player_elo > 0) & (self.opponent_elo > 0)
+        self.expected = np.where(self.rated, expected_score(self.player_elo, self.opponent_elo), 0.0)
+
+    @classmethod
+    def from_games(cls, games, player_name):
+        return cls(*elo_samples(games, player_name))
+
+    @classmethod
+    def from_samples(cls, samples):
+        """Junta os arrays de vários lotes de elo_samples"""
+        if not samples:
+            return cls([], [], [])
+        return cls(*(np.concatenate(parts) for parts in zip(*samples)))
+
+    def __len__(self):
+        return len(self.score)
+
+    def performance(self, mask=None):
+        """Performance rating: média dos oponentes + diferença correspondente ao score"""
+        mask = self.rated if mask is None else mask & self.rated
+        if not mask.any():
+            return math.nan
+        return float(self.opponent_elo[mask].mean() + rating_difference(self.score[mask].mean()))
+
+    def buckets(self, edges=DEFAULT_RATING_EDGES, labels=None):
+        """
+        Resultados por faixa de rating do oponente
+
+        Args:
+            edges (list): limites crescentes; a faixa i cobre [edges[i], edges[i+1])
+            labels (list): nomes das faixas (padrão: bucket_labels(edges))
+
+        Returns:
+            list: um dict por faixa com partidas, V/E/D, score real e esperado,
+            saldo (pontos acima do esperado) e performance
+        """
+        edges = np.asarray(edges, dtype=np.float64)
+        labels = labels or bucket_labels([int(e) for e in edges])
+        size = len(edges) - 1
+        index = np.searchsorted(edges, self.opponent_elo, side='right') - 1
+        inside = self.valid & (index >= 0) & (index < size)
+        index = np.where(inside, index, size)  # Fora das faixas: posição descartada
+
+        def count(weights=None):
+            return np.bincount(index, weights=weights, minlength=size + 1)[:size]
+
+        score = np.where(self.valid, self.score, 0.0)
+        rated = (self.rated & inside).astype(np.float64)
+        games = count(inside.astype(np.float64))
+        wins = count((inside & (score == 1.0)).astype(np.float64))
+        draws = count((inside & (score == 0.5)).astype(np.float64))
+        score_sum = count(np.where(inside, score, 0.0))
+        rated_games = count(rated)
+        rated_score = count(score * rated)
+        expected_sum = count(self.expected * rated)
+        opponent_sum = count(self.opponent_elo * rated)
+
+        result = []
+        for i in range(size):
+            if games[i] == 0:
+                continue
+            bucket = {
+                'label': labels[i], 'games': int(games[i]), 'wins': int(wins[i]), 'draws': int(draws[i]),
+                'losses': int(games[i] - wins[i] - draws[i]), 'win_rate': float(wins[i] / games[i] * 100),
+                'score': float(score_sum[i] / games[i] * 100),
+            }
+            if rated_games[i]:
+                bucket['expected'] = float(expected_sum[i] / rated_games[i] * 100)
+                bucket['delta'] = float(rated_score[i] - expected_sum[i])
+                bucket['performance'] = float(opponent_sum[i] / rated_games[i] +
+                                              rating_difference(rated_score[i] / rated_games[i]))
+            result.append(bucket)
+        return result
+
+    def rating_ranges(self, rating_ranges):
+        """Mesmo formato de analyze_performance_vs_rating: {faixa: {'wins', 'losses', 'draws', 'total', 'win_rate'}}"""
+        # Faixas em ordem crescente de limite, com os nomes originais
+        labels = sorted(rating_ranges, key=lambda name: rating_ranges[name][0])
+        edges = ranges_to_edges(rating_ranges)
+        return {bucket['label']: {'wins': bucket['wins'], 'losses': bucket['losses'], 'draws': bucket['draws'],
+                                  'total': bucket['games'], 'win_rate': bucket['win_rate']}
+                for bucket in self.buckets(edges, labels)}
+
+    def percentiles(self, q=PERCENTILES):
+        """Percentis do rating dos oponentes (só ratings conhecidos)"""
+        ratings = self.opponent_elo[self.valid & (self.opponent_elo > 0)]
+        if len(ratings) == 0:
+            return {}
+        return {int(p): float(v) for p, v in zip(q, np.percentile(ratings, q))}
+
+    def rolling(self, window_games=ROLLING_WINDOW, window_days=None):
+        """
+        Performance em janelas móveis ao longo do tempo (por partidas ou por dias)
+
+        Returns:
+            dict de arrays alinhados pela ordem cronológica: início da partida,
+            partidas na janela, score real, score esperado e performance
+        """
+        order = np.argsort(self.start_time, kind='stable')  # Sem horário: mantém a ordem, no fim
+        rated = self.rated[order]
+        times = self.start_time[order][rated]
+        score = self.score[order][rated]
+        expected = self.expected[order][rated]
+        opponent = self.opponent_elo[order][rated]
+        n = len(score)
+        if n == 0:
+            return {'time': times, 'games': np.zeros(0, dtype=np.int64), 'score': score,
+                    'expected': expected, 'performance': score}
+
+        end = np.arange(1, n + 1)
+        if window_days is not None:
+            start = np.searchsorted(times, times - window_days * 86400.0, side='left')
+        else:
+            start = np.maximum(end - window_games, 0)
+
+        def window_sum(values):
+            cumulative = np.concatenate(([0.0], np.cumsum(values)))
+            return cumulative[end] - cumulative[start]
+
+        games = end - start
+        score_rate = window_sum(score) / games
+        return {
+            'time': times,
+            'games': games,
+            'score': score_rate,
+            'expected': window_sum(expected) / games,
+            'performance': window_sum(opponent) / games + rating_difference(score_rate),
+        }
+
+    def summary(self, edges=DEFAULT_RATING_EDGES, window_games=ROLLING_WINDOW):
+        """Resumo serializável para o relatório"""
+        rated = int(self.rated.sum())
+        if rated == 0:
+            return {}
+        score = float(self.score[self.rated].sum())
+        expected = float(self.expected[self.rated].sum())
+        summary = {
+            'rated_games': rated,
+            'average_rating': float(self.player_elo[self.rated].mean()),
+            'average_opponent': float(self.opponent_elo[self.rated].mean()),
+            'score': score / rated * 100,
+            'expected': expected / rated * 100,
+            'delta': score - expected,
+            'performance': self.performance(),
+            'percentiles': self.percentiles(),
+            'buckets': self.buckets(edges),
+        }
+        if rated >= window_games:
+            # Só janelas completas entram na melhor/pior sequência
+            rolling = self.rolling(window_games)
+            performance = rolling['performance'][window_games - 1:]
+            summary['rolling_window'] = window_games
+            summary['best_stretch'] = float(performance.max())
+            summary['worst_stretch'] = float(performance.min())
+            summary['last_stretch'] = float(performance[-1])
+        return summary
+
+
+def format_elo_lines(summary):
+    """Linhas da seção de desempenho esperado pelo Elo"""
+    if not summary:
+        return ["• Nenhuma partida com rating dos dois jogadores"]
+
+    lines = [
+        f"• Partidas com rating: {summary['rated_games']} (rating médio {summary['average_rating']:.0f}, "
+        f"oponentes {summary['average_opponent']:.0f})",
+        f"• Score: {summary['score']:.1f}% (esperado {summary['expected']:.1f}%, "
+        f"saldo {summary['delta']:+.1f} pontos)",
+        f"• Performance rating: {summary['performance']:.0f}",
+    ]
+    if summary['percentiles']:
+        lines.append("• Oponentes por percentil: " +
+                     ", ".join(f"p{p}={v:.0f}" for p, v in summary['percentiles'].items()))
+    for bucket in summary['buckets']:
+        if 'performance' in bucket:
+            lines.append(f"  {bucket['label']}: {bucket['score']:.1f}% vs {bucket['expected']:.1f}% esperado "
+                         f"({bucket['delta']:+.1f}), performance {bucket['performance']:.0f} "
+                         f"em {bucket['games']} jogos")
+    if 'rolling_window' in summary:
+        lines.append(f"• Performance em janelas de {summary['rolling_window']} jogos: "
+                     f"melhor {summary['best_stretch']:.0f}, pior {summary['worst_stretch']:.0f}, "
+                     f"atual {summary['last_stretch']:.0f}")
+    return lines
+
+
+def print_elo_report(games, player_name):
+    """Imprime o score real contra o esperado pelo Elo e a performance rating"""
+    print("📐 ELO: ESPERADO VS REAL:")
+    for line in format_elo_lines(EloEngine.from_games(games, player_name).summary()):
+        print(line)
+    print()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python elo_stats.py <arquivo.pgn> <nome_do_jogador> [faixas ex. 1000,1500,2000] [janela em dias]")
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name = sys.argv[1:3]
+    edges = parse_rating_edges(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_RATING_EDGES
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+
+    engine = EloEngine.from_games(analyzer.games, player_name)
+    print("📐 ELO: ESPERADO VS REAL:")
+    for line in format_elo_lines(engine.summary(edges)):
+        print(line)
+
+    if len(sys.argv) > 4:
+        days = float(sys.argv[4])
+        rolling = engine.rolling(window_days=days)
+        print(f"\n📈 PERFORMANCE EM JANELAS DE {days:g} DIAS:")
+        # Cerca de 20 pontos da série, para não imprimir uma linha por partida
+        step = max(1, len(rolling['performance']) // 20)
+        for i in range(0, len(rolling['performance']), step):
+            when = datetime.fromtimestamp(rolling['time'][i], timezone.utc).strftime('%Y-%m-%d') \
+                if np.isfinite(rolling['time'][i]) else f"partida {i + 1}"
+            print(f"  {when}: {rolling['performance'][i]:.0f} ({rolling['games'][i]} jogos na janela)")
+
+
+if __name__ == "__main__":
+    main()
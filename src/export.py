@@ -0,0 +1,204 @@
+import json
+import sys
+
+from ply_features import white_first
+
+# Quantidade de partidas acumuladas antes de cada escrita em disco
+BATCH_SIZE = 5000
+
+# Campos escalares de cada partida produzida por PGNAnalyzer.parse_pgn
+GAME_FIELDS = [
+    'white', 'black', 'result', 'white_elo', 'black_elo', 'opening', 'eco',
+    'date', 'game_length', 'termination', 'time_control',
+]
+
+
+def game_to_row(game_id, game, include_pgn=False):
+    """Converte uma partida analisada em um registro plano para exportação"""
+    row = {'game_id': game_id}
+    for field in GAME_FIELDS:
+        row[field] = game.get(field)
+    row['moves'] = list(game.get('moves', []))
+    if include_pgn:
+        row['pgn_text'] = game.get('pgn_text', '')
+    return row
+
+
+def game_to_ply_rows(game_id, game):
+    """Gera um registro por lance (ply) da partida"""
+    clocks = game.get('clocks', ())
+    # Ply 1 é das pretas quando a partida começa num [FEN] com as pretas a jogar
+    first, second = ('white', 'black') if white_first(game) else ('black', 'white')
+    for ply, uci in enumerate(game.get('moves', []), 1):
+        clock = float(clocks[ply - 1]) if ply <= len(clocks) else None
+        yield {
+            'game_id': game_id,
+            'ply': ply,
+            'color': first if ply % 2 else second,
+            'uci': uci,
+            'clock': None if clock != clock else clock,
+        }
+
+
+def iter_batches(games, batch_size=BATCH_SIZE, include_pgn=False, with_plies=False):
+    """Agrupa as partidas em lotes de (linhas de partidas, linhas de lances)"""
+    game_rows = []
+    ply_rows = []
+
+    for game_id, game in enumerate(games):
+        game_rows.append(game_to_row(game_id, game, include_pgn))
+        if with_plies:
+            ply_rows.extend(game_to_ply_rows(game_id, game))
+
+        if len(game_rows) >= batch_size:
+            yield game_rows, ply_rows
+            game_rows = []
+            ply_rows = []
+
+    if game_rows:
+        yield game_rows, ply_rows
+
+
+def export_ndjson(games, path, plies_path=None, batch_size=BATCH_SIZE, include_pgn=False):
+    """
+    Exporta as partidas em NDJSON (um objeto JSON por linha), em lotes
+
+    Args:
+        games: iterável de partidas (ex.: PGNAnalyzer.iter_games())
+        path (str): arquivo de saída das partidas
+        plies_path (str): arquivo opcional com a tabela por lance
+        batch_size (int): partidas por lote de escrita
+        include_pgn (bool): incluir o texto PGN completo de cada partida
+    """
+    total = 0
+    plies_file = open(plies_path, 'w', encoding='utf-8') if plies_path else None
+
+    try:
+        with open(path, 'w', encoding='utf-8') as games_file:
+            for game_rows, ply_rows in iter_batches(games, batch_size, include_pgn, plies_file is not None):
+                games_file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in game_rows)
+                if plies_file:
+                    plies_file.writelines(json.dumps(row) + "\n" for row in ply_rows)
+                total += len(game_rows)
+    finally:
+        if plies_file:
+            plies_file.close()
+
+    print(f"✅ {total} partidas exportadas para {path}")
+    return total
+
+
+def _arrow_schemas(include_pgn):
+    """Monta os schemas Arrow das tabelas de partidas e de lances"""
+    import pyarrow as pa
+
+    game_fields = [
+        ('game_id', pa.int64()),
+        ('white', pa.string()),
+        ('black', pa.string()),
+        ('result', pa.string()),
+        ('white_elo', pa.int32()),
+        ('black_elo', pa.int32()),
+        ('opening', pa.string()),
+        ('eco', pa.string()),
+        ('date', pa.string()),
+        ('game_length', pa.int32()),
+        ('termination', pa.string()),
+        ('time_control', pa.string()),
+        ('moves', pa.list_(pa.string())),
+    ]
+    if include_pgn:
+        game_fields.append(('pgn_text', pa.string()))
+
+    ply_fields = [
+        ('game_id', pa.int64()),
+        ('ply', pa.int32()),
+        ('color', pa.string()),
+        ('uci', pa.string()),
+        ('clock', pa.float32()),
+    ]
+    return pa.schema(game_fields), pa.schema(ply_fields)
+
+
+def _open_arrow_writer(path, schema, fmt):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == 'parquet':
+        return pq.ParquetWriter(path, schema, compression='zstd')
+    return pa.ipc.new_file(path, schema)
+
+
+def _export_columnar(games, path, plies_path, batch_size, include_pgn, fmt):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("❌ pyarrow não está instalado - execute: pip install pyarrow")
+        return 0
+
+    game_schema, ply_schema = _arrow_schemas(include_pgn)
+    games_writer = _open_arrow_writer(path, game_schema, fmt)
+    plies_writer = _open_arrow_writer(plies_path, ply_schema, fmt) if plies_path else None
+    total = 0
+
+    try:
+        for game_rows, ply_rows in iter_batches(games, batch_size, include_pgn, plies_writer is not None):
+            games_writer.write_table(pa.Table.from_pylist(game_rows, schema=game_schema))
+            if plies_writer and ply_rows:
+                plies_writer.write_table(pa.Table.from_pylist(ply_rows, schema=ply_schema))
+            total += len(game_rows)
+    finally:
+        games_writer.close()
+        if plies_writer:
+            plies_writer.close()
+
+    print(f"✅ {total} partidas exportadas para {path}")
+    return total
+
+
+def export_parquet(games, path, plies_path=None, batch_size=BATCH_SIZE, include_pgn=False):
+    """Exporta as partidas em Parquet, um row group por lote"""
+    return _export_columnar(games, path, plies_path, batch_size, include_pgn, 'parquet')
+
+
+def export_arrow(games, path, plies_path=None, batch_size=BATCH_SIZE, include_pgn=False):
+    """Exporta as partidas em Arrow IPC (formato .arrow/Feather v2), em lotes"""
+    return _export_columnar(games, path, plies_path, batch_size, include_pgn, 'arrow')
+
+
+EXPORTERS = {
+    '.ndjson': export_ndjson,
+    '.jsonl': export_ndjson,
+    '.parquet': export_parquet,
+    '.arrow': export_arrow,
+    '.feather': export_arrow,
+}
+
+
+def main():
+    if len(sys.argv) < 4:
+        print("Uso: python export.py <arquivo.pgn> <nome_do_jogador> <saida.ndjson|.parquet|.arrow> [saida_lances]")
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name, output_path = sys.argv[1:4]
+    plies_path = sys.argv[4] if len(sys.argv) > 4 else None
+
+    extension = output_path[output_path.rfind('.'):].lower()
+    exporter = EXPORTERS.get(extension)
+    if exporter is None:
+        print(f"❌ Formato não suportado: {extension}")
+        sys.exit(1)
+
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name, parse=False)
+            exporter(analyzer.iter_games(), output_path, plies_path)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+
+
+if __name__ == "__main__":
+    main()
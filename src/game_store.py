@@ -0,0 +1,153 @@
+import io
+import os
+import threading
+
+import chess.pgn
+
+from pgn_scan import decode_chunk, iter_merged_chunks
+from ply_features import PlyFeatureBuilder
+from report import ReportAggregates
+from stenio import PGNAnalyzer
+
+# Campos de cada partida devolvidos pelas consultas (sem lances/relógios)
+SUMMARY_FIELDS = [
+    'white', 'black', 'result', 'white_elo', 'black_elo', 'opening', 'eco',
+    'date', 'game_length', 'termination', 'time_control',
+]
+
+
+class GameStore:
+    """
+    Partidas de um arquivo PGN mantidas em memória com agregados prontos.
+
+    O arquivo é lido uma vez; refresh() lê apenas os bytes acrescentados
+    depois do offset da última partida completa.
+    """
+
+    def __init__(self, pgn_path, player_name):
+        self.pgn_path = pgn_path
+        self.player_name = player_name.lower()
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.analyzer = PGNAnalyzer("", self.player_name, parse=False)
+            self.aggregates = ReportAggregates(self.analyzer)
+            self.offset = 0
+            self.games_scanned = 0
+            self.version = 0
+            self._report = None
+
+    @property
+    def games(self):
+        return self.analyzer.games
+
+    def read_new_games(self, offset):
+        """Parseia as partidas completas a partir do offset; retorna (registros, novo offset, lidas)"""
+        records = []
+        scanned = 0
+        with open(self.pgn_path, 'rb') as handle:
+            # Os dois blocos de cabeçalhos do PGN convertido do Chess.com são uma partida só
+            for game_offset, chunk in iter_merged_chunks(handle, offset, final=False):
+                offset = game_offset + len(chunk)
+                self.analyzer.parse_errors.at(self.games_scanned + scanned, game_offset)
+                scanned += 1
+                game = None
+                try:
+                    game = chess.pgn.read_game(io.StringIO(decode_chunk(chunk)), Visitor=PlyFeatureBuilder)
+                    record = self.analyzer.game_to_record(game) if game is not None else None
+                except Exception as e:
+                    self.analyzer.parse_errors.record(game.headers if game is not None else None, e)
+                    continue
+                if record is not None and not self.analyzer.is_duplicate(record):
+                    records.append(record)
+        return records, offset, scanned
+
+    def refresh(self):
+        """
+        Incorpora as partidas novas do arquivo; retorna quantas partidas do jogador entraram
+
+        Tudo acontece sob o lock: dois refreshes simultâneos (tarefa periódica e
+        /refresh do servidor) leriam o mesmo offset e somariam as partidas duas vezes.
+        """
+        with self.lock:
+            try:
+                size = os.path.getsize(self.pgn_path)
+            except OSError as e:
+                print(f"❌ Não foi possível ler {self.pgn_path}: {e}")
+                return 0
+
+            if size < self.offset:
+                print("⚠️ Arquivo PGN diminuiu - recarregando do início")
+                self.reset()
+            if size == self.offset:
+                return 0
+
+            records, offset, scanned = self.read_new_games(self.offset)
+            self.add_games(records, offset, scanned)
+            return len(records)
+
+    def add_games(self, records, offset, scanned):
+        """Acrescenta partidas já parseadas e as soma aos agregados existentes"""
+        with self.lock:
+            self.analyzer.games.extend(records)
+            if records:
+                self.aggregates.add_games(records)
+            self.offset = offset
+            self.games_scanned += scanned
+            if records:
+                self.version += 1
+                self._report = None
+
+    def report(self):
+        """Modelo do relatório, remontado dos agregados só quando entram partidas novas"""
+        with self.lock:
+            if self._report is None:
+                self._report = self.aggregates.to_model()
+            return self._report
+
+    def filter_games(self, color=None, result=None, opening=None, opponent=None,
+                     min_elo=None, max_elo=None, time_control=None, since=None, until=None):
+        """Filtra as partidas do jogador; todos os critérios são opcionais"""
+        analyzer = self.analyzer
+        opening = opening.lower() if opening else None
+        opponent = opponent.lower() if opponent else None
+        selected = []
+
+        with self.lock:
+            for index, game in enumerate(analyzer.games):
+                is_white = analyzer.is_player_white(game)
+                if color and (color == 'white') != is_white:
+                    continue
+                if result == 'win' and not analyzer.did_player_win(game):
+                    continue
+                if result == 'loss' and not analyzer.did_player_lose(game):
+                    continue
+                if result == 'draw' and not analyzer.is_draw(game):
+                    continue
+                if opening and opening not in game['opening'].lower():
+                    continue
+                opponent_name = game['black'] if is_white else game['white']
+                if opponent and opponent not in opponent_name:
+                    continue
+                opponent_elo = game['black_elo'] if is_white else game['white_elo']
+                if min_elo is not None and opponent_elo < min_elo:
+                    continue
+                if max_elo is not None and opponent_elo > max_elo:
+                    continue
+                if time_control and game.get('time_control') != time_control:
+                    continue
+                if since and game.get('date', '') < since:
+                    continue
+                if until and game.get('date', '') > until:
+                    continue
+                selected.append(index)
+        return selected
+
+    def summarize(self, index):
+        game = self.analyzer.games[index]
+        summary = {'index': index}
+        for field in SUMMARY_FIELDS:
+            summary[field] = game.get(field)
+        return summary
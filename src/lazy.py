@@ -0,0 +1,30 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Importa um módulo adiando a execução dele até o primeiro acesso a um atributo
+
+    Para módulos pesados (requests, chess, numpy via módulos de análise) que
+    só alguns caminhos do programa usam: `--help` ou um relatório em cache não
+    pagam o import. Se o módulo já foi importado, devolve o próprio módulo.
+
+    Args:
+        name (str): nome do módulo (sem ponto: submódulos exigiriam importar o pacote pai)
+
+    Returns:
+        module: módulo registrado em sys.modules, carregado sob demanda
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"Módulo não encontrado: {name}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
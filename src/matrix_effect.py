@@ -1,102 +1,288 @@
-import random
-import time
+import collections
+import io
 import os
 import sys
-from colorama import Fore, Style, Back, init
+import threading
+import time
+
+import numpy as np
+
+from temporal_stats import format_duration
+
+GREEN = "\033[32m"
+BRIGHT_GREEN = "\033[92m"
+RESET = "\033[0m"
+
+CHARACTERS = np.array(list("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!@#$%^&*()_+-=[]{}|;':\",.<>/?`~"))
+
+DEFAULT_FPS = 10
+# Linhas da "chuva de código" acima das três linhas de status
+RAIN_ROWS = 3
+RAIN_TRAIL = 2
+MAX_WIDTH = 100
+BAR_LENGTH = 40
+# Amostras (uma por quadro) usadas para a taxa de partidas/s e bytes/s
+RATE_WINDOW = 30
+# Células iguais entre duas mudanças na mesma linha que compensa reescrever em vez de mover o cursor
+MAX_GAP = 6
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _enable_windows_ansi():
+    """No Windows os códigos ANSI só funcionam depois de configurar o console (colorama)"""
+    try:
+        from colorama import just_fix_windows_console
+    except ImportError:
+        return
+    just_fix_windows_console()
+
+
+class _ConsoleProxy(io.TextIOBase):
+    """Substitui sys.stdout enquanto o progresso está na tela: prints saem acima da área redesenhada"""
 
-# Inicializa o Colorama para que as cores funcionem
-init(autoreset=True)
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.pending = ''
 
+    def writable(self):
+        return True
 
-def clear_screen():
-    """Limpa a tela do terminal."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    def write(self, text):
+        self.pending += text
+        if '\n' in self.pending:
+            lines, _, self.pending = self.pending.rpartition('\n')
+            self.renderer.print_above(lines + '\n')
+        return len(text)
 
+    def flush(self):
+        pass
 
-def matrix_effect_loop():
+
+class ProgressRenderer:
     """
-    Simula o efeito de chuva de código do Matrix em loop infinito, com
-    contagem de tempo e barra de carregamento que se reinicia.
+    Progresso real do download e do parse, redesenhado por uma thread em segundo plano.
+
+    O laço de trabalho só atualiza contadores (update/advance); a thread monta
+    o quadro em um buffer pré-alocado no máximo `fps` vezes por segundo e
+    escreve no terminal apenas as células que mudaram desde o quadro anterior.
+    Fora de um terminal (saída redirecionada) nada é desenhado.
     """
-    try:
-        # Tenta obter o tamanho do terminal
-        cols, rows = os.get_terminal_size()
-    except OSError:
-        # Valores padrão se não for possível obter o tamanho
-        cols, rows = 80, 24
 
-    characters = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!@#$%^&*()_+-=[]{}|;':\",.<>/?`~"
+    def __init__(self, title, total_bytes=None, total_steps=None, fps=DEFAULT_FPS,
+                 stream=None, rain_rows=RAIN_ROWS, enabled=None):
+        self.title = title
+        self.total_bytes = total_bytes
+        self.total_steps = total_steps
+        self.games = 0
+        self.position = 0
+        self.steps = 0
+
+        self.stream = stream or sys.stdout
+        if enabled is None:
+            enabled = self.stream.isatty() and os.environ.get('TERM') != 'dumb'
+        self.enabled = enabled
+        self.interval = 1.0 / fps
+        self.rain_rows = rain_rows
+
+        try:
+            columns = os.get_terminal_size(self.stream.fileno()).columns
+        except (OSError, ValueError, io.UnsupportedOperation):
+            columns = 80
+        # Uma coluna de folga: escrever na última coluna faz alguns terminais quebrarem a linha
+        self.width = max(20, min(MAX_WIDTH, columns - 1))
+        self.height = rain_rows + 3
+
+        self.frame = np.full((self.height, self.width), ' ', dtype='<U1')
+        self.shown = self.frame.copy()
+        self.rng = np.random.default_rng()
+        self.drops = self.rng.integers(-4 * self.height, 0, self.width)
+        self.samples = collections.deque(maxlen=RATE_WINDOW)
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.saved_stdout = None
+        self.start_time = None
+        self.cursor_row = 0
 
-    # Inicia a contagem de tempo real e o tempo do ciclo atual
-    total_start_time = time.time()
-    cycle_start_time = time.time()
+    def update(self, games=None, position=None, steps=None):
+        """Define os contadores absolutos (barato: chamado a cada partida no laço de parse)"""
+        if games is not None:
+            self.games = games
+        if position is not None:
+            self.position = position
+        if steps is not None:
+            self.steps = steps
 
-    # Define o tempo de cada ciclo (ficcional)
-    fictional_cycle_duration = 3600  # 3600 segundos (1 hora)
-    loading_bar_length = 50
+    def advance(self, games=0, bytes_read=0, steps=0):
+        """Soma aos contadores"""
+        self.games += games
+        self.position += bytes_read
+        self.steps += steps
 
-    while True:  # Loop principal e infinito
-        # Desenha a "chuva de código" em uma única linha, mantendo o cursor na mesma posição
-        line = ""
-        for _ in range(cols):
-            if random.random() < 0.1:
-                line += Fore.GREEN + random.choice(characters)
-            else:
-                line += " "
-        sys.stdout.write(Back.BLACK + line + Style.RESET_ALL)
-        sys.stdout.write(f"\033[F" * 1)
+    def start(self):
+        self.start_time = time.monotonic()
+        if not self.enabled:
+            return self
+        if os.name == 'nt':
+            _enable_windows_ansi()
+        self._reserve()
+        self.saved_stdout = sys.stdout
+        sys.stdout = _ConsoleProxy(self)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
 
-        # === INFORMAÇÕES DE STATUS ===
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        proxy, sys.stdout = sys.stdout, self.saved_stdout
+        with self.lock:
+            self.render()
+            # Deixa o último quadro na tela e continua a saída logo abaixo dele
+            self._move_to(self.height - 1)
+            self.stream.write("\n")
+            self.stream.flush()
+        if proxy.pending:
+            print(proxy.pending)
 
-        # Volta ao topo da tela para imprimir o status
-        sys.stdout.write(f"\033[F" * (rows - 1))
+    def __enter__(self):
+        return self.start()
 
-        # Limpa as 3 linhas superiores para o texto
-        for _ in range(3):
-            sys.stdout.write("\033[K\n")
-        sys.stdout.write(f"\033[F" * 3)
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+        return False
 
-        # Calcula o tempo total real e o tempo no ciclo atual
-        elapsed_total_real_time = time.time() - total_start_time
-        elapsed_cycle_real_time = time.time() - cycle_start_time
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                self.render()
 
-        # Calcula o progresso do ciclo (de 0 a 100%)
-        progress_percentage = min(100, (elapsed_cycle_real_time / (fictional_cycle_duration / 60)) * 100)
+    def _reserve(self):
+        """Abre espaço para o quadro a partir da linha atual e volta o cursor ao topo dele"""
+        self.stream.write("\n" * self.height + f"\033[{self.height}A\r")
+        self.shown[:] = ' '
+        self.cursor_row = 0
 
-        # Se o ciclo terminar, reinicia o cronômetro do ciclo
-        if progress_percentage >= 100:
-            progress_percentage = 0
-            cycle_start_time = time.time()
+    def _move_to(self, row):
+        if row > self.cursor_row:
+            self.stream.write(f"\033[{row - self.cursor_row}B")
+        elif row < self.cursor_row:
+            self.stream.write(f"\033[{self.cursor_row - row}A")
+        self.cursor_row = row
 
-        # Formata o tempo total de processamento em dias, horas, minutos e segundos
-        simulated_seconds = elapsed_total_real_time * 60  # Cada segundo real conta como 1 minuto
-        days = int(simulated_seconds / 86400)
-        hours = int((simulated_seconds % 86400) / 3600)
-        minutes = int((simulated_seconds % 3600) / 60)
-        seconds = int(simulated_seconds % 60)
+    def print_above(self, text):
+        """Escreve linhas completas acima do quadro e o redesenha inteiro logo abaixo delas"""
+        with self.lock:
+            self._move_to(0)
+            self.stream.write("\r\033[J" + text)
+            self._reserve()
+            self.render()
 
-        time_display = f"{days} d, {hours} h, {minutes} m, {seconds} s"
+    def render(self):
+        self._draw_rain()
+        self._draw_status()
 
-        # Monta a barra de carregamento
-        filled_bar = int((progress_percentage / 100) * loading_bar_length)
-        bar = Fore.GREEN + "█" * filled_bar + Style.DIM + "░" * (loading_bar_length - filled_bar) + Style.RESET_ALL
+        out = []
+        for row in np.flatnonzero((self.frame != self.shown).any(axis=1)):
+            changed = np.flatnonzero(self.frame[row] != self.shown[row])
+            # Junta mudanças próximas em um trecho só
+            breaks = np.flatnonzero(np.diff(changed) > MAX_GAP)
+            starts = changed[np.concatenate(([0], breaks + 1))]
+            ends = changed[np.concatenate((breaks, [len(changed) - 1]))] + 1
+            color = GREEN if row < self.rain_rows else BRIGHT_GREEN
+            for start, end in zip(starts, ends):
+                if row != self.cursor_row:
+                    out.append(f"\033[{row - self.cursor_row}B" if row > self.cursor_row
+                               else f"\033[{self.cursor_row - row}A")
+                    self.cursor_row = row
+                out.append(f"\033[{start + 1}G{color}{''.join(self.frame[row, start:end])}{RESET}")
+            self.shown[row] = self.frame[row]
 
-        # Imprime o status, sobrescrevendo o efeito de fundo
-        sys.stdout.write(f"\r{Back.BLACK}{Fore.GREEN}PROCESSANDO DADOS...{Style.RESET_ALL}\n")
-        sys.stdout.write(f"\r{Back.BLACK}{Fore.GREEN}[{bar}]{Style.RESET_ALL} {progress_percentage:.1f}%\n")
-        sys.stdout.write(f"\r{Back.BLACK}{Fore.GREEN}Tempo de processamento: {time_display}{Style.RESET_ALL}")
+        if out:
+            # O cursor volta ao topo do quadro depois de cada desenho
+            if self.cursor_row:
+                out.append(f"\033[{self.cursor_row}A")
+                self.cursor_row = 0
+            self.stream.write(''.join(out) + "\r")
+            self.stream.flush()
 
-        # Volta o cursor para a linha inicial da animação
-        sys.stdout.write(f"\033[{rows - 2}B")
-        sys.stdout.flush()
+    def _draw_rain(self):
+        if not self.rain_rows:
+            return
+        # Cada coluna tem uma gota descendo; as que saem do quadro recomeçam acima dele
+        self.drops += 1
+        finished = self.drops - RAIN_TRAIL >= self.rain_rows
+        self.drops[finished] = self.rng.integers(-4 * self.height, 0, np.count_nonzero(finished))
 
-        # Pequeno atraso para a animação
-        time.sleep(0.05)
+        rain = self.frame[:self.rain_rows]
+        depth = self.drops[np.newaxis, :] - np.arange(self.rain_rows)[:, np.newaxis]
+        visible = (depth >= 0) & (depth < RAIN_TRAIL)
+        # Só as células que acabaram de acender ganham um caractere novo
+        lit = visible & (rain == ' ')
+        rain[lit] = self.rng.choice(CHARACTERS, np.count_nonzero(lit))
+        rain[~visible] = ' '
+
+    def _draw_status(self):
+        elapsed = time.monotonic() - self.start_time
+        now = time.monotonic()
+        self.samples.append((now, self.games, self.position, self.steps))
+        first = self.samples[0]
+        window = now - first[0]
+        game_rate = (self.games - first[1]) / window if window > 0 else 0.0
+        byte_rate = (self.position - first[2]) / window if window > 0 else 0.0
+
+        fraction, eta = None, None
+        if self.total_bytes:
+            fraction = min(1.0, self.position / self.total_bytes)
+            if byte_rate > 0:
+                eta = (self.total_bytes - self.position) / byte_rate
+        elif self.total_steps:
+            fraction = min(1.0, self.steps / self.total_steps)
+            if self.steps:
+                eta = elapsed * (self.total_steps - self.steps) / self.steps
+
+        title = f"PROCESSANDO DADOS... {self.title}"
+        if self.total_steps:
+            title += f" ({self.steps}/{self.total_steps})"
+        if fraction is None:
+            bar = f"[{'░' * BAR_LENGTH}]"
+        else:
+            filled = int(fraction * BAR_LENGTH)
+            bar = f"[{'█' * filled}{'░' * (BAR_LENGTH - filled)}] {fraction * 100:5.1f}%"
+        stats = (f"{self.games:,} partidas | {game_rate:,.0f} partidas/s | "
+                 f"{format_bytes(self.position)} lidos | "
+                 f"ETA {format_duration(eta) if eta is not None else '--'} | {format_duration(elapsed)}")
+
+        for row, text in enumerate((title, bar, stats), self.rain_rows):
+            line = text[:self.width].ljust(self.width)
+            self.frame[row] = list(line)
 
 
 if __name__ == "__main__":
-    clear_screen()
-    print("Iniciando simulação de processamento da Matrix. Pressione Ctrl+C para sair.")
-    time.sleep(2)
-    clear_screen()
-    matrix_effect_loop()
\ No newline at end of file
+    # Demonstração com o parse real de um PGN: python matrix_effect.py <arquivo.pgn>
+    from pgn_io import detect_compression, open_pgn
+    from pgn_scan import ParseErrorLog, iter_parsed_games
+
+    if len(sys.argv) < 2:
+        print("Uso: python matrix_effect.py <arquivo.pgn>")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    errors = ParseErrorLog()
+    total = os.path.getsize(path) if detect_compression(path) is None else None
+    with ProgressRenderer(os.path.basename(path), total_bytes=total) as progress, \
+            open_pgn(path, threaded=True) as file:
+        for _ in iter_parsed_games(file, errors):
+            progress.update(errors.game_number, errors.offset)
+        progress.update(position=total)
+    errors.print_summary()
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import chess
+
+# Meses de arquivos de cada jogador (o último é o mês corrente) e partidas por mês
+MOCK_MONTHS = 3
+GAMES_PER_MONTH = 12
+TIME_CONTROLS = ['60', '180+2', '600', '1/86400']
+# Posição de Chess960 e posição "a partir da posição" incluídas em todo mês
+CHESS960_FEN = 'bbqrnnkr/pppppppp/8/8/8/8/PPPPPPPP/BBQRNNKR w HDhd - 0 1'
+SETUP_FEN = 'r3k2r/ppp2ppp/2n5/3q4/3P4/2N5/PPP2PPP/R2QK2R w KQkq - 0 12'
+
+
+def archive_months(count=MOCK_MONTHS):
+    """Meses 'AAAA/MM' dos arquivos, terminando no mês corrente (revalidado com ETag pelo cache)"""
+    now = time.gmtime()
+    index = now.tm_year * 12 + now.tm_mon - 1
+    return [f"{(i // 12):04d}/{(i % 12) + 1:02d}" for i in range(index - count + 1, index + 1)]
+
+
+def _random_movetext(board, rng, plies):
+    """Lances SAN aleatórios (e legais) a partir de `board`, já numerados como no PGN"""
+    parts = []
+    for _ in range(plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        if board.turn == chess.WHITE:
+            parts.append(f"{board.fullmove_number}.")
+        elif not parts:
+            parts.append(f"{board.fullmove_number}...")
+        parts.append(board.san(move))
+        board.push(move)
+    return ' '.join(parts)
+
+
+def sample_game(username, month, number, rng):
+    """Partida no formato JSON da API do Chess.com, gerada de forma determinística"""
+    year, mon = month.split('/')
+    opponent = f"rival{rng.randrange(5)}"
+    white, black = (username, opponent) if number % 2 == 0 else (opponent, username)
+    outcome = rng.choice(['1-0', '0-1', '1/2-1/2'])
+    results = {'1-0': ('win', 'resigned'), '0-1': ('resigned', 'win'), '1/2-1/2': ('agreed', 'agreed')}[outcome]
+    day = number % 28 + 1
+    start = time.mktime((int(year), int(mon), day, 12, number, 0, 0, 0, 0))
+    time_control = TIME_CONTROLS[number % len(TIME_CONTROLS)]
+
+    rules = 'chess'
+    fen = None
+    if number == GAMES_PER_MONTH - 1:
+        rules, fen = 'chess960', CHESS960_FEN
+    elif number == GAMES_PER_MONTH - 2:
+        fen = SETUP_FEN
+    board = chess.Board(fen, chess960=rules == 'chess960') if fen else chess.Board()
+
+    link = f"https://www.chess.com/game/live/{hashlib.md5(f'{username}{month}{number}'.encode()).hexdigest()[:10]}"
+    headers = {
+        'Event': 'Live Chess', 'Site': 'Chess.com', 'Date': f"{year}.{mon}.{day:02d}", 'Round': '-',
+        'White': white, 'Black': black, 'Result': outcome,
+        **({'Variant': 'Chess960'} if rules == 'chess960' else {}),
+        **({'SetUp': '1', 'FEN': fen} if fen else {}),
+        'TimeControl': time_control, 'Termination': f"{white if outcome == '1-0' else black} won",
+        'UTCDate': f"{year}.{mon}.{day:02d}", 'UTCTime': time.strftime('%H:%M:%S', time.localtime(start)),
+        'Link': link,
+    }
+    movetext = _random_movetext(board, rng, rng.randrange(10, 60))
+    pgn = "\n".join(f'[{name} "{value}"]' for name, value in headers.items()) + f"\n\n{movetext} {outcome}\n"
+    return {
+        'url': link, 'pgn': pgn, 'time_control': time_control, 'end_time': int(start) + 600,
+        'rated': True, 'rules': rules, 'time_class': 'blitz',
+        'white': {'username': white, 'rating': 1200 + rng.randrange(400), 'result': results[0]},
+        'black': {'username': black, 'rating': 1200 + rng.randrange(400), 'result': results[1]},
+    }
+
+
+def month_games(username, month):
+    rng = random.Random(f"{username}/{month}")
+    return [sample_game(username, month, number, rng) for number in range(GAMES_PER_MONTH)]
+
+
+class MockChessComServer(ThreadingHTTPServer):
+    """
+    Servidor local com as rotas da API usadas pelo download (lista de arquivos e mês)
+
+    Responde com ETag e devolve 304 a um If-None-Match igual; as primeiras
+    `throttle` requisições recebem 429 com Retry-After, como a API faz com
+    rajadas. Usuários começando com 'ghost' não existem (404).
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, throttle=0):
+        super().__init__(('127.0.0.1', port), MockChessComHandler)
+        self.throttle = throttle
+        self.stats = {'requests': 0, '200': 0, '304': 0, '404': 0, '429': 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/pub/player"
+
+    def count(self, status):
+        with self.lock:
+            self.stats[str(status)] += 1
+
+    def take_throttle(self):
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.throttle > 0:
+                self.throttle -= 1
+                return True
+            return False
+
+
+class MockChessComHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.server.take_throttle():
+            return self.reply(429, b'{"message": "too many requests"}', {'Retry-After': '0'})
+        parts = self.path.strip('/').split('/')
+        if parts[:2] != ['pub', 'player'] or len(parts) < 5 or parts[3] != 'games' or parts[2].startswith('ghost'):
+            return self.reply(404, b'{"message": "not found"}')
+        username = parts[2]
+        if parts[4] == 'archives':
+            root = f"{self.server.base_url}/{username}/games"
+            body = {'archives': [f"{root}/{month}" for month in archive_months()]}
+        elif len(parts) == 6 and f"{parts[4]}/{parts[5]}" in archive_months():
+            body = {'games': month_games(username, f"{parts[4]}/{parts[5]}")}
+        else:
+            return self.reply(404, b'{"message": "not found"}')
+        content = json.dumps(body).encode('utf-8')
+        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            return self.reply(304, b'', {'ETag': etag})
+        self.reply(200, content, {'ETag': etag})
+
+    def reply(self, status, content, headers=None):
+        self.server.count(status)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def start_server(port=0, throttle=0):
+    """Sobe o servidor em uma thread; use server.shutdown() para parar"""
+    server = MockChessComServer(port, throttle)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_check(usernames=('alice', 'bob', 'ghost')):
+    """
+    Exercita o scout contra o servidor local, sem rede externa
+
+    Confere a retentativa depois de 429, a revalidação com ETag/304, o
+    caminho offline do cache (servidor desligado) e o perfil de jogadores
+    com partidas de Chess960 e a partir de posição nos arquivos.
+
+    Returns:
+        bool: True se todas as verificações passaram
+    """
+    import contextlib
+    import io
+
+    from scout import CachedHTTP, fetch_archives, scout, scout_player
+
+    failures = []
+
+    def check(condition, label):
+        print(f"{'✅' if condition else '❌'} {label}")
+        if not condition:
+            failures.append(label)
+
+    # Partidas de xadrez normal de cada jogador (o Chess960 fica de fora da análise)
+    expected = MOCK_MONTHS * (GAMES_PER_MONTH - 1)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        server = start_server(throttle=2)
+        try:
+            quiet = io.StringIO()
+            with contextlib.redirect_stdout(quiet):
+                archives = fetch_archives(list(usernames), MOCK_MONTHS, CachedHTTP(cache_dir, rate=0),
+                                          server.base_url)
+            check(server.stats['429'] == 2 and archives['alice'] == archives['bob'] == MOCK_MONTHS,
+                  f"429 com Retry-After refeito: {server.stats['429']} 429, arquivos {archives}")
+            check(archives['ghost'] == 0, "usuário inexistente fica sem arquivos")
+
+            before = dict(server.stats)
+            http = CachedHTTP(cache_dir, rate=0)
+            with contextlib.redirect_stdout(quiet):
+                fetch_archives(['alice', 'bob'], MOCK_MONTHS, http, server.base_url)
+            requests_made = server.stats['requests'] - before['requests']
+            not_modified = server.stats['304'] - before['304']
+            # Só a lista de arquivos e o mês corrente vão à rede; meses encerrados vêm do cache
+            check(requests_made == 4 and not_modified == 4 and http.hits == 2 * (MOCK_MONTHS - 1),
+                  f"segunda busca: {requests_made} requisições, {not_modified} respostas 304, "
+                  f"{http.hits} do cache")
+
+            with contextlib.redirect_stdout(quiet):
+                profiles = scout(list(usernames), MOCK_MONTHS, server.base_url, processes=2,
+                                 cache_dir=cache_dir, rate=0)
+            check(all(profiles[name] and profiles[name]['games'] == expected for name in ('alice', 'bob')),
+                  f"scout completo: {[(name, p and p['games']) for name, p in profiles.items()]}")
+            check(profiles['ghost'] is None, "scout sem perfil para usuário inexistente")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Servidor desligado: a análise lê só o cache
+        offline = scout_player('alice', MOCK_MONTHS, server.base_url, cache_dir)
+        check(offline['games'] == expected and offline == profiles['alice'],
+              f"perfil offline do cache: {offline['games']} partidas")
+
+    print("✅ Todas as verificações passaram" if not failures else f"❌ {len(failures)} verificações falharam")
+    return not failures
+
+
+def main():
+    args = sys.argv[1:]
+    if args[:1] == ['--check']:
+        sys.exit(0 if run_check() else 1)
+    if args[:1] in (['--help'], ['-h']) or (args and not args[0].isdigit()):
+        print("Uso: python mock_chesscom.py [porta]      servidor local da API do Chess.com")
+        print("     python mock_chesscom.py --check     verifica o scout contra o servidor")
+        sys.exit(0 if args[:1] in (['--help'], ['-h']) else 1)
+    server = MockChessComServer(int(args[0]) if args else 8000)
+    print(f"🧪 API simulada em {server.base_url} (Ctrl+C para parar)")
+    print(f"   Ex.: python scout.py alice bob --base-url {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import re
+import sys
+
+import numpy as np
+
+from ply_features import PlyTable, white_first
+
+PIECE_LETTERS = {'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6}
+
+STEP_RE = re.compile(
+    r'^(?:(?P<side>me|op):)?(?:'
+    r'(?P<castling>O-O-O|O-O)'
+    r'|(?P<any>\*)'
+    r'|(?P<piece>[KQRBNP])?(?:(?P<capture>x(?P<captured>[QRBNP])?)|(?P<quiet>-))?'
+    r'(?P<square>[a-h?][1-8?])?(?:=(?P<promotion>[QRBN]))?'
+    r')(?P<check>[+#])?$')
+GAP_RE = re.compile(r'^\.\.(\d+)?$')
+
+# Cada meio-lance vira um inteiro com os campos abaixo (bits menos significativos primeiro)
+OWN_BIT = 1
+PIECE_SHIFT = 1
+CAPTURED_SHIFT = 4
+CHECK_BIT = 1 << 7
+MATE_BIT = 1 << 8
+CASTLING_SHIFT = 9
+PROMOTION_SHIFT = 11
+SQUARE_SHIFT = 14
+
+# Motivos procurados quando nenhum padrão é informado (no lugar das regexes sobre o texto do PGN)
+TACTICAL_PATTERNS = {
+    'Mate na última fileira': 'me:R?8# | me:R?1# | me:Q?8# | me:Q?1#',
+    'Mate de cavalo': 'me:N#',
+    'Mate de dama': 'me:Q#',
+    'Qxf7# / Qxf2#': 'me:Qxf7# | me:Qxf2#',
+    'Bxh7+ e mate em até 10 lances': 'me:Bxh7+ ..20 me:# | me:Bxh2+ ..20 me:#',
+    # Lance de dama sem captura tomado na hora por outra peça (trocas de dama não contam)
+    'Dama entregue': 'me:Q- op:PxQ | me:Q- op:NxQ | me:Q- op:BxQ | me:Q- op:RxQ | me:Q- op:KxQ',
+    'Qualidade entregue': 'me:RxN op:x | me:RxB op:x',
+    'Mate sofrido': 'op:#',
+}
+
+
+class StepPredicate:
+    """Condições de um passo; campo None aceita qualquer valor"""
+
+    def __init__(self, side=None, piece=None, capture=False, captured=None, file=None, rank=None,
+                 promotion=None, castling=None, check=False, mate=False, quiet=False):
+        self.side = side
+        self.piece = piece
+        self.capture = capture
+        self.quiet = quiet
+        self.captured = captured
+        self.file = file
+        self.rank = rank
+        self.promotion = promotion
+        self.castling = castling
+        self.check = check
+        self.mate = mate
+
+    def matches(self, code):
+        if self.side is not None and bool(code & OWN_BIT) != (self.side == 'me'):
+            return False
+        if self.piece is not None and (code >> PIECE_SHIFT) & 7 != self.piece:
+            return False
+        captured = (code >> CAPTURED_SHIFT) & 7
+        if self.capture and not captured:
+            return False
+        if self.quiet and captured:
+            return False
+        if self.captured is not None and captured != self.captured:
+            return False
+        square = (code >> SQUARE_SHIFT) & 63
+        if self.file is not None and square & 7 != self.file:
+            return False
+        if self.rank is not None and square >> 3 != self.rank:
+            return False
+        if self.promotion is not None and (code >> PROMOTION_SHIFT) & 7 != self.promotion:
+            return False
+        if self.castling is not None and (code >> CASTLING_SHIFT) & 3 != self.castling:
+            return False
+        if self.check and not code & CHECK_BIT:
+            return False
+        return not self.mate or bool(code & MATE_BIT)
+
+
+
+def parse_step(token):
+    match = STEP_RE.match(token)
+    if not match or token in ('me:', 'op:') or not token:
+        raise ValueError(f"Passo inválido no padrão: {token!r}")
+    square = match.group('square') or '??'
+    check = match.group('check')
+    return StepPredicate(
+        side=match.group('side'),
+        piece=PIECE_LETTERS.get(match.group('piece')),
+        capture=bool(match.group('capture')),
+        quiet=bool(match.group('quiet')),
+        captured=PIECE_LETTERS.get(match.group('captured')),
+        file=None if square[0] == '?' else ord(square[0]) - ord('a'),
+        rank=None if square[1] == '?' else int(square[1]) - 1,
+        promotion=PIECE_LETTERS.get(match.group('promotion')),
+        castling={'O-O': 1, 'O-O-O': 2}.get(match.group('castling')),
+        check=check is not None,
+        mate=check == '#',
+    )
+
+
+def parse_pattern(text):
+    """
+    Converte o texto de um padrão em uma lista de itens do autômato
+
+    Um padrão é uma sequência de passos separados por espaço; cada passo
+    descreve um meio-lance:
+
+        Bxh7+      bispo captura em h7 dando xeque
+        Qxf7#      dama captura em f7 com mate
+        RxQ        torre captura a dama (em qualquer casa)
+        Q-         lance de dama sem captura
+        e8=Q       promoção a dama em e8
+        N?7        cavalo para a 7ª fileira (? = qualquer coluna ou fileira)
+        x + #      qualquer captura / qualquer xeque / qualquer mate
+        O-O O-O-O  roque pequeno / grande
+        *          qualquer lance
+
+    Sem letra de peça o passo aceita qualquer peça: `e4` é qualquer lance
+    para e4 e `Pe4` só o de peão.
+
+    `me:` e `op:` antes do passo restringem a quem joga (o jogador analisado
+    ou o adversário). Entre dois passos, nada significa "no meio-lance
+    seguinte", `..N` "até N meios-lances depois" e `..` "em qualquer momento
+    depois". Alternativas separadas por `|` viram listas independentes:
+
+        me:Bxh7+ ..20 me:# | me:Bxh2+ ..20 me:#
+
+    Returns:
+        list: uma lista de itens por alternativa; cada item é ('step', predicado),
+        ('skip', None) (um meio-lance opcional) ou ('star', None) (qualquer número)
+    """
+    alternatives = []
+    for alternative in text.split('|'):
+        items = []
+        expect_step = True
+        for token in alternative.split():
+            gap = GAP_RE.match(token)
+            if gap:
+                if expect_step:
+                    raise ValueError(f"Intervalo '{token}' precisa vir entre dois passos: {text!r}")
+                if gap.group(1) is None:
+                    items.append(('star', None))
+                else:
+                    distance = int(gap.group(1))
+                    if distance < 1:
+                        raise ValueError(f"Distância precisa ser pelo menos 1: {token!r}")
+                    # Até N meios-lances depois = até N-1 lances quaisquer no meio
+                    items.extend([('skip', None)] * (distance - 1))
+                expect_step = True
+            else:
+                items.append(('step', parse_step(token)))
+                expect_step = False
+        if expect_step:
+            raise ValueError(f"Padrão vazio ou terminado em intervalo: {text!r}")
+        alternatives.append(items)
+    return alternatives
+
+
+class PatternAutomaton:
+    """
+    Vários padrões compilados em um único autômato, percorrido uma vez por partida.
+
+    Cada padrão é um NFA (estado j = primeiros j itens casados); os de todos os
+    padrões são unidos e determinizados sob demanda: cada conjunto de estados
+    ativos vira um estado do DFA. Os códigos de lance são agrupados em classes
+    (mesmo resultado em todos os passos) e a transição (estado, classe) é
+    calculada uma vez e guardada. Depois de aquecido, cada meio-lance custa
+    uma consulta a um dicionário, qualquer que seja o número de padrões.
+    """
+
+    def __init__(self, patterns):
+        if not isinstance(patterns, dict):
+            patterns = {text: text for text in patterns}
+        self.names = list(patterns)
+        # Um NFA por alternativa; `owner` diz a qual padrão cada um pertence
+        self.nfas = []
+        self.owner = []
+        self.predicates = []
+        for index, name in enumerate(self.names):
+            for items in parse_pattern(patterns[name]):
+                # Nos itens, o predicado vira o índice dele em self.predicates
+                nfa = []
+                for kind, predicate in items:
+                    if kind == 'step':
+                        self.predicates.append(predicate)
+                        predicate = len(self.predicates) - 1
+                    nfa.append((kind, predicate))
+                self.nfas.append(nfa)
+                self.owner.append(index)
+
+        self.start_states = self._closure((nfa, 0) for nfa in range(len(self.nfas)))
+        self.state_ids = {}
+        self.states = []
+        self.accepting = []
+        self.transitions = {}
+        self.start = self._state_id(self.start_states)
+        # código do lance -> classe; classe -> conjunto dos passos que ela satisfaz
+        self.code_classes = {}
+        self.class_ids = {}
+        self.class_matches = []
+
+    def _closure(self, states):
+        """Estados alcançáveis sem consumir lance (itens opcionais pulados)"""
+        closed = set()
+        pending = list(states)
+        while pending:
+            nfa, position = pending.pop()
+            if (nfa, position) in closed:
+                continue
+            closed.add((nfa, position))
+            items = self.nfas[nfa]
+            if position < len(items) and items[position][0] in ('skip', 'star'):
+                pending.append((nfa, position + 1))
+        return frozenset(closed)
+
+    def _state_id(self, states):
+        state = self.state_ids.get(states)
+        if state is None:
+            state = len(self.states)
+            self.state_ids[states] = state
+            self.states.append(states)
+            self.accepting.append(frozenset(self.owner[nfa] for nfa, position in states
+                                            if position == len(self.nfas[nfa])))
+        return state
+
+    def code_class(self, code):
+        cls = self.code_classes.get(code)
+        if cls is None:
+            matched = frozenset(i for i, predicate in enumerate(self.predicates) if predicate.matches(code))
+            cls = self.class_ids.setdefault(matched, len(self.class_matches))
+            if cls == len(self.class_matches):
+                self.class_matches.append(matched)
+            self.code_classes[code] = cls
+        return cls
+
+    def _step(self, state, cls):
+        matched = self.class_matches[cls]
+        following = set(self.start_states)
+        for nfa, position in self.states[state]:
+            items = self.nfas[nfa]
+            if position == len(items):
+                continue
+            kind, predicate = items[position]
+            if kind == 'star':
+                following.add((nfa, position))
+            elif kind == 'skip' or predicate in matched:
+                following.add((nfa, position + 1))
+        target = self._state_id(self._closure(following))
+        self.transitions[state, cls] = target
+        return target
+
+    def run(self, codes):
+        """
+        Percorre os códigos de uma partida
+
+        Returns:
+            dict: índice do padrão -> meio-lance (0 = primeiro) em que casou pela primeira vez
+        """
+        return self._run([self.code_class(code) for code in codes])
+
+    def _run(self, classes):
+        transitions = self.transitions
+        accepting = self.accepting
+        state = self.start
+        found = {}
+        for ply, cls in enumerate(classes):
+            target = transitions.get((state, cls))
+            state = self._step(state, cls) if target is None else target
+            if accepting[state]:
+                for index in accepting[state]:
+                    found.setdefault(index, ply)
+                if len(found) == len(self.names):
+                    break
+        return found
+
+    def search(self, games, player_name, table=None):
+        """
+        Procura todos os padrões em todas as partidas numa só passada
+
+        Returns:
+            dict: nome do padrão -> lista de (índice da partida, meio-lance do casamento)
+        """
+        table = table if table is not None else PlyTable.from_games(games)
+        # Cada código distinto é classificado uma vez só
+        codes, inverse = np.unique(event_codes(table, games, player_name), return_inverse=True)
+        classes = np.array([self.code_class(code) for code in codes.tolist()], dtype=np.int64)
+        classes = classes[inverse].tolist()
+        offsets = table.offsets.tolist()
+        results = {name: [] for name in self.names}
+        for game in range(table.game_count):
+            for index, ply in self._run(classes[offsets[game]:offsets[game + 1]]).items():
+                results[self.names[index]].append((game, ply))
+        return results
+
+
+def ended_in_mate(game):
+    """
+    A partida terminou em xeque-mate
+
+    Decide pela posição final do parser ('final', ver termination.final_state);
+    só registros sem ela caem no cabeçalho Termination ou, sem ele, no resultado.
+    """
+    final = game.get('final')
+    if final is not None:
+        return final[0].startswith('mate')
+    termination = (game.get('termination') or '').lower()
+    if 'checkmate' in termination or 'xeque-mate' in termination:
+        return True
+    return termination in ('', 'normal') and game.get('result') in ('1-0', '0-1')
+
+
+def event_codes(table, games, player_name):
+    """Código inteiro de cada meio-lance da tabela (campos empacotados em bits, ver *_SHIFT)"""
+    player_name = player_name.lower()
+    is_white = np.array([player_name in g['white'].lower() for g in games], dtype=bool)
+    plies = table.plies
+    codes = (table.player_moves(is_white).astype(np.int64)
+             | plies['piece'].astype(np.int64) << PIECE_SHIFT
+             | plies['captured'].astype(np.int64) << CAPTURED_SHIFT
+             | plies['check'].astype(np.int64) * CHECK_BIT
+             | plies['castling'].astype(np.int64) << CASTLING_SHIFT
+             | plies['promotion'].astype(np.int64) << PROMOTION_SHIFT
+             | plies['to_square'].astype(np.int64) << SQUARE_SHIFT)
+
+    # Mate = xeque no último meio-lance de uma partida que terminou em mate
+    mated = np.array([ended_in_mate(g) for g in games], dtype=bool) & (table.lengths > 0)
+    last = table.offsets[1:][mated] - 1
+    codes[last[plies['check'][last]]] |= MATE_BIT
+    return codes
+
+
+def search_games(games, player_name, patterns, table=None):
+    return PatternAutomaton(patterns).search(games, player_name, table)
+
+
+def print_pattern_report(games, results, examples=3):
+    print("🔎 PADRÕES DE LANCES:")
+    for name, matches in results.items():
+        print(f"• {name}: {len(matches)} partidas")
+        for game_index, ply in matches[:examples]:
+            game = games[game_index]
+            # Partidas a partir de um [FEN] com as pretas a jogar começam em "1..."
+            ply += 0 if white_first(game) else 1
+            move = f"{ply // 2 + 1}{'.' if ply % 2 == 0 else '...'}"
+            print(f"    {game.get('date', '?')} {game['white']} vs {game['black']} "
+                  f"{game['result']} (lance {move})")
+    print()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python move_patterns.py <arquivo.pgn> <nome_do_jogador> [padrão ...]")
+        print("Sem padrões, procura os motivos táticos conhecidos. Ex.: \"me:Bxh7+ ..20 me:#\"")
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name = sys.argv[1:3]
+    patterns = sys.argv[3:] or TACTICAL_PATTERNS
+    try:
+        automaton = PatternAutomaton(patterns)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+    print_pattern_report(analyzer.games, automaton.search(analyzer.games, player_name, analyzer.ply_table()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import heapq
+import os
+import sys
+import tempfile
+
+import chess
+import chess.polyglot
+import numpy as np
+
+# Profundidade do livro em meios-lances
+BOOK_PLIES = 30
+# Ocorrências (posição, lance) mantidas em memória antes de virar um trecho ordenado em disco
+RUN_SIZE = 1_000_000
+# Linhas lidas de cada trecho por vez durante o merge
+MERGE_BLOCK = 65536
+MAX_WEIGHT = 0xFFFF
+
+# Pontos de quem jogou o lance: vitória 2, empate 1, derrota 0 (o peso no livro é a soma)
+RESULT_SCORES = {'1-0': (2, 0), '0-1': (0, 2), '1/2-1/2': (1, 1)}
+
+RUN_DTYPE = np.dtype([('key', 'u8'), ('move', 'u2'), ('games', 'u4'), ('score', 'u4')])
+
+# Promoção no formato Polyglot: 1 = cavalo ... 4 = dama
+POLYGLOT_PROMOTION = {chess.KNIGHT: 1, chess.BISHOP: 2, chess.ROOK: 3, chess.QUEEN: 4}
+
+
+def polyglot_move(board, move):
+    """Lance codificado como no Polyglot; o roque é gravado como "rei captura a própria torre\""""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    return to_square | move.from_square << 6 | POLYGLOT_PROMOTION.get(move.promotion, 0) << 12
+
+
+def iter_book_moves(games, player_name, plies=BOOK_PLIES, player_only=True):
+    """
+    Ocorrências (hash Polyglot da posição, lance Polyglot, pontos de quem jogou) das partidas
+
+    Com player_only, só entram os lances do próprio jogador (o repertório
+    dele); sem, os dos dois lados. Partidas que não começam da posição
+    inicial (cabeçalho FEN) não são aberturas e ficam de fora; um lance
+    ilegal encerra a partida ali.
+    """
+    player_name = player_name.lower()
+    for game in games:
+        scores = RESULT_SCORES.get(game['result'])
+        is_white = player_name in game['white'].lower()
+        if scores is None or (not is_white and player_name not in game['black'].lower()):
+            continue
+        if game.get('fen') and game['fen'] != chess.STARTING_FEN:
+            continue
+        board = chess.Board()
+        for uci in game['moves'][:plies]:
+            move = chess.Move.from_uci(uci)
+            if not board.is_legal(move):
+                break
+            mover_is_white = board.turn == chess.WHITE
+            if not player_only or mover_is_white == is_white:
+                yield (chess.polyglot.zobrist_hash(board), polyglot_move(board, move),
+                       scores[0] if mover_is_white else scores[1])
+            board.push(move)
+
+
+def aggregate(records):
+    """Soma partidas e pontos de cada (posição, lance); o resultado sai ordenado por hash e lance"""
+    if len(records) == 0:
+        return records
+    records = records[np.lexsort((records['move'], records['key']))]
+    starts = np.flatnonzero(np.concatenate(([True], (records['key'][1:] != records['key'][:-1])
+                                            | (records['move'][1:] != records['move'][:-1]))))
+    merged = records[starts]
+    merged['games'] = np.add.reduceat(records['games'], starts)
+    merged['score'] = np.add.reduceat(records['score'], starts)
+    return merged
+
+
+class BookBuilder:
+    """
+    Monta um livro Polyglot com ordenação externa: memória limitada a `run_size` ocorrências
+
+    As ocorrências entram em um buffer; cheio, ele é agregado, ordenado e
+    gravado em um trecho temporário. write() faz o merge dos trechos em
+    streaming (heapq.merge), soma as repetições e grava as entradas de cada
+    posição juntas, já na ordem de hash que a busca binária do Polyglot exige.
+    """
+
+    def __init__(self, run_size=RUN_SIZE, directory=None):
+        self.run_size = run_size
+        self.tempdir = tempfile.TemporaryDirectory(prefix='opening_book_', dir=directory)
+        self.keys = np.empty(run_size, dtype=np.uint64)
+        self.moves = np.empty(run_size, dtype=np.uint16)
+        self.scores = np.empty(run_size, dtype=np.uint32)
+        self.size = 0
+        self.runs = []
+        self.occurrences = 0
+
+    def add(self, key, move, score):
+        self.keys[self.size] = key
+        self.moves[self.size] = move
+        self.scores[self.size] = score
+        self.size += 1
+        self.occurrences += 1
+        if self.size == self.run_size:
+            self._flush()
+
+    def add_games(self, games, player_name, plies=BOOK_PLIES, player_only=True):
+        for key, move, score in iter_book_moves(games, player_name, plies, player_only):
+            self.add(key, move, score)
+        return self
+
+    def _flush(self):
+        if not self.size:
+            return
+        path = os.path.join(self.tempdir.name, f"run{len(self.runs)}.bin")
+        records = np.empty(self.size, dtype=RUN_DTYPE)
+        records['key'] = self.keys[:self.size]
+        records['move'] = self.moves[:self.size]
+        records['games'] = 1
+        records['score'] = self.scores[:self.size]
+        aggregate(records).tofile(path)
+        self.runs.append(path)
+        self.size = 0
+
+    def _iter_run(self, path):
+        run = np.memmap(path, dtype=RUN_DTYPE, mode='r') if os.path.getsize(path) else ()
+        for start in range(0, len(run), MERGE_BLOCK):
+            yield from run[start:start + MERGE_BLOCK].tolist()
+
+    def iter_merged(self):
+        """(hash, lance, partidas, pontos) de cada par distinto, em ordem de hash e lance"""
+        self._flush()
+        current = None
+        for key, move, games, score in heapq.merge(*(self._iter_run(path) for path in self.runs)):
+            if current is not None and current[0] == key and current[1] == move:
+                current[2] += games
+                current[3] += score
+                continue
+            if current is not None:
+                yield tuple(current)
+            current = [key, move, games, score]
+        if current is not None:
+            yield tuple(current)
+
+    def write(self, path, min_games=1):
+        """
+        Grava o livro .bin; pesos de cada posição reescalados para caber em 16 bits
+
+        Lances que só perderam (peso 0) ficam de fora, como no "make book" do Polyglot.
+
+        Returns:
+            tuple: (entradas gravadas, posições distintas)
+        """
+        entries = positions = 0
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            group = []
+            for item in self.iter_merged():
+                if group and group[0][0] != item[0]:
+                    written = self._write_position(f, group, min_games)
+                    entries += written
+                    positions += written > 0
+                    group = []
+                group.append(item)
+            if group:
+                written = self._write_position(f, group, min_games)
+                entries += written
+                positions += written > 0
+        os.replace(temporary, path)
+        return entries, positions
+
+    def _write_position(self, f, group, min_games):
+        moves = [(score, move, key) for key, move, games, score in group if games >= min_games and score > 0]
+        if not moves:
+            return 0
+        top = max(score for score, _, _ in moves)
+        scale = MAX_WEIGHT / top if top > MAX_WEIGHT else 1
+        # Mais pesado primeiro, como nos livros gerados pelo próprio Polyglot
+        for score, move, key in sorted(moves, reverse=True):
+            f.write(chess.polyglot.ENTRY_STRUCT.pack(key, move, max(1, int(score * scale)), 0))
+        return len(moves)
+
+    def close(self):
+        self.tempdir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_book(games, player_name, path, plies=BOOK_PLIES, player_only=True, min_games=1, run_size=RUN_SIZE):
+    """
+    Compila as partidas do jogador em um livro Polyglot
+
+    Args:
+        games: partidas (lista ou iterador, ex.: PGNAnalyzer.iter_games())
+        path (str): arquivo .bin de saída
+        plies (int): profundidade do livro em meios-lances
+        player_only (bool): só os lances do jogador (senão, os dos dois lados)
+        min_games (int): partidas mínimas para um lance entrar
+
+    Returns:
+        tuple: (entradas gravadas, posições distintas, ocorrências lidas)
+    """
+    with BookBuilder(run_size) as builder:
+        builder.add_games(games, player_name, plies, player_only)
+        entries, positions = builder.write(path, min_games)
+        return entries, positions, builder.occurrences
+
+
+USAGE = """Uso: python opening_book.py <arquivo.pgn> <nome_do_jogador> <livro.bin> [opções]
+  --plies N          profundidade em meios-lances (padrão 30)
+  --min-games N      partidas mínimas para um lance entrar (padrão 1)
+  --both-sides       inclui os lances dos adversários
+  --run-size N       ocorrências em memória antes de gravar um trecho ordenado (padrão 1000000)"""
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--plies': BOOK_PLIES, '--min-games': 1, '--run-size': RUN_SIZE}
+    both_sides = '--both-sides' in args
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = int(args[i + 1])
+            i += 2
+        elif args[i] == '--both-sides':
+            i += 1
+        elif args[i].startswith('-'):
+            print(USAGE)
+            sys.exit(0 if args[i] in ('--help', '-h') else 1)
+        else:
+            positional.append(args[i])
+            i += 1
+    if len(positional) < 3:
+        print(USAGE)
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name, book_path = positional[:3]
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name, parse=False)
+            entries, positions, occurrences = build_book(
+                analyzer.iter_games(), player_name, book_path, options['--plies'], not both_sides,
+                options['--min-games'], options['--run-size'])
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+    print(f"📖 Livro salvo em {book_path}: {entries} lances em {positions} posições "
+          f"({occurrences} lances lidos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import sys
+
+import chess.pgn
+
+from pgn_scan import HEADERS_ONLY_RE, decode_chunk, iter_merged_chunks
+
+# 2: os blocos de cabeçalhos do PGN convertido do Chess.com formam uma entrada só
+INDEX_VERSION = 2
+INDEX_SUFFIX = '.idx'
+# Cabeçalhos guardados no índice para consultas sem abrir as partidas
+INDEX_HEADERS = ['White', 'Black', 'Result', 'Date', 'WhiteElo', 'BlackElo', 'ECO', 'TimeControl']
+# Bytes do início do arquivo usados para detectar se o PGN foi reescrito
+FINGERPRINT_SIZE = 4096
+
+HEADER_BYTES_RE = re.compile(rb'^\[(\w+) "(.*)"\]\s*$', re.MULTILINE)
+
+
+def header_summary(chunk):
+    """
+    Extrai os cabeçalhos indexados de uma partida sem passar pelo parser do python-chess
+
+    Com dois blocos de cabeçalhos, os do segundo prevalecem, como no parser.
+    """
+    headers = {}
+    for name, value in HEADER_BYTES_RE.findall(HEADERS_ONLY_RE.match(chunk).group()):
+        name = name.decode('ascii', errors='replace')
+        if name in INDEX_HEADERS:
+            headers[name] = value.decode('utf-8', errors='replace')
+    return headers
+
+
+class PGNIndex:
+    """
+    Índice de offsets das partidas de um PGN, salvo ao lado do arquivo (<arquivo>.idx).
+
+    A primeira varredura grava offset, tamanho e cabeçalhos de cada partida;
+    depois qualquer partida é lida direto do mmap, sem percorrer as anteriores.
+    Se o PGN só cresceu, update() indexa apenas as partidas acrescentadas.
+    """
+
+    def __init__(self, pgn_path, index_path=None):
+        self.pgn_path = pgn_path
+        self.index_path = index_path or pgn_path + INDEX_SUFFIX
+        self.offsets = []
+        self.lengths = []
+        self.headers = []
+        self.fingerprint = None
+        self.fingerprint_size = 0
+        self._file = None
+        self._map = None
+        self.update()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def indexed_end(self):
+        """Offset logo após a última partida indexada"""
+        return self.offsets[-1] + self.lengths[-1] if self.offsets else 0
+
+    def _fingerprint(self, handle, size):
+        handle.seek(0)
+        return hashlib.sha1(handle.read(min(size, FINGERPRINT_SIZE))).hexdigest()
+
+    def _load(self):
+        """Carrega o índice salvo; retorna False se não existir ou estiver corrompido"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                meta = json.loads(f.readline())
+                if meta.get('version') != INDEX_VERSION:
+                    return False
+                entries = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return False
+
+        self.fingerprint = meta.get('fingerprint')
+        self.fingerprint_size = meta.get('fingerprint_size', 0)
+        self.offsets = [entry[0] for entry in entries]
+        self.lengths = [entry[1] for entry in entries]
+        self.headers = [entry[2] for entry in entries]
+        return True
+
+    def _reset(self):
+        self.offsets, self.lengths, self.headers = [], [], []
+        self.fingerprint = None
+        self.fingerprint_size = 0
+
+    def update(self):
+        """Atualiza o índice com as partidas novas do PGN; retorna quantas foram indexadas"""
+        self.close()
+        if not self.offsets and not self._load():
+            self._reset()
+
+        size = os.path.getsize(self.pgn_path)
+        with open(self.pgn_path, 'rb') as handle:
+            # O prefixo muda quando o arquivo é reescrito em vez de acrescentado
+            if self.offsets:
+                valid = (size >= self.indexed_end and
+                         self.fingerprint == self._fingerprint(handle, self.fingerprint_size))
+                if not valid:
+                    print("⚠️ PGN foi modificado - reconstruindo o índice")
+                    self._reset()
+
+            start = len(self.offsets)
+            # Mesma divisão em partidas de iter_parsed_games: os números batem com os do relatório
+            for offset, chunk in iter_merged_chunks(handle, self.indexed_end, final=False):
+                self.offsets.append(offset)
+                self.lengths.append(len(chunk))
+                self.headers.append(header_summary(chunk))
+
+            if start == 0:
+                self.fingerprint_size = min(self.indexed_end, FINGERPRINT_SIZE)
+                self.fingerprint = self._fingerprint(handle, self.fingerprint_size)
+
+        self._save(start)
+        return len(self.offsets) - start
+
+    def _save(self, start):
+        """Grava o índice; entradas novas são acrescentadas ao arquivo existente"""
+        if start and start == len(self.offsets):
+            return
+        try:
+            mode = 'a' if start else 'w'
+            with open(self.index_path, mode, encoding='utf-8') as f:
+                if not start:
+                    meta = {'version': INDEX_VERSION, 'fingerprint': self.fingerprint,
+                            'fingerprint_size': self.fingerprint_size}
+                    f.write(json.dumps(meta) + '\n')
+                for i in range(start, len(self.offsets)):
+                    f.write(json.dumps([self.offsets[i], self.lengths[i], self.headers[i]],
+                                       ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o índice {self.index_path}: {e}")
+
+    def _mapped(self):
+        if self._map is None:
+            self._file = open(self.pgn_path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+    def game_bytes(self, number):
+        """Bytes crus da partida de número `number` (base 0)"""
+        offset = self.offsets[number]
+        return self._mapped()[offset:offset + self.lengths[number]]
+
+    def game_text(self, number):
+        return decode_chunk(self.game_bytes(number))
+
+    def read_game(self, number):
+        """Partida de número `number` como chess.pgn.Game"""
+        return chess.pgn.read_game(io.StringIO(self.game_text(number)))
+
+    def range_text(self, start, stop):
+        """Texto de um intervalo contíguo de partidas em uma única leitura"""
+        stop = min(stop, len(self))
+        if start >= stop:
+            return ''
+        begin = self.offsets[start]
+        end = self.offsets[stop - 1] + self.lengths[stop - 1]
+        return decode_chunk(self._mapped()[begin:end])
+
+    def iter_games(self, numbers):
+        """Gera chess.pgn.Game para cada número de partida informado"""
+        for number in numbers:
+            game = self.read_game(number)
+            if game is not None:
+                yield game
+
+    def select(self, month=None, player=None, since=None, until=None):
+        """Números das partidas filtradas só pelos cabeçalhos indexados (datas AAAA.MM.DD)"""
+        player = player.lower() if player else None
+        selected = []
+        for number, headers in enumerate(self.headers):
+            date = headers.get('Date', '')
+            if month and not date.startswith(month):
+                continue
+            if since and date < since:
+                continue
+            if until and date > until:
+                continue
+            if player and player not in (headers.get('White', '').lower(), headers.get('Black', '').lower()):
+                continue
+            selected.append(number)
+        return selected
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python pgn_index.py <arquivo.pgn> [número da partida | AAAA.MM]")
+        sys.exit(1)
+
+    try:
+        with PGNIndex(sys.argv[1]) as index:
+            print(f"📇 {len(index)} partidas indexadas em {index.index_path}")
+            if len(sys.argv) < 3:
+                return
+            query = sys.argv[2]
+            if query.isdigit():
+                print(index.game_text(int(query)))
+            else:
+                for number in index.select(month=query):
+                    headers = index.headers[number]
+                    print(f"#{number:<6} {headers.get('Date', '?')}  {headers.get('White', '?')} vs "
+                          f"{headers.get('Black', '?')}  {headers.get('Result', '*')}")
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {sys.argv[1]}")
+    except IndexError:
+        print(f"❌ Partida inexistente: {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Buffer grande: menos chamadas ao descompressor e ao parser por partida
+READ_BUFFER_SIZE = 1 << 20
+# Blocos descomprimidos que a thread pode adiantar antes de esperar o parser
+QUEUE_BLOCKS = 8
+
+# Assinaturas no início do arquivo; a extensão nem sempre é confiável
+MAGIC_NUMBERS = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+]
+EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.lzma': 'xz', '.zst': 'zstd'}
+
+
+def detect_compression(path):
+    """Retorna 'gzip', 'bz2', 'xz', 'zstd' ou None, pela assinatura do arquivo ou pela extensão"""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    for magic, kind in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return kind
+    for extension, kind in EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return kind
+    return None
+
+
+def _open_zstd(path):
+    if zstandard is None:
+        raise ImportError("Para ler arquivos .zst instale zstandard: pip install zstandard")
+    handle = open(path, 'rb')
+    return zstandard.ZstdDecompressor().stream_reader(handle, read_size=READ_BUFFER_SIZE, closefd=True)
+
+
+OPENERS = {
+    'gzip': lambda path: gzip.open(path, 'rb'),
+    'bz2': lambda path: bz2.open(path, 'rb'),
+    'xz': lambda path: lzma.open(path, 'rb'),
+    'zstd': _open_zstd,
+}
+
+
+class ThreadedReader(io.RawIOBase):
+    """Descomprime em uma thread separada e entrega os blocos ao parser por uma fila limitada"""
+
+    def __init__(self, raw, block_size=READ_BUFFER_SIZE, max_blocks=QUEUE_BLOCKS):
+        self.raw = raw
+        self.block_size = block_size
+        self.blocks = queue.Queue(maxsize=max_blocks)
+        self.pending = memoryview(b'')
+        self.error = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _produce(self):
+        try:
+            while not self.stopped.is_set():
+                block = self.raw.read(self.block_size)
+                if not block:
+                    break
+                self.blocks.put(block)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.blocks.put(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            if self.thread is None:
+                return 0
+            block = self.blocks.get()
+            if not block:
+                self.thread = None
+                if self.error is not None:
+                    raise self.error
+                return 0
+            self.pending = memoryview(block)
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            # Libera a thread caso ela esteja bloqueada com a fila cheia
+            while self.thread is not None and self.thread.is_alive():
+                try:
+                    self.blocks.get_nowait()
+                except queue.Empty:
+                    self.thread.join(0.05)
+            self.raw.close()
+        super().close()
+
+
+def open_pgn(path, threaded=False, buffer_size=READ_BUFFER_SIZE):
+    """
+    Abre um PGN para leitura em texto, descomprimindo .gz/.bz2/.xz/.zst em streaming
+
+    Args:
+        path (str): caminho do arquivo, comprimido ou não
+        threaded (bool): descomprime em uma thread paralela ao parser
+        buffer_size (int): tamanho dos buffers de leitura
+
+    Returns:
+        io.TextIOWrapper: stream de texto UTF-8 (nada é descomprimido para disco)
+    """
+    kind = detect_compression(path)
+    if kind is None:
+        return open(path, 'r', encoding='utf-8', errors='replace', buffering=buffer_size)
+
+    raw = OPENERS[kind](path)
+    if threaded:
+        raw = ThreadedReader(raw, buffer_size)
+    return io.TextIOWrapper(io.BufferedReader(raw, buffer_size), encoding='utf-8', errors='replace')
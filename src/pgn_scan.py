@@ -0,0 +1,202 @@
+import io
+import json
+import re
+
+# Cada partida de um PGN começa com a tag Event no início de uma linha
+GAME_START = b'\n[Event '
+# Uma partida só está completa quando o movetext termina com o resultado
+RESULT_END_RE = re.compile(rb'(?:1-0|0-1|1/2-1/2|\*)\s*$')
+
+# Trecho só com cabeçalhos: o cabeçalho interno do Chess.com sobrescreve o externo
+HEADERS_ONLY_RE = re.compile(rb'\s*(?:\[[^\n]*\]\s*)*')
+
+BLOCK_SIZE = 1 << 20
+# Erros mostrados no resumo impresso ao final do parse
+ERROR_PREVIEW = 5
+
+
+def iter_game_chunks(handle, start=0, final=True, block_size=BLOCK_SIZE):
+    """
+    Divide um PGN (arquivo aberto em modo binário) em partidas por varredura de bytes
+
+    Args:
+        handle: arquivo binário com seek/read
+        start (int): offset de onde começar (início de uma partida)
+        final (bool): se False, a última partida só é gerada se já terminar com
+            o resultado — útil para arquivos que ainda estão sendo escritos
+        block_size (int): bytes lidos por vez
+
+    Yields:
+        tuple: (offset da partida, bytes da partida)
+    """
+    if start:
+        handle.seek(start)
+    buffer = b''
+    buffer_offset = start
+
+    while True:
+        block = handle.read(block_size)
+        if not block:
+            break
+        buffer += block
+
+        pos = 0
+        while True:
+            boundary = buffer.find(GAME_START, pos + 1)
+            if boundary == -1:
+                break
+            if buffer[pos:boundary].strip():
+                yield buffer_offset + pos, buffer[pos:boundary + 1]
+            pos = boundary + 1
+
+        buffer = buffer[pos:]
+        buffer_offset += pos
+
+    if buffer.strip() and (final or RESULT_END_RE.search(buffer)):
+        yield buffer_offset, buffer
+
+
+def iter_merged_chunks(handle, start=0, final=True, block_size=BLOCK_SIZE):
+    """
+    iter_game_chunks com os blocos só de cabeçalhos juntados ao bloco seguinte
+
+    O PGN convertido do Chess.com tem dois blocos de cabeçalhos por partida,
+    e cada um começa com [Event: sem a junção, o primeiro viraria uma partida
+    fantasma sem lances. O offset gerado é o do primeiro bloco juntado.
+    Cabeçalhos sem lances no fim do arquivo só saem com final=True (e aí
+    sozinhos, para quem chama registrar o erro).
+    """
+    pending = b''
+    pending_offset = start
+    for offset, chunk in iter_game_chunks(handle, start, final, block_size):
+        if HEADERS_ONLY_RE.fullmatch(chunk):
+            if not pending:
+                pending_offset = offset
+            pending += chunk
+            continue
+        if pending:
+            chunk, offset, pending = pending + chunk, pending_offset, b''
+        yield offset, chunk
+    if pending and final:
+        yield pending_offset, pending
+
+
+def decode_chunk(chunk):
+    """Decodifica os bytes de uma partida para o parser de texto do python-chess"""
+    return chunk.decode('utf-8', errors='replace')
+
+
+class _EncodedTextReader:
+    """Expõe um stream de texto como bytes UTF-8, para varrer offsets também em strings e streams"""
+
+    def __init__(self, text_stream):
+        self.text_stream = text_stream
+
+    def read(self, size=-1):
+        return self.text_stream.read(size).encode('utf-8')
+
+
+def binary_source(source):
+    """Converte string, arquivo de texto ou arquivo binário em algo com read() de bytes"""
+    if isinstance(source, str):
+        return io.BytesIO(source.encode('utf-8'))
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if isinstance(source, io.TextIOWrapper):
+        return source.buffer
+    if isinstance(source, io.TextIOBase):
+        return _EncodedTextReader(source)
+    return source
+
+
+class ParseErrorLog:
+    """Erros de parse com posição no arquivo, para inspecionar depois da análise"""
+
+    def __init__(self):
+        self.errors = []
+        self.game_number = 0
+        self.offset = 0
+
+    def __len__(self):
+        return len(self.errors)
+
+    def at(self, game_number, offset):
+        """Marca a partida sendo processada; erros registrados depois usam esta posição"""
+        self.game_number = game_number
+        self.offset = offset
+
+    def record(self, headers, error):
+        self.errors.append({
+            'game_number': self.game_number,
+            'offset': self.offset,
+            'headers': dict(headers) if headers else {},
+            'error': f"{type(error).__name__}: {error}" if isinstance(error, Exception) else str(error),
+        })
+
+    def format_lines(self, limit=ERROR_PREVIEW):
+        lines = [f"⚠️ {len(self.errors)} partidas com erro de parse:"]
+        for entry in self.errors[:limit]:
+            headers = entry['headers']
+            lines.append(f"   #{entry['game_number']} (byte {entry['offset']}) "
+                         f"{headers.get('White', '?')} vs {headers.get('Black', '?')}: {entry['error']}")
+        if len(self.errors) > limit:
+            lines.append(f"   ... e mais {len(self.errors) - limit}")
+        return lines
+
+    def print_summary(self, file=None):
+        if self.errors:
+            print("\n".join(self.format_lines()), file=file)
+
+    def save(self, path):
+        """Grava os erros em NDJSON (um objeto por linha)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for entry in self.errors:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def iter_parsed_games(source, error_log=None, start=0, game_number=0, visitor=None):
+    """
+    Parseia um PGN partida a partida, sem deixar uma partida ruim afetar as seguintes
+
+    Cada partida é recortada por varredura de bytes até o próximo [Event e
+    parseada isoladamente: depois de um erro o parser já recomeça na próxima
+    partida. Erros (exceções e lances ilegais apontados pelo python-chess)
+    vão para o error_log com offset, número e cabeçalhos da partida.
+
+    Args:
+        source: string, arquivo de texto ou arquivo binário com o PGN
+        error_log (ParseErrorLog): destino dos erros (opcional)
+        start (int): offset de onde continuar (início de uma partida; exige seek)
+        game_number (int): número da partida em `start`, para o log de erros
+        visitor: classe de GameBuilder do python-chess (ex.: PlyFeatureBuilder); padrão GameBuilder
+
+    Yields:
+        chess.pgn.Game: partidas parseadas, na ordem do arquivo
+    """
+    # Import tardio: quem só varre trechos e offsets (índice, cache) não carrega o python-chess
+    import chess.pgn
+
+    visitor = visitor or chess.pgn.GameBuilder
+    error_log = error_log if error_log is not None else ParseErrorLog()
+
+    for offset, chunk in iter_merged_chunks(binary_source(source), start):
+        if HEADERS_ONLY_RE.fullmatch(chunk):
+            error_log.at(game_number, offset)
+            error_log.record(None, "cabeçalhos sem lances no fim do arquivo")
+            continue
+
+        pgn_io = io.StringIO(decode_chunk(chunk))
+        while True:
+            error_log.at(game_number, offset)
+            try:
+                game = chess.pgn.read_game(pgn_io, Visitor=visitor)
+            except Exception as e:
+                error_log.record(None, e)
+                game_number += 1
+                break
+            if game is None:
+                break
+            game_number += 1
+            for error in game.errors:
+                error_log.record(game.headers, error)
+            yield game
@@ -0,0 +1,349 @@
+import sys
+
+import chess
+import chess.pgn
+import numpy as np
+
+from termination import final_state
+
+# Uma linha por meio-lance; 'captured' e 'promotion' são 0 quando não houve captura/promoção
+PLY_DTYPE = np.dtype([
+    ('piece', 'i1'),
+    ('captured', 'i1'),
+    ('promotion', 'i1'),
+    ('castling', 'i1'),
+    ('en_passant', '?'),
+    ('check', '?'),
+    ('from_square', 'u1'),
+    ('to_square', 'u1'),
+    ('material', 'i2'),
+    ('phase', 'i1'),
+])
+
+CASTLE_KINGSIDE = 1
+CASTLE_QUEENSIDE = 2
+
+# Valores por chess.PAWN..chess.KING (índice 0 = nenhuma peça)
+PIECE_VALUES = [0, 1, 3, 3, 5, 9, 0]
+PIECE_NAMES = ['', 'Peão', 'Cavalo', 'Bispo', 'Torre', 'Dama', 'Rei']
+
+# Vantagem material (pontos) a partir da qual uma derrota conta como "desperdiçada"
+WINNING_ADVANTAGE = 3
+
+OPENING, MIDDLEGAME, ENDGAME = 0, 1, 2
+PHASE_NAMES = ['Abertura', 'Meio-jogo', 'Final']
+# Critérios do Divider do Lichess (sem o "mixedness"): peças (sem reis e peões) restantes
+# e peças de cada lado ainda na própria primeira fileira
+MIDDLEGAME_PIECES = 10
+ENDGAME_PIECES = 6
+BACK_RANK_PIECES = 4
+
+
+def material_balance(board):
+    """Material das brancas menos o das pretas, em pontos (P=1, C=B=3, T=5, D=9)"""
+    return sum(PIECE_VALUES[piece] * (len(board.pieces(piece, chess.WHITE)) - len(board.pieces(piece, chess.BLACK)))
+               for piece in range(chess.PAWN, chess.KING))
+
+
+def position_phase(board, previous=OPENING):
+    """Fase da partida na posição `board`; a fase nunca volta atrás (`previous` é a da posição anterior)"""
+    pieces = chess.popcount(board.occupied & ~board.pawns & ~board.kings)
+    if previous == ENDGAME or pieces <= ENDGAME_PIECES:
+        return ENDGAME
+    if previous == MIDDLEGAME or pieces <= MIDDLEGAME_PIECES:
+        return MIDDLEGAME
+    if (chess.popcount(board.occupied_co[chess.WHITE] & chess.BB_RANK_1) < BACK_RANK_PIECES
+            or chess.popcount(board.occupied_co[chess.BLACK] & chess.BB_RANK_8) < BACK_RANK_PIECES):
+        return MIDDLEGAME
+    return OPENING
+
+
+def move_features(board, move, material):
+    """
+    Features de `move` jogado na posição `board` (antes do lance)
+
+    O xeque e a fase ficam False/0: quem chama preenche depois do push, com
+    board.is_check() (bem mais barato que board.gives_check()) e position_phase().
+
+    Returns:
+        tuple: (linha no formato PLY_DTYPE, balanço material depois do lance)
+    """
+    if not move:
+        return (0, 0, 0, 0, False, False, 0, 0, material, OPENING), material
+
+    piece = board.piece_type_at(move.from_square) or 0
+    castling = 0
+    captured = 0
+    en_passant = False
+    # Roque só pode ser lance de rei e en passant só de peão: evita as consultas nos demais
+    if piece == chess.KING and board.is_castling(move):
+        castling = CASTLE_KINGSIDE if board.is_kingside_castling(move) else CASTLE_QUEENSIDE
+    elif piece == chess.PAWN and board.is_en_passant(move):
+        captured = chess.PAWN
+        en_passant = True
+    else:
+        captured = board.piece_type_at(move.to_square) or 0
+    promotion = move.promotion or 0
+
+    gained = PIECE_VALUES[captured] + (PIECE_VALUES[promotion] - 1 if promotion else 0)
+    material += gained if board.turn == chess.WHITE else -gained
+    return (piece, captured, promotion, castling, en_passant, False, move.from_square, move.to_square,
+            material, OPENING), material
+
+
+def features_from_moves(moves, fen=None):
+    """Replay dos lances UCI de um registro (para partidas que não vieram do parser com PlyFeatureBuilder)"""
+    board = chess.Board(fen) if fen else chess.Board()
+    material = material_balance(board)
+    rows = []
+    checks = []
+    phases = []
+    phase = OPENING
+    for uci in moves:
+        move = chess.Move.from_uci(uci)
+        row, material = move_features(board, move, material)
+        rows.append(row)
+        board.push(move)
+        checks.append(board.is_check())
+        phase = position_phase(board, phase)
+        phases.append(phase)
+    plies = np.array(rows, dtype=PLY_DTYPE)
+    plies['check'] = checks
+    plies['phase'] = phases
+    return plies
+
+
+class PlyFeatureBuilder(chess.pgn.GameBuilder):
+    """
+    GameBuilder que anota as features de cada meio-lance da linha principal em game.plies
+
+    O parser do python-chess já mantém o tabuleiro de cada lance; as features
+    saem desse mesmo replay, sem voltar a percorrer a partida depois. A posição
+    final é avaliada uma vez, no fim do parse, e fica em game.final
+    (ver termination.final_state); None se a partida teve erro de parse.
+    game.white_first diz se as brancas fizeram o primeiro lance.
+    """
+
+    def begin_game(self):
+        super().begin_game()
+        self.rows = []
+        self.checks = []
+        self.phases = []
+        self.material = None
+        self.board = None
+        self.white_first = True
+
+    def visit_move(self, board, move):
+        # Variações ficam de fora: só a linha principal entra na tabela
+        if len(self.variation_stack) == 1:
+            if self.material is None:
+                # Primeiro lance da linha principal: partidas com [FEN] podem começar com as pretas
+                self.material = material_balance(board)
+                self.white_first = board.turn == chess.WHITE
+            row, self.material = move_features(board, move, self.material)
+            self.rows.append(row)
+        super().visit_move(board, move)
+
+    def visit_board(self, board):
+        # Chamado logo depois do push: a posição mostra se o último lance da linha principal deu xeque
+        if len(self.variation_stack) == 1:
+            # O parser usa sempre o mesmo objeto para a linha principal: no fim ele está na posição final
+            self.board = board
+            if len(self.checks) < len(self.rows):
+                self.checks.append(board.is_check())
+                self.phases.append(position_phase(board, self.phases[-1] if self.phases else OPENING))
+
+    def result(self):
+        game = super().result()
+        game.plies = np.array(self.rows, dtype=PLY_DTYPE)
+        game.plies['check'][:len(self.checks)] = self.checks
+        game.plies['phase'][:len(self.phases)] = self.phases
+        game.white_first = self.white_first
+        if game.errors:
+            # Depois de um lance ilegal o parser pula o resto da linha principal: a posição
+            # em self.board não é a final (quem usa cai nos cabeçalhos, como no caminho JSON)
+            game.final = None
+        elif self.board is not None:
+            material = self.material if self.material is not None else material_balance(self.board)
+            game.final = final_state(self.board, material)
+        return game
+
+
+def game_plies(record):
+    """Features de um registro de partida, calculadas (uma única vez) se ainda não existirem"""
+    plies = record.get('plies')
+    if plies is None:
+        plies = features_from_moves(record['moves'], record.get('fen'))
+        record['plies'] = plies
+    return plies
+
+
+def fen_white_first(fen):
+    """True se as brancas jogam na posição `fen` (a posição inicial quando vazio ou inválido)"""
+    if not fen:
+        return True
+    try:
+        return chess.Board(fen).turn == chess.WHITE
+    except ValueError:
+        return True
+
+
+def white_first(record):
+    """True se as brancas fazem o primeiro lance da partida (False a partir de um [FEN] com as pretas a jogar)"""
+    value = record.get('white_first')
+    return fen_white_first(record.get('fen')) if value is None else value
+
+
+class PlyTable:
+    """
+    Meio-lances de várias partidas em um único array estruturado contíguo.
+
+    `offsets[i]:offsets[i + 1]` são as linhas da partida i; `game` e `ply`
+    dão, para cada linha, a partida e o número do meio-lance; `white_first`
+    diz, por partida, se o meio-lance 0 é das brancas. Estatísticas novas
+    são consultas vetorizadas sobre as colunas.
+    """
+
+    def __init__(self, plies, lengths, white_first=None):
+        self.plies = plies
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.white_first = (np.ones(len(self.lengths), dtype=bool) if white_first is None
+                            else np.asarray(white_first, dtype=bool))
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)))
+        self.game = np.repeat(np.arange(len(self.lengths)), self.lengths)
+        self.ply = np.arange(len(plies)) - np.repeat(self.offsets[:-1], self.lengths)
+
+    @classmethod
+    def from_games(cls, games):
+        arrays = [game_plies(game) for game in games]
+        plies = np.concatenate(arrays) if arrays else np.empty(0, dtype=PLY_DTYPE)
+        return cls(plies, [len(array) for array in arrays], [white_first(game) for game in games])
+
+    def __len__(self):
+        return len(self.plies)
+
+    def __getitem__(self, column):
+        return self.plies[column]
+
+    @property
+    def game_count(self):
+        return len(self.lengths)
+
+    def white_moves(self):
+        """Meio-lances das brancas"""
+        return (self.ply % 2 == 0) == self.white_first[self.game]
+
+    def player_moves(self, is_white):
+        """Máscara dos lances do jogador, dado um array booleano 'jogou de brancas' por partida"""
+        return self.white_moves() == np.asarray(is_white, dtype=bool)[self.game]
+
+    def per_game(self, values):
+        """Soma de uma coluna (ou máscara) por partida"""
+        return np.bincount(self.game, weights=values, minlength=self.game_count)
+
+    def first_ply(self, mask):
+        """Primeiro meio-lance de cada partida em que a máscara vale, ou -1"""
+        first = np.full(self.game_count, -1, dtype=np.int64)
+        rows = np.flatnonzero(mask)
+        # As linhas estão em ordem de partida e de lance: a primeira de cada partida é a procurada
+        games, index = np.unique(self.game[rows], return_index=True)
+        first[games] = self.ply[rows[index]]
+        return first
+
+    def max_per_game(self, values, empty=0):
+        """Máximo de uma coluna em cada partida (partidas sem lances recebem `empty`)"""
+        result = np.full(self.game_count, empty, dtype=np.float64)
+        played = self.lengths > 0
+        if played.any():
+            result[played] = np.maximum.reduceat(values, self.offsets[:-1][played])
+        return result
+
+
+def ply_summary(games, player_name, table=None):
+    """
+    Estatísticas do jogador tiradas da tabela de meio-lances
+
+    Returns:
+        dict: roque, xeques, capturas, promoções, uso de cada peça e partidas
+        perdidas depois de ter vantagem material
+    """
+    player_name = player_name.lower()
+    table = table if table is not None else PlyTable.from_games(games)
+    if not games:
+        return {'games': 0}
+
+    is_white = np.array([player_name in g['white'] for g in games], dtype=bool)
+    result = np.array([g['result'] for g in games], dtype=str)
+    lost = np.where(is_white, result == '0-1', result == '1-0')
+
+    own = table.player_moves(is_white)
+    castling = table['castling']
+    castle_ply = table.first_ply(own & (castling > 0))
+    castled = castle_ply >= 0
+    kingside = table.per_game(own & (castling == CASTLE_KINGSIDE)) > 0
+
+    pieces = np.bincount(table['piece'][own], minlength=len(PIECE_VALUES))[1:]
+    # Material do ponto de vista do jogador
+    player_material = np.where(is_white[table.game], table['material'], -table['material'])
+    best_advantage = table.max_per_game(player_material)
+
+    total = len(games)
+    return {
+        'games': total,
+        'castled_pct': castled.mean() * 100,
+        'kingside_pct': kingside.mean() * 100,
+        'queenside_pct': (castled & ~kingside).mean() * 100,
+        'castle_move': float(np.mean(castle_ply[castled] // 2 + 1)) if castled.any() else None,
+        'checks_per_game': table.per_game(own & table['check']).mean(),
+        'captures_per_game': table.per_game(own & (table['captured'] > 0)).mean(),
+        'promotions': int(np.count_nonzero(own & (table['promotion'] > 0))),
+        'piece_share': {PIECE_NAMES[piece]: count / max(1, pieces.sum()) * 100
+                        for piece, count in enumerate(pieces, 1)},
+        'lost_with_advantage': int(np.count_nonzero(lost & (best_advantage >= WINNING_ADVANTAGE))),
+        'losses': int(np.count_nonzero(lost)),
+    }
+
+
+def format_ply_lines(summary):
+    if not summary.get('games'):
+        return ["• Nenhuma partida com lances"]
+    lines = [f"• Roque: {summary['castled_pct']:.1f}% das partidas "
+             f"(pequeno {summary['kingside_pct']:.1f}%, grande {summary['queenside_pct']:.1f}%)"]
+    if summary['castle_move'] is not None:
+        lines.append(f"• Roque em média no lance {summary['castle_move']:.1f}")
+    lines.append(f"• Por partida: {summary['checks_per_game']:.1f} xeques, "
+                 f"{summary['captures_per_game']:.1f} capturas; {summary['promotions']} promoções no total")
+    lines.append("• Lances por peça: " + ", ".join(f"{name} {share:.0f}%"
+                                                  for name, share in summary['piece_share'].items()))
+    lines.append(f"• Derrotas depois de estar +{WINNING_ADVANTAGE} em material: "
+                 f"{summary['lost_with_advantage']} de {summary['losses']}")
+    return lines
+
+
+def print_ply_report(games, player_name, table=None):
+    print("♟️ LANCES (TABELA DE MEIO-LANCES):")
+    for line in format_ply_lines(ply_summary(games, player_name, table)):
+        print(line)
+    print()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python ply_features.py <arquivo.pgn> <nome_do_jogador>")
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name = sys.argv[1:3]
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+    print_ply_report(analyzer.games, player_name, analyzer.ply_table())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+import concurrent.futures
+import sys
+import time
+
+import chess
+import chess.pgn
+
+from pgn_scan import ERROR_PREVIEW
+from ply_features import PIECE_VALUES, WINNING_ADVANTAGE, game_plies, material_balance
+
+# Mate forçado procurado até este número de lances, só com xeques de quem ataca
+MATE_DEPTH = 3
+# Ganho material mínimo (pontos) para a posição virar puzzle, além do que o adversário acabou de tomar
+MATERIAL_GAIN = WINNING_ADVANTAGE
+# Meios-lances de capturas depois da resposta do defensor
+QUIESCENCE_DEPTH = 6
+MATE_SCORE = 1000
+# Partidas enviadas de uma vez a cada processo do pool
+CHUNK_SIZE = 8
+PUZZLES_SUFFIX = '.puzzles'
+
+
+def capture_gain(board, move):
+    """Pontos ganhos por `move` (captura e/ou promoção) para quem joga"""
+    if board.is_en_passant(move):
+        gained = PIECE_VALUES[chess.PAWN]
+    else:
+        gained = PIECE_VALUES[board.piece_type_at(move.to_square) or 0]
+    if move.promotion:
+        gained += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+    return gained
+
+
+class TacticSearch:
+    """
+    Busca local limitada sobre um chess.Board: mate forçado e ganho de material
+
+    Os resultados ficam memorizados pela posição (chave de transposição do
+    python-chess), então subárvores repetidas entre posições vizinhas da
+    mesma partida não são buscadas de novo. Use uma instância por partida.
+    """
+
+    def __init__(self, mate_depth=MATE_DEPTH, quiescence_depth=QUIESCENCE_DEPTH):
+        self.mate_depth = mate_depth
+        self.quiescence_depth = quiescence_depth
+        self.memo = {}
+
+    def checks(self, board):
+        """Lances que dão xeque, guardados por posição: o aprofundamento iterativo volta às mesmas posições"""
+        key = ('checks', board._transposition_key())
+        if key not in self.memo:
+            self.memo[key] = [move for move in board.legal_moves if board.gives_check(move)]
+        return self.memo[key]
+
+    def mate_move(self, board, depth):
+        """Xeque que força mate em até `depth` lances de quem joga, ou None"""
+        key = ('mate', board._transposition_key(), depth)
+        if key in self.memo:
+            return self.memo[key]
+        found = None
+        for move in self.checks(board):
+            board.push(move)
+            try:
+                mates = board.is_checkmate() or (depth > 1 and self.forced_mate(board, depth - 1))
+            finally:
+                board.pop()
+            if mates:
+                found = move
+                break
+        self.memo[key] = found
+        return found
+
+    def forced_mate(self, board, depth):
+        """Toda resposta de quem joga leva a mate em até `depth` lances do adversário"""
+        replies = list(board.legal_moves)
+        if not replies:
+            return False  # afogamento (o mate já foi testado por quem chama)
+        for reply in replies:
+            board.push(reply)
+            try:
+                mates = self.mate_move(board, depth) is not None
+            finally:
+                board.pop()
+            if not mates:
+                return False
+        return True
+
+    def shortest_mate(self, board):
+        """(lance, n) do mate mais curto em até mate_depth lances, ou (None, 0)"""
+        for depth in range(1, self.mate_depth + 1):
+            move = self.mate_move(board, depth)
+            if move is not None:
+                return move, depth
+        return None, 0
+
+    def mate_line(self, board, depth):
+        """Solução completa do mate: o defensor escolhe sempre a resposta que mais o adia"""
+        board = board.copy(stack=False)
+        line = []
+        while True:
+            move = self.mate_move(board, depth)
+            line.append(move)
+            board.push(move)
+            if board.is_checkmate() or depth == 1:
+                return line
+            depth -= 1
+            reply = max(board.legal_moves, key=lambda r: self._mate_length(board, r, depth))
+            line.append(reply)
+            board.push(reply)
+
+    def _mate_length(self, board, reply, depth):
+        board.push(reply)
+        try:
+            return next(d for d in range(1, depth + 1) if self.mate_move(board, d) is not None)
+        finally:
+            board.pop()
+
+    def ordered(self, board, moves):
+        """(ganho, lance) com capturas primeiro, em ordem MVV-LVA: vítima mais valiosa, atacante mais barato"""
+        return sorted(((capture_gain(board, move), move) for move in moves),
+                      key=lambda item: (item[0], -PIECE_VALUES[board.piece_type_at(item[1].from_square)]),
+                      reverse=True)
+
+    def quiesce(self, board, alpha, beta, depth):
+        """Saldo material de quem joga trocando só capturas (ou fugindo de xeque), com alfa-beta"""
+        if board.is_check():
+            moves = list(board.legal_moves)
+            if not moves:
+                return -MATE_SCORE
+            best = -MATE_SCORE
+        else:
+            # Quem joga pode simplesmente não capturar
+            best = 0
+            if best >= beta:
+                return best
+            moves = board.generate_legal_captures()
+        if depth == 0:
+            return max(best, 0)
+
+        alpha = max(alpha, best)
+        for gain, move in self.ordered(board, moves):
+            board.push(move)
+            score = gain - self.quiesce(board, gain - beta, gain - alpha, depth - 1)
+            board.pop()
+            if score > best:
+                best = score
+                alpha = max(alpha, best)
+                if alpha >= beta:
+                    break
+        return best
+
+    def exceeds(self, board, limit):
+        """
+        Quem joga consegue saldo maior que `limit` com algum lance legal, seguido das capturas?
+
+        Basta uma resposta boa o bastante: a busca para na primeira, e cada
+        resposta é testada com janela nula em vez de ter o valor exato calculado.
+        """
+        key = ('exceeds', board._transposition_key(), limit)
+        if key in self.memo:
+            return self.memo[key]
+        moves = list(board.legal_moves)
+        if not moves:
+            # Levar mate não salva nada; afogamento salva tudo (empate)
+            result = not board.is_check()
+        else:
+            result = False
+            for gain, move in self.ordered(board, moves):
+                board.push(move)
+                opponent = self.quiesce(board, gain - limit - 1, gain - limit, self.quiescence_depth)
+                board.pop()
+                if gain - opponent > limit:
+                    result = True
+                    break
+        self.memo[key] = result
+        return result
+
+    def reply_value(self, board):
+        """Melhor saldo exato de quem joga com qualquer lance legal, seguido das capturas dos dois lados"""
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE_SCORE if board.is_check() else MATE_SCORE
+        best = -MATE_SCORE
+        for gain, move in self.ordered(board, moves):
+            board.push(move)
+            best = max(best, gain - self.quiesce(board, -MATE_SCORE, gain - best, self.quiescence_depth))
+            board.pop()
+        return best
+
+    def wins(self, board, move, needed):
+        """`move` ganha pelo menos `needed` pontos contra qualquer resposta?"""
+        gain = capture_gain(board, move)
+        board.push(move)
+        try:
+            return not self.exceeds(board, gain - needed)
+        finally:
+            board.pop()
+
+    def winning_move(self, board, needed):
+        """
+        Lance forçante (captura, promoção ou xeque) que ganha pelo menos `needed` pontos
+
+        Um quiescence barato, com o defensor só capturando, descarta quase todos
+        os lances; os que passam são confirmados contra todas as respostas.
+
+        Returns:
+            tuple: (lance, saldo contra a melhor resposta) ou (None, 0)
+        """
+        for gain, move in self.ordered(board, board.legal_moves):
+            if not gain and not board.gives_check(move):
+                continue
+            board.push(move)
+            try:
+                # Janela nula: só interessa se o saldo chega a `needed`
+                if gain - self.quiesce(board, gain - needed, gain - needed + 1, self.quiescence_depth) < needed:
+                    continue
+                if not self.exceeds(board, gain - needed):
+                    return move, gain - self.reply_value(board)
+            finally:
+                board.pop()
+        return None, 0
+
+
+def mine_game(task):
+    """
+    Puzzles de uma partida: posições com o jogador a jogar em que havia mate ou ganho decisivo
+
+    `task` é (número da partida, lances UCI, jogou de brancas, material depois
+    de cada meio-lance, FEN inicial ou None). Executado nos processos do pool;
+    um erro na partida não interrompe as outras.
+
+    Returns:
+        tuple: (um dict por puzzle, mensagem de erro ou None)
+    """
+    number, moves, is_white, material, fen, mate_depth, material_gain = task
+    puzzles = []
+    try:
+        search = TacticSearch(mate_depth)
+        sign = 1 if is_white else -1
+        board = chess.Board(fen) if fen else chess.Board()
+        start = material_balance(board)
+        previous = None
+        for ply, uci in enumerate(moves):
+            played = chess.Move.from_uci(uci)
+            if not board.is_legal(played):
+                raise ValueError(f"lance ilegal {uci} em {board.fen()}")
+            if board.turn == (chess.WHITE if is_white else chess.BLACK):
+                puzzle = _position_puzzle(search, board, played, ply, material, start, sign, material_gain)
+                # A mesma tática ignorada lance após lance (peça pendurada por vários lances) vira um só puzzle
+                repeated = (puzzle is not None and previous is not None and previous['ply'] == ply - 2
+                            and previous['solution'][0] == puzzle['solution'][0])
+                if puzzle is not None and not repeated:
+                    puzzle['game'] = number
+                    puzzles.append(puzzle)
+                previous = puzzle
+            board.push(played)
+    except Exception as e:
+        return puzzles, f"{type(e).__name__}: {e}"
+    return puzzles, None
+
+
+def _position_puzzle(search, board, played, ply, material, start, sign, material_gain):
+    move, depth = search.shortest_mate(board)
+    if move is not None:
+        board.push(played)
+        try:
+            found = board.is_checkmate() or (depth > 1 and board.is_check() and search.forced_mate(board, depth - 1))
+        finally:
+            board.pop()
+        return {'ply': ply, 'fen': board.fen(), 'kind': 'mate', 'mate_in': depth, 'gain': None,
+                'solution': [m.uci() for m in search.mate_line(board, depth)],
+                'played': played.uci(), 'missed': not found}
+
+    # Recapturar o que o adversário acabou de tomar não é tática: o ganho conta a partir de antes do lance dele
+    current = sign * (material[ply - 1] if ply >= 1 else start)
+    before = sign * (material[ply - 2] if ply >= 2 else start)
+    needed = material_gain + max(0, before - current)
+    move, value = search.winning_move(board, needed)
+    if move is None:
+        return None
+    found = played == move or search.wins(board, played, needed)
+    return {'ply': ply, 'fen': board.fen(), 'kind': 'material', 'mate_in': None, 'gain': int(value),
+            'solution': [move.uci()], 'played': played.uci(), 'missed': not found}
+
+
+def mine_puzzles(games, player_name, processes=None, losses_only=False, mate_depth=MATE_DEPTH,
+                 material_gain=MATERIAL_GAIN):
+    """
+    Procura puzzles nas partidas do jogador, distribuindo as partidas entre processos
+
+    Um erro em uma partida (ex.: lance ilegal) encerra só a busca nela, com um
+    aviso no fim; os puzzles achados antes dele são mantidos.
+
+    Returns:
+        list: puzzles (dicts com 'game' = posição em games), na ordem das partidas
+    """
+    player_name = player_name.lower()
+    tasks = []
+    errors = []
+    for number, game in enumerate(games):
+        is_white = player_name in game['white'].lower()
+        if not is_white and player_name not in game['black'].lower():
+            continue
+        if losses_only and game['result'] != ('0-1' if is_white else '1-0'):
+            continue
+        try:
+            material = game_plies(game)['material'].tolist()
+        except Exception as e:
+            errors.append((number, f"{type(e).__name__}: {e}"))
+            continue
+        tasks.append((number, game['moves'], is_white, material, game.get('fen'), mate_depth, material_gain))
+
+    if processes == 1:
+        results = [mine_game(task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(mine_game, tasks, chunksize=CHUNK_SIZE))
+    puzzles = []
+    for task, (found, error) in zip(tasks, results):
+        puzzles.extend(found)
+        if error is not None:
+            errors.append((task[0], error))
+    if errors:
+        print(f"⚠️ {len(errors)} partidas com erro na busca de puzzles:")
+        for number, error in errors[:ERROR_PREVIEW]:
+            print(f"   #{number}: {error}")
+        if len(errors) > ERROR_PREVIEW:
+            print(f"   ... e mais {len(errors) - ERROR_PREVIEW}")
+    return puzzles
+
+
+def puzzle_comment(puzzle):
+    if puzzle['kind'] == 'mate':
+        return f"mate em {puzzle['mate_in']}"
+    return f"ganha {puzzle['gain']} pontos de material"
+
+
+def puzzle_epd(puzzle, game):
+    """Linha EPD com o melhor lance (bm), a origem (id) e o tema (c0)"""
+    board = chess.Board(puzzle['fen'])
+    return board.epd(bm=chess.Move.from_uci(puzzle['solution'][0]),
+                     id=f"{game['white']} vs {game['black']} {game.get('date', '?')} #{puzzle['ply'] + 1}",
+                     c0=puzzle_comment(puzzle))
+
+
+def puzzle_pgn(puzzle, game):
+    """Partida PGN que começa na posição do puzzle, com a solução como linha principal"""
+    board = chess.Board(puzzle['fen'])
+    pgn = chess.pgn.Game()
+    pgn.headers['Event'] = f"Puzzle: {puzzle_comment(puzzle)}"
+    pgn.headers['Site'] = f"{game['white']} vs {game['black']}, lance {board.fullmove_number}"
+    pgn.headers['Date'] = game.get('date') or '????.??.??'
+    pgn.headers['White'] = game['white']
+    pgn.headers['Black'] = game['black']
+    pgn.headers['Result'] = '*'
+    pgn.setup(board)
+    node = pgn
+    for uci in puzzle['solution']:
+        node = node.add_variation(chess.Move.from_uci(uci))
+    if puzzle['missed']:
+        played = chess.Move.from_uci(puzzle['played'])
+        pgn.add_variation(played, comment="jogado na partida")
+    return str(pgn)
+
+
+def export_puzzles(puzzles, games, epd_path=None, pgn_path=None):
+    """Grava os puzzles em EPD (uma posição por linha) e/ou PGN (uma partida por puzzle)"""
+    if epd_path:
+        with open(epd_path, 'w', encoding='utf-8') as f:
+            for puzzle in puzzles:
+                f.write(puzzle_epd(puzzle, games[puzzle['game']]) + '\n')
+    if pgn_path:
+        with open(pgn_path, 'w', encoding='utf-8') as f:
+            for puzzle in puzzles:
+                f.write(puzzle_pgn(puzzle, games[puzzle['game']]) + '\n\n')
+
+
+def print_puzzle_report(puzzles, games, examples=5):
+    mates = [p for p in puzzles if p['kind'] == 'mate']
+    missed = [p for p in puzzles if p['missed']]
+    print("🧩 PUZZLES DAS PRÓPRIAS PARTIDAS:")
+    print(f"• {len(puzzles)} posições com tática ({len(mates)} mates, {len(puzzles) - len(mates)} ganhos de material)")
+    print(f"• {len(missed)} não aproveitadas na partida")
+    for puzzle in missed[:examples]:
+        game = games[puzzle['game']]
+        board = chess.Board(puzzle['fen'])
+        solution = board.san(chess.Move.from_uci(puzzle['solution'][0]))
+        played = board.san(chess.Move.from_uci(puzzle['played']))
+        print(f"    {game.get('date', '?')} {game['white']} vs {game['black']} "
+              f"(lance {board.fullmove_number}): {solution} ({puzzle_comment(puzzle)}), jogado {played}")
+    print()
+
+
+USAGE = """Uso: python puzzle_miner.py <arquivo.pgn> <nome_do_jogador> [opções]
+  --losses           só partidas perdidas
+  --found            inclui também as táticas que foram jogadas na partida
+  --mate N           procura mate em até N lances (padrão 3)
+  --gain N           ganho material mínimo em pontos (padrão 3)
+  --processes N      processos de busca (padrão: um por CPU)
+  --epd ARQ / --out-pgn ARQ
+                     destino dos puzzles (padrão <arquivo>.<jogador>.puzzles.epd e .pgn)"""
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--mate': MATE_DEPTH, '--gain': MATERIAL_GAIN, '--processes': None, '--epd': None, '--out-pgn': None}
+    flags = {'--losses': False, '--found': False}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = args[i + 1]
+            i += 2
+        elif args[i] in flags:
+            flags[args[i]] = True
+            i += 1
+        elif args[i].startswith('-'):
+            print(USAGE)
+            sys.exit(0 if args[i] in ('--help', '-h') else 1)
+        else:
+            positional.append(args[i])
+            i += 1
+    if len(positional) < 2:
+        print(USAGE)
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name = positional[:2]
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+
+    start = time.monotonic()
+    puzzles = mine_puzzles(analyzer.games, player_name,
+                           int(options['--processes']) if options['--processes'] else None,
+                           flags['--losses'], int(options['--mate']), int(options['--gain']))
+    print(f"⏱️ Busca concluída em {time.monotonic() - start:.1f}s")
+    print_puzzle_report(puzzles, analyzer.games)
+
+    if not flags['--found']:
+        puzzles = [puzzle for puzzle in puzzles if puzzle['missed']]
+    base = f"{pgn_file_path}.{player_name.lower()}{PUZZLES_SUFFIX}"
+    epd_path = options['--epd'] or base + '.epd'
+    pgn_path = options['--out-pgn'] or base + '.pgn'
+    export_puzzles(puzzles, analyzer.games, epd_path, pgn_path)
+    print(f"💾 {len(puzzles)} puzzles salvos em {epd_path} e {pgn_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import html
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+from clock_stats import (time_trouble_totals, merge_time_trouble_totals, summarize_time_trouble,
+                         format_time_trouble_lines)
+from elo_stats import EloEngine, elo_samples, format_elo_lines
+from temporal_stats import (TemporalCube, duration_samples, summarize_durations, summarize_temporal,
+                            format_duration_lines, format_time_of_day_lines)
+from termination import ENDING_LABELS, ending_label, record_ending
+
+
+@dataclass(frozen=True)
+class ReportModel:
+    """Resultado de uma análise completa, calculado uma vez e consumido pelos renderizadores"""
+    player_name: str
+    total_games: int
+    results: dict
+    performance_vs_rating: tuple
+    elo: dict
+    white_openings: tuple
+    black_openings: tuple
+    white_winning: tuple
+    black_winning: tuple
+    white_losing: tuple
+    black_losing: tuple
+    white_best_rates: tuple
+    black_best_rates: tuple
+    white_worst_rates: tuple
+    black_worst_rates: tuple
+    time_trouble: dict
+    temporal: dict
+    endings: tuple
+    top_defeated: tuple
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _top(counts, n):
+    return tuple(sorted(counts.items(), key=lambda x: x[1], reverse=True)[:n])
+
+
+def _outcome_counts():
+    return {'wins': 0, 'losses': 0, 'draws': 0}
+
+
+class ReportAggregates:
+    """
+    Agregados do relatório que aceitam partidas novas sem revisitar as antigas.
+
+    add_games() só processa o lote recebido e soma o resultado aos contadores
+    existentes; to_model() monta o ReportModel a partir desses contadores.
+    """
+    TOP_DEFEATED = 10
+
+    def __init__(self, analyzer, utc_offset_hours=0):
+        self.analyzer = analyzer
+        self.utc_offset_hours = utc_offset_hours
+        self.total_games = 0
+        self.results = Counter()
+        self.elo_samples = []
+        self.openings = {'white': Counter(), 'black': Counter()}
+        self.winning = {'white': defaultdict(int), 'black': defaultdict(int)}
+        self.losing = {'white': defaultdict(int), 'black': defaultdict(int)}
+        self.opening_results = {
+            'white': defaultdict(_outcome_counts),
+            'black': defaultdict(_outcome_counts),
+        }
+        self.top_defeated = []
+        self.clock_totals = None
+        self.cube = TemporalCube([], analyzer.player_name, utc_offset_hours)
+        self.durations = []
+        self.endings = defaultdict(_outcome_counts)
+
+    def __getstate__(self):
+        """Estado para checkpoint; o analisador é religado por quem carrega"""
+        state = dict(self.__dict__)
+        state['analyzer'] = None
+        return state
+
+    def __setstate__(self, state):
+        # Checkpoints anteriores à classificação dos finais não têm 'endings'
+        state.setdefault('endings', defaultdict(_outcome_counts))
+        self.__dict__.update(state)
+
+    def add_games(self, games):
+        """Incorpora um lote de partidas aos agregados"""
+        analyzer = self.analyzer
+        games = games if isinstance(games, list) else list(games)
+        defeated = []
+
+        for game in games:
+            self.total_games += 1
+            color = 'white' if analyzer.is_player_white(game) else 'black'
+            opening = game['opening']
+            self.openings[color][opening] += 1
+
+            if analyzer.did_player_win(game):
+                outcome = 'wins'
+                self.winning[color][opening] += 1
+            elif analyzer.did_player_lose(game):
+                outcome = 'losses'
+                self.losing[color][opening] += 1
+            elif analyzer.is_draw(game):
+                outcome = 'draws'
+            else:
+                continue
+
+            self.results[outcome] += 1
+            self.opening_results[color][opening][outcome] += 1
+            self.endings[record_ending(game)][outcome] += 1
+
+            entry = analyzer.defeated_opponent_entry(game)
+            if entry:
+                defeated.append(entry)
+
+        if defeated:
+            # sort estável: em caso de empate, as partidas mais antigas continuam na frente
+            self.top_defeated = sorted(self.top_defeated + defeated,
+                                       key=lambda x: x['rating'], reverse=True)[:self.TOP_DEFEATED]
+
+        self.clock_totals = merge_time_trouble_totals(
+            self.clock_totals, time_trouble_totals(games, analyzer.player_name))
+        self.elo_samples.append(elo_samples(games, analyzer.player_name))
+        self.cube.merge(TemporalCube(games, analyzer.player_name, self.utc_offset_hours))
+        self.durations.append(duration_samples(games, analyzer.player_name))
+        return self
+
+    def _win_rates(self, color):
+        rates = {}
+        for opening, stats in self.opening_results[color].items():
+            total = stats['wins'] + stats['losses'] + stats['draws']
+            if total >= 3:  # Só considerar aberturas com pelo menos 3 jogos
+                rates[opening] = {'win_rate': (stats['wins'] / total) * 100, 'total_games': total, **stats}
+        return rates
+
+    def to_model(self):
+        """Monta o ReportModel com o estado atual dos agregados"""
+        elo = EloEngine.from_samples(self.elo_samples)
+        performance = elo.rating_ranges(self.analyzer.RATING_RANGES)
+
+        white_rates, black_rates = self._win_rates('white'), self._win_rates('black')
+
+        def best(rates):
+            return tuple(sorted(rates.items(), key=lambda x: x[1]['win_rate'], reverse=True)[:5])
+
+        def worst(rates):
+            return tuple(sorted(rates.items(), key=lambda x: x[1]['win_rate'])[:5])
+
+        durations = summarize_durations(*(np.concatenate(parts) for parts in zip(*self.durations))) \
+            if self.durations else {}
+
+        wins, losses, draws = self.results['wins'], self.results['losses'], self.results['draws']
+        order = list(ENDING_LABELS)
+        endings = sorted(self.endings.items(),
+                         key=lambda x: (-sum(x[1].values()), order.index(x[0]) if x[0] in order else len(order)))
+        return ReportModel(
+            player_name=self.analyzer.player_name,
+            total_games=self.total_games,
+            results={'wins': wins, 'losses': losses, 'draws': draws, 'total': wins + losses + draws},
+            performance_vs_rating=tuple(performance.items()),
+            elo=elo.summary(),
+            white_openings=tuple(self.openings['white'].most_common(5)),
+            black_openings=tuple(self.openings['black'].most_common(5)),
+            white_winning=_top(self.winning['white'], 3),
+            black_winning=_top(self.winning['black'], 3),
+            white_losing=_top(self.losing['white'], 3),
+            black_losing=_top(self.losing['black'], 3),
+            white_best_rates=best(white_rates),
+            black_best_rates=best(black_rates),
+            white_worst_rates=worst(white_rates),
+            black_worst_rates=worst(black_rates),
+            time_trouble=summarize_time_trouble(self.clock_totals),
+            temporal=summarize_temporal(self.cube, durations),
+            endings=tuple((ending, dict(stats)) for ending, stats in endings),
+            top_defeated=tuple(self.top_defeated),
+        )
+
+
+def build_report(analyzer):
+    """Calcula todas as métricas do relatório de um PGNAnalyzer (stenio.py)"""
+    return ReportAggregates(analyzer).add_games(analyzer.games).to_model()
+
+
+def format_ending_lines(endings):
+    lines = []
+    for ending, stats in endings:
+        parts = [f"{stats[outcome]} {label}" for outcome, label in
+                 (('wins', 'vitórias'), ('losses', 'derrotas'), ('draws', 'empates')) if stats[outcome]]
+        lines.append(f"• {ending_label(ending)}: {sum(stats.values())} jogos ({', '.join(parts)})")
+    return lines
+
+
+def report_sections(model):
+    """Divide o modelo em seções (título, linhas) compartilhadas pelos formatos de texto"""
+    sections = []
+    results = model.results
+    total = results['total']
+    if total > 0:
+        sections.append(("📈 ESTATÍSTICAS GERAIS:", [
+            f"• Vitórias: {results['wins']} ({results['wins'] / total * 100:.1f}%)",
+            f"• Derrotas: {results['losses']} ({results['losses'] / total * 100:.1f}%)",
+            f"• Empates: {results['draws']} ({results['draws'] / total * 100:.1f}%)",
+            f"• Win Rate: {results['wins'] / total * 100:.1f}%",
+        ]))
+
+    sections.append(("🎯 PERFORMANCE VS RATING DOS OPONENTES:", [
+        f"• {rating_range}: {stats['wins']}/{stats['total']} ({stats['win_rate']:.1f}% win rate)"
+        for rating_range, stats in model.performance_vs_rating
+    ]))
+    sections.append(("📐 ELO: ESPERADO VS REAL:", format_elo_lines(model.elo)))
+
+    sections.append(("🔸 TOP 5 ABERTURAS MAIS JOGADAS DE BRANCAS:", [
+        f"{i}. {opening}: {count} partidas" for i, (opening, count) in enumerate(model.white_openings, 1)
+    ]))
+    sections.append(("🔹 TOP 5 ABERTURAS MAIS JOGADAS DE PRETAS:", [
+        f"{i}. {opening}: {count} partidas" for i, (opening, count) in enumerate(model.black_openings, 1)
+    ]))
+
+    sections.append(("🏆 TOP 3 ABERTURAS QUE MAIS GANHARAM DE BRANCAS:", [
+        f"• {opening}: {count} vitórias" for opening, count in model.white_winning
+    ]))
+    sections.append(("🏆 TOP 3 ABERTURAS QUE MAIS GANHARAM DE PRETAS:", [
+        f"• {opening}: {count} vitórias" for opening, count in model.black_winning
+    ]))
+
+    for title, losses in (("💔 TOP 3 ABERTURAS QUE MAIS PERDEU DE BRANCAS:", model.white_losing),
+                          ("💔 TOP 3 ABERTURAS QUE MAIS PERDEU DE PRETAS:", model.black_losing)):
+        sections.append((title, [f"• {opening}: {count} derrotas" for opening, count in losses]
+                         or ["• Nenhuma derrota significativa encontrada"]))
+
+    for title, rates in (("📊 MELHORES WIN RATES DE BRANCAS (min 3 jogos):", model.white_best_rates),
+                         ("📊 MELHORES WIN RATES DE PRETAS (min 3 jogos):", model.black_best_rates),
+                         ("📉 PIORES WIN RATES DE BRANCAS (min 3 jogos):", model.white_worst_rates),
+                         ("📉 PIORES WIN RATES DE PRETAS (min 3 jogos):", model.black_worst_rates)):
+        sections.append((title, [
+            f"• {opening}: {stats['win_rate']:.1f}% ({stats['wins']}/{stats['total_games']})"
+            for opening, stats in rates
+        ]))
+
+    sections.append(("⏱️ GESTÃO DO TEMPO (%clk):", format_time_trouble_lines(model.time_trouble)))
+    sections.append(("🕒 DURAÇÃO REAL DAS PARTIDAS (StartTime/EndTime):", format_duration_lines(model.temporal)))
+    if 'by_hour' in model.temporal:
+        sections.append(("📅 DESEMPENHO POR HORÁRIO:", format_time_of_day_lines(model.temporal)))
+
+    if model.endings:
+        sections.append(("🏁 COMO AS PARTIDAS TERMINARAM:", format_ending_lines(model.endings)))
+
+    defeated_lines = []
+    for i, opponent in enumerate(model.top_defeated, 1):
+        year_info = f"({opponent['year']}) - " if opponent['year'] != 'N/A' else ""
+        defeated_lines.append(f"{i:2d}. {opponent['opponent']} - {opponent['rating']} {year_info}{opponent['opening']}")
+    sections.append(("👑 TOP 10 MAIORES RATINGS DERROTADOS:", defeated_lines))
+    return sections
+
+
+class TextRenderer:
+    """Relatório de terminal, o mesmo formato impresso historicamente por generate_report"""
+    extension = '.txt'
+
+    def render(self, model):
+        lines = [
+            "=" * 80,
+            f"📊 RELATÓRIO COMPLETO DE ANÁLISE - {model.player_name.upper()}",
+            "=" * 80,
+            f"Total de partidas analisadas: {model.total_games}",
+            "",
+        ]
+        for title, section_lines in report_sections(model):
+            lines.append(title)
+            lines.extend(section_lines)
+            lines.append("")
+        lines += ["=" * 80, "📝 RELATÓRIO COMPLETO FINALIZADO!", "=" * 80]
+        return "\n".join(lines) + "\n"
+
+
+class MarkdownRenderer:
+    """Relatório em Markdown, no estilo da cópia publicada no README.md"""
+    extension = '.md'
+
+    def render(self, model):
+        lines = [
+            f"## 📊 RELATÓRIO COMPLETO DE ANÁLISE - {model.player_name.upper()}",
+            "",
+            f"Total de partidas analisadas: {model.total_games}",
+            "",
+        ]
+        for title, section_lines in report_sections(model):
+            lines.append(f"### {title}")
+            lines.append("")
+            lines.extend(f"{line.rstrip()}  " for line in section_lines)
+            lines.append("")
+        return "\n".join(lines)
+
+
+class HTMLRenderer:
+    """Relatório em uma página HTML autocontida"""
+    extension = '.html'
+
+    def render(self, model):
+        title = html.escape(f"Relatório de análise - {model.player_name}")
+        parts = [
+            "<!DOCTYPE html>",
+            '<html lang="pt-BR">',
+            f'<head><meta charset="utf-8"><title>{title}</title></head>',
+            "<body>",
+            f"<h1>📊 {title}</h1>",
+            f"<p>Total de partidas analisadas: {model.total_games}</p>",
+        ]
+        for section_title, section_lines in report_sections(model):
+            parts.append(f"<h2>{html.escape(section_title)}</h2>")
+            parts.append("<ul>")
+            parts.extend(f"<li>{html.escape(line.strip().lstrip('•').strip())}</li>" for line in section_lines)
+            parts.append("</ul>")
+        parts += ["</body>", "</html>"]
+        return "\n".join(parts) + "\n"
+
+
+class JSONRenderer:
+    """Modelo completo em JSON, para consumo por outras ferramentas"""
+    extension = '.json'
+
+    def render(self, model):
+        return json.dumps(model.to_dict(), ensure_ascii=False, indent=2)
+
+
+RENDERERS = {
+    'text': TextRenderer(),
+    'markdown': MarkdownRenderer(),
+    'html': HTMLRenderer(),
+    'json': JSONRenderer(),
+}
+
+
+def render_report(model, fmt='text'):
+    """Renderiza um modelo já calculado no formato pedido"""
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"Formato de relatório desconhecido: {fmt} (use {', '.join(RENDERERS)})")
+    return renderer.render(model)
+
+
+def write_reports(model, output_prefix, formats=('text', 'markdown', 'html', 'json')):
+    """Grava o mesmo modelo em vários formatos (uma análise, vários arquivos)"""
+    paths = []
+    for fmt in formats:
+        path = output_prefix + RENDERERS[fmt].extension
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(render_report(model, fmt))
+        paths.append(path)
+    return paths
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import sys
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from game_store import GameStore
+from report import render_report, RENDERERS
+
+CONTENT_TYPES = {
+    'text': 'text/plain; charset=utf-8',
+    'markdown': 'text/markdown; charset=utf-8',
+    'html': 'text/html; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ReportServer:
+    """
+    Servidor HTTP local (asyncio) que responde relatórios e filtros em JSON.
+
+    As partidas ficam em um GameStore carregado uma única vez; uma tarefa em
+    segundo plano verifica o arquivo PGN e lê só as partidas acrescentadas.
+    """
+
+    def __init__(self, store, host='127.0.0.1', port=8765, refresh_interval=2.0):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.refresh_interval = refresh_interval
+        self.routes = {
+            '/health': self.handle_health,
+            '/report': self.handle_report,
+            '/games': self.handle_games,
+            '/refresh': self.handle_refresh,
+        }
+
+    async def refresh(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.store.refresh)
+
+    async def in_executor(self, function, *args):
+        # O lock do store pode estar com um refresh: esperar por ele fora do loop de eventos
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                added = await self.refresh()
+                if added:
+                    print(f"🔄 {added} novas partidas incorporadas ({len(self.store.games)} no total)")
+            except Exception as e:
+                print(f"⚠️ Erro ao atualizar partidas: {e}")
+
+    async def handle_health(self, params):
+        return 200, 'json', {
+            'games': len(self.store.games),
+            'games_scanned': self.store.games_scanned,
+            'offset': self.store.offset,
+            'version': self.store.version,
+        }
+
+    async def handle_report(self, params):
+        fmt = params.get('format', 'json')
+        if fmt not in RENDERERS:
+            return 400, 'json', {'error': f"formato desconhecido: {fmt}"}
+        model = await self.in_executor(self.store.report)
+        if fmt == 'json':
+            return 200, 'json', model.to_dict()
+        return 200, fmt, render_report(model, fmt)
+
+    async def handle_games(self, params):
+        criteria = {key: params[key] for key in
+                    ('color', 'result', 'opening', 'opponent', 'time_control', 'since', 'until') if key in params}
+        try:
+            for key in ('min_elo', 'max_elo'):
+                if key in params:
+                    criteria[key] = int(params[key])
+            limit = int(params.get('limit', 100))
+        except ValueError:
+            return 400, 'json', {'error': 'min_elo, max_elo e limit devem ser inteiros'}
+
+        indices, selected, summaries, analyzer = await self.in_executor(self.select_games, criteria, limit)
+        wins = sum(1 for g in selected if analyzer.did_player_win(g))
+        losses = sum(1 for g in selected if analyzer.did_player_lose(g))
+        draws = sum(1 for g in selected if analyzer.is_draw(g))
+        return 200, 'json', {
+            'total': len(indices),
+            'wins': wins,
+            'losses': losses,
+            'draws': draws,
+            'win_rate': wins / len(indices) * 100 if indices else 0.0,
+            'games': summaries,
+        }
+
+    def select_games(self, criteria, limit):
+        """Filtra e copia as partidas sob o lock do store (um refresh no meio pode recarregar a lista)"""
+        store = self.store
+        with store.lock:
+            indices = store.filter_games(**criteria)
+            selected = [store.games[i] for i in indices]
+            summaries = [store.summarize(i) for i in indices[:limit]]
+            return indices, selected, summaries, store.analyzer
+
+    async def handle_refresh(self, params):
+        added = await self.refresh()
+        return 200, 'json', {'added': added, 'games': len(self.store.games)}
+
+    async def handle_connection(self, reader, writer):
+        started = time.perf_counter()
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()).strip():
+                pass  # Cabeçalhos não são usados
+
+            if len(request_line) < 2:
+                status, fmt, body = 400, 'json', {'error': 'requisição inválida'}
+            elif request_line[0] != 'GET':
+                status, fmt, body = 405, 'json', {'error': 'apenas GET é suportado'}
+            else:
+                url = urlsplit(request_line[1])
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                handler = self.routes.get(url.path.rstrip('/') or '/report')
+                if handler is None:
+                    status, fmt, body = 404, 'json', {'error': f"rota desconhecida: {url.path}"}
+                else:
+                    status, fmt, body = await handler(params)
+        except Exception as e:
+            status, fmt, body = 500, 'json', {'error': str(e)}
+
+        if fmt == 'json':
+            body = json.dumps(body, ensure_ascii=False)
+        payload = body.encode('utf-8')
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        header = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                  f"Content-Type: {CONTENT_TYPES[fmt]}\r\n"
+                  f"Content-Length: {len(payload)}\r\n"
+                  f"X-Response-Time-Ms: {elapsed_ms:.2f}\r\n"
+                  "Connection: close\r\n\r\n")
+        writer.write(header.encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        print(f"📂 Carregando {self.store.pgn_path}...")
+        await self.refresh()
+        print(f"✅ {len(self.store.games)} partidas de {self.store.player_name} em memória")
+
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"🌐 Servidor em http://{self.host}:{self.port} (rotas: {', '.join(self.routes)})")
+        refresher = asyncio.create_task(self.refresh_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python report_server.py <arquivo.pgn> <nome_do_jogador> [porta]")
+        sys.exit(1)
+
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8765
+    server = ReportServer(GameStore(sys.argv[1], sys.argv[2]), port=port)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado")
+
+
+if __name__ == "__main__":
+    main()
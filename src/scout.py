@@ -0,0 +1,416 @@
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+from checkpoint import CHECKPOINT_DIR, atomic_write
+from stenio import CHESSCOM_API_URL, ChessComDownloader, PGNAnalyzer, movetext_san
+from time_control import CATEGORIES, category_performance
+
+CACHE_DIR = os.path.join(CHECKPOINT_DIR, 'http_cache')
+# Meses de histórico de cada adversário
+SCOUT_MONTHS = 12
+FETCH_WORKERS = 8
+# Requisições por segundo somando todas as threads (a API do Chess.com responde 429 a rajadas paralelas)
+REQUESTS_PER_SECOND = 4.0
+MAX_RETRIES = 3
+# Meios-lances que definem uma "linha" de abertura e partidas mínimas para ela entrar no perfil
+LINE_PLIES = 6
+MIN_LINE_GAMES = 3
+MIN_OPENING_GAMES = 3
+TOP_ITEMS = 3
+
+ARCHIVE_MONTH_RE = re.compile(r'/games/(\d{4})/(\d{2})/?$')
+
+
+class RateLimiter:
+    """Espaça as requisições de todas as threads para no máximo `rate` por segundo"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _cached_response(url, body):
+    """Resposta montada do corpo em memória: content, json() e raw (para o ijson) funcionam"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = 'utf-8'
+    response._content = body
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def is_past_month(url):
+    """Arquivo mensal de um mês já encerrado: o conteúdo não muda mais"""
+    match = ARCHIVE_MONTH_RE.search(url)
+    if not match:
+        return False
+    now = time.gmtime()
+    return (int(match.group(1)), int(match.group(2))) < (now.tm_year, now.tm_mon)
+
+
+class CachedHTTP:
+    """
+    Cliente HTTP com cache em disco e limite de taxa, compartilhado pelas threads de download.
+
+    Tem o mesmo get() usado pelo ChessComDownloader. Meses encerrados vêm do
+    cache sem rede; a lista de arquivos e o mês corrente são revalidados com
+    ETag/Last-Modified (um 304 reaproveita o corpo salvo). Com offline=True só
+    o cache é lido: é assim que os processos de análise pegam os jogos.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, rate=REQUESTS_PER_SECOND, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.limiter = RateLimiter(rate)
+        self.local = threading.local()
+        self.hits = 0
+        self.requests = 0
+        self.counter_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _session(self):
+        # requests.Session não é garantidamente thread-safe: uma por thread, com keep-alive
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.body', base + '.meta.json'
+
+    def _load(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, response):
+        body_path, meta_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched': time.time(),
+        }
+        # O corpo vai antes: um meta.json só existe com o corpo completo
+        atomic_write(body_path, response.content)
+        atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def _count(self, hit):
+        with self.counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.requests += 1
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        meta, body = self._load(url)
+        if meta is not None and (self.offline or is_past_month(url)):
+            self._count(True)
+            return _cached_response(url, body)
+        if self.offline:
+            response = requests.Response()
+            response.status_code = 504
+            response.url = url
+            response._content = b'{"message": "fora do cache"}'
+            return response
+
+        request_headers = dict(headers or {})
+        if meta is not None:
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire()
+            response = self._session().get(url, headers=request_headers, timeout=timeout)
+            self._count(False)
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                break
+            retry_after = response.headers.get('Retry-After', '')
+            time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+
+        if response.status_code == 304 and meta is not None:
+            return _cached_response(url, body)
+        if response.status_code == 200:
+            self._store(url, response)
+            # O corpo já foi lido inteiro: devolve uma resposta em memória (stream incluído)
+            return _cached_response(url, response.content)
+        return response
+
+
+def fetch_archives(usernames, months, http, base_url=CHESSCOM_API_URL, workers=FETCH_WORKERS):
+    """
+    Baixa em paralelo os arquivos mensais de todos os jogadores para o cache
+
+    Returns:
+        dict: usuário -> quantidade de arquivos mensais disponíveis (0 se falhou)
+    """
+    def archive_list(username):
+        return ChessComDownloader(username, base_url, http, request_delay=0).get_recent_archives(months)
+
+    def fetch_month(username, url):
+        downloader = ChessComDownloader(username, base_url, http, request_delay=0)
+        return http.get(url, headers=downloader.headers, timeout=15).status_code == 200
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        archives = dict(zip(usernames, pool.map(archive_list, usernames)))
+        futures = {pool.submit(fetch_month, username, url): username
+                   for username, urls in archives.items() for url in urls}
+        failed = defaultdict(int)
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                ok = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Erro ao baixar arquivo de {futures[future]}: {e}")
+                ok = False
+            if not ok:
+                failed[futures[future]] += 1
+
+    for username, count in failed.items():
+        print(f"⚠️ {username}: {count} arquivos mensais não baixados (ficam de fora do perfil)")
+    return {username: len(urls) for username, urls in archives.items()}
+
+
+def format_line(sans):
+    """Lances SAN com numeração: ['e4', 'c5', 'Nf3'] -> '1. e4 c5 2. Nf3'"""
+    parts = []
+    for ply, san in enumerate(sans):
+        if ply % 2 == 0:
+            parts.append(f"{ply // 2 + 1}.")
+        parts.append(san)
+    return ' '.join(parts)
+
+
+def _rate(stats):
+    total = stats['wins'] + stats['losses'] + stats['draws']
+    return {**stats, 'total': total, 'win_rate': stats['wins'] / total * 100 if total else 0.0}
+
+
+def player_profile(analyzer, line_plies=LINE_PLIES):
+    """
+    Perfil compacto de um jogador: aberturas por cor, força por ritmo e linhas fracas
+
+    Returns:
+        dict serializável em JSON
+    """
+    games = analyzer.games
+    results = {'wins': 0, 'losses': 0, 'draws': 0}
+    lines = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0})
+    ratings = {}
+    for game in games:
+        is_white = analyzer.is_player_white(game)
+        if analyzer.did_player_win(game):
+            outcome = 'wins'
+        elif analyzer.did_player_lose(game):
+            outcome = 'losses'
+        elif analyzer.is_draw(game):
+            outcome = 'draws'
+        else:
+            continue
+        results[outcome] += 1
+        color = 'white' if is_white else 'black'
+        sans = movetext_san(game['pgn_text'])[:line_plies]
+        if len(sans) == line_plies:
+            lines[color, tuple(sans)][outcome] += 1
+        # Rating mais recente em cada ritmo (jogos em ordem cronológica dentro dos arquivos)
+        ratings[game.get('tc_category', 'unknown')] = game['white_elo'] if is_white else game['black_elo']
+
+    white_counts, black_counts = analyzer.get_opening_stats()
+    white_rates, black_rates = analyzer.get_opening_win_rates()
+    openings = {}
+    for color, counts, rates in (('white', white_counts, white_rates), ('black', black_counts, black_rates)):
+        openings[color] = [{'opening': name, 'games': count,
+                            'win_rate': rates[name]['win_rate'] if name in rates else None}
+                           for name, count in counts.most_common(TOP_ITEMS)]
+
+    time_controls = category_performance(games, analyzer.player_name, analyzer.category_index)
+    for category, stats in time_controls.items():
+        stats['rating'] = ratings.get(category)
+
+    weak = []
+    for (color, sans), stats in lines.items():
+        stats = _rate(stats)
+        if stats['total'] >= MIN_LINE_GAMES:
+            weak.append({'color': color, 'line': format_line(sans), **stats})
+    weak.sort(key=lambda line: (line['win_rate'], -line['total']))
+
+    weak_openings = []
+    for color, rates in (('white', white_rates), ('black', black_rates)):
+        for name, stats in rates.items():
+            if stats['total_games'] >= MIN_OPENING_GAMES:
+                weak_openings.append({'color': color, 'opening': name, 'games': stats['total_games'],
+                                      'win_rate': stats['win_rate']})
+    weak_openings.sort(key=lambda entry: (entry['win_rate'], -entry['games']))
+
+    return {
+        'username': analyzer.player_name,
+        'games': len(games),
+        **_rate(results),
+        'openings': openings,
+        'time_controls': time_controls,
+        'weak_lines': weak[:TOP_ITEMS],
+        'weak_openings': weak_openings[:TOP_ITEMS],
+    }
+
+
+def scout_player(username, months, base_url, cache_dir):
+    """Analisa um jogador a partir do cache (executado em um processo do pool)"""
+    http = CachedHTTP(cache_dir, offline=True)
+    downloader = ChessComDownloader(username, base_url, http, request_delay=0)
+    # As mensagens de download de vários processos se misturariam: o processo principal resume
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = PGNAnalyzer.from_chesscom_games(downloader.iter_recent_games(months), username)
+        return player_profile(analyzer)
+
+
+def scout(usernames, months=SCOUT_MONTHS, base_url=CHESSCOM_API_URL, workers=FETCH_WORKERS,
+          processes=None, cache_dir=CACHE_DIR, rate=REQUESTS_PER_SECOND):
+    """
+    Baixa e analisa o histórico de vários adversários
+
+    Os downloads de todos os jogadores rodam juntos em threads, com um cache
+    HTTP e um limite de taxa compartilhados; depois cada jogador é analisado
+    em um processo do pool, lendo os jogos do cache.
+
+    Returns:
+        dict: usuário -> perfil (None para quem não teve arquivos baixados)
+    """
+    usernames = [username.lower() for username in usernames]
+    http = CachedHTTP(cache_dir, rate)
+    start = time.monotonic()
+    print(f"📥 Baixando {months} meses de {len(usernames)} jogadores ({workers} conexões)...")
+    archives = fetch_archives(usernames, months, http, base_url, workers)
+    print(f"✅ Download concluído em {time.monotonic() - start:.1f}s "
+          f"({http.requests} requisições, {http.hits} do cache)")
+
+    profiles = {username: None for username in usernames}
+    available = [username for username in usernames if archives.get(username)]
+    with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+        futures = {pool.submit(scout_player, username, months, base_url, cache_dir): username
+                   for username in available}
+        for future in concurrent.futures.as_completed(futures):
+            username = futures[future]
+            try:
+                profiles[username] = future.result()
+            except Exception as e:
+                print(f"❌ Erro ao analisar {username}: {e}")
+    return profiles
+
+
+def format_profile_lines(profile):
+    lines = [f"🕵️ {profile['username']}: {profile['games']} partidas, "
+             f"{profile['wins']}V/{profile['losses']}D/{profile['draws']}E ({profile['win_rate']:.1f}% win rate)"]
+    for color, label in (('white', 'Brancas'), ('black', 'Pretas')):
+        entries = [f"{entry['opening']} ({entry['games']}"
+                   + (f", {entry['win_rate']:.0f}%" if entry['win_rate'] is not None else "") + ")"
+                   for entry in profile['openings'][color]]
+        lines.append(f"• {label}: {', '.join(entries) if entries else 'sem partidas'}")
+
+    strengths = []
+    for category in CATEGORIES:
+        stats = profile['time_controls'].get(category)
+        if stats:
+            rating = f" {stats['rating']}" if stats.get('rating') else ""
+            strengths.append(f"{category}{rating} {stats['win_rate']:.0f}% ({stats['total']})")
+    lines.append(f"• Ritmos: {', '.join(strengths) if strengths else 'sem dados'}")
+
+    for entry in profile['weak_openings']:
+        color = 'brancas' if entry['color'] == 'white' else 'pretas'
+        lines.append(f"• Abertura fraca de {color}: {entry['opening']} "
+                     f"({entry['win_rate']:.0f}% em {entry['games']} jogos)")
+    for entry in profile['weak_lines']:
+        color = 'brancas' if entry['color'] == 'white' else 'pretas'
+        lines.append(f"• Linha fraca de {color}: {entry['line']} "
+                     f"({entry['wins']}/{entry['total']}, {entry['win_rate']:.0f}%)")
+    return lines
+
+
+def print_profiles(profiles):
+    print("\n🕵️ PERFIS DOS ADVERSÁRIOS:")
+    for username, profile in profiles.items():
+        print()
+        if profile is None:
+            print(f"🕵️ {username}: nenhuma partida baixada")
+            continue
+        for line in format_profile_lines(profile):
+            print(line)
+    print()
+
+
+USAGE = """Uso: python scout.py <usuario> [usuario ...] [opções]
+  --months N         meses de histórico de cada jogador (padrão 12)
+  --workers N        downloads simultâneos (padrão 8)
+  --processes N      processos de análise (padrão: um por CPU)
+  --rate N           requisições por segundo somando todos os downloads (padrão 4)
+  --base-url URL     raiz da API (ex.: http://127.0.0.1:8000/pub/player com python mock_chesscom.py;
+                     python mock_chesscom.py --check verifica o scout contra esse servidor)
+  --cache DIR        diretório do cache HTTP (padrão .checkpoints/http_cache)
+  --json             imprime os perfis em JSON"""
+
+
+def main(args=None):
+    args = list(sys.argv[1:] if args is None else args)
+    options = {'--months': SCOUT_MONTHS, '--workers': FETCH_WORKERS, '--processes': None,
+               '--rate': REQUESTS_PER_SECOND, '--base-url': CHESSCOM_API_URL, '--cache': CACHE_DIR}
+    as_json = '--json' in args
+    usernames = []
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = args[i + 1]
+            i += 2
+        elif args[i] == '--json':
+            i += 1
+        elif args[i] in ('--help', '-h') or args[i].startswith('--'):
+            print(USAGE)
+            sys.exit(0 if args[i] in ('--help', '-h') else 1)
+        else:
+            usernames.append(args[i])
+            i += 1
+    if not usernames:
+        print(USAGE)
+        sys.exit(1)
+
+    # Em --json as mensagens de download vão para stderr, deixando stdout só com o JSON
+    with contextlib.redirect_stdout(sys.stderr if as_json else sys.stdout):
+        profiles = scout(usernames, int(options['--months']), options['--base-url'], int(options['--workers']),
+                         int(options['--processes']) if options['--processes'] else None,
+                         options['--cache'], float(options['--rate']))
+    if as_json:
+        print(json.dumps(profiles, ensure_ascii=False, indent=2))
+    else:
+        print_profiles(profiles)
+
+
+if __name__ == "__main__":
+    main()
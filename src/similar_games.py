@@ -0,0 +1,365 @@
+import io
+import json
+import os
+import sys
+
+import numpy as np
+
+from checkpoint import atomic_write
+from ply_features import PlyTable
+
+NUM_PERM = 128
+# 32 faixas de 4 valores: pares com similaridade 0,5 viram candidatos em ~87% das vezes,
+# partidas que só dividem a abertura (similaridade < 0,1) em menos de 0,5%
+BANDS = 32
+SIMILAR_GAMES = 10
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.lsh.npz'
+# Campos de cada partida guardados no índice, para mostrar os resultados sem reabrir o PGN
+META_FIELDS = ['white', 'black', 'result', 'date', 'opening']
+
+EMPTY_SLOT = np.uint32(0xFFFFFFFF)
+
+_rng = np.random.default_rng(0x5E9A1)
+# Zobrist por [cor, peça, casa]; a "peça 0" vale zero: lances sem captura/promoção não mexem no hash
+ZOBRIST = _rng.integers(0, np.iinfo(np.uint64).max, (2, 7, 64), dtype=np.uint64, endpoint=True)
+ZOBRIST[:, 0, :] = 0
+SIDE_TO_MOVE = _rng.integers(0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True)
+PAIR_SALT = _rng.integers(0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True)
+SIGNATURE_SALT = _rng.integers(0, np.iinfo(np.uint64).max, dtype=np.uint64, endpoint=True)
+# Ímpar: soma a um valor emprestado de outra posição da assinatura, para ele não colidir com o original
+ROTATION_STEP = np.uint32(0x9E3779B1)
+
+# Torre que acompanha o roque, por [cor, tipo de roque]: (casa de origem, casa de destino)
+_ROOK_SQUARES = {1: (7, 5), 2: (0, 3)}
+ROOK_CASTLING = np.zeros((2, 3), dtype=np.uint64)
+for _color in (0, 1):
+    for _castling, (_origin, _target) in _ROOK_SQUARES.items():
+        ROOK_CASTLING[_color, _castling] = (ZOBRIST[_color, 4, _origin + 56 * _color]
+                                            ^ ZOBRIST[_color, 4, _target + 56 * _color])
+
+
+def _mix(values):
+    """Finalizador do splitmix64: espalha os bits de cada uint64"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def position_hashes(table):
+    """
+    Hash Zobrist (peças + lado a jogar) da posição depois de cada meio-lance da tabela
+
+    Calculado só com as colunas da tabela, sem tabuleiro: cada lance vira o XOR
+    das casas que mudaram, e um XOR acumulado por partida dá a posição. Os
+    hashes são relativos à posição inicial da partida.
+    """
+    plies = table.plies
+    color = (~table.white_moves()).astype(np.intp)
+    piece = plies['piece'].astype(np.intp)
+    arrived = np.where(plies['promotion'] > 0, plies['promotion'], plies['piece']).astype(np.intp)
+    to_square = plies['to_square'].astype(np.intp)
+    # No en passant o peão capturado está atrás da casa de destino
+    captured_square = np.where(plies['en_passant'], to_square - 8 + 16 * color, to_square)
+
+    delta = (ZOBRIST[color, piece, plies['from_square']]
+             ^ ZOBRIST[color, arrived, to_square]
+             ^ ZOBRIST[1 - color, plies['captured'].astype(np.intp), captured_square]
+             ^ ROOK_CASTLING[color, plies['castling'].astype(np.intp)]
+             ^ SIDE_TO_MOVE)
+    accumulated = np.bitwise_xor.accumulate(delta)
+    # Desconta o acumulado das partidas anteriores: XOR é a própria inversa
+    before = np.concatenate((np.zeros(1, dtype=np.uint64), accumulated))[table.offsets[:-1]]
+    return accumulated ^ np.repeat(before, table.lengths)
+
+
+def game_shingles(table):
+    """
+    Shingles de cada partida: hashes das posições e de cada par de lances consecutivos
+
+    Returns:
+        tuple: (array uint64 com os shingles, array com a partida de cada um)
+    """
+    plies = table.plies
+    moves = (plies['piece'].astype(np.uint64)
+             | plies['from_square'].astype(np.uint64) << np.uint64(3)
+             | plies['to_square'].astype(np.uint64) << np.uint64(9)
+             | plies['promotion'].astype(np.uint64) << np.uint64(15))
+    # Pares só dentro da mesma partida: a última linha de cada uma não tem sucessor
+    has_next = np.ones(len(plies), dtype=bool)
+    has_next[table.offsets[1:][table.lengths > 0] - 1] = False
+    first = np.flatnonzero(has_next)
+    pairs = _mix((moves[first] << np.uint64(18) | moves[first + 1]) ^ PAIR_SALT)
+
+    return (np.concatenate((position_hashes(table), pairs)),
+            np.concatenate((table.game, table.game[first])))
+
+
+def minhash_signatures(table, num_perm=NUM_PERM):
+    """
+    Assinatura MinHash (num_perm valores uint32) de cada partida da tabela
+
+    Em vez de num_perm funções de hash por shingle, usa uma só ("one permutation
+    hashing"): os bits altos do hash escolhem a posição da assinatura e os
+    baixos disputam o mínimo dela. Posições que ficaram vazias pegam o valor da
+    próxima preenchida, somado a um passo por posição de distância
+    (densificação por rotação); a similaridade estimada continua sendo a
+    fração de posições iguais. Partidas sem lances ficam com EMPTY_SLOT.
+    """
+    bits = num_perm.bit_length() - 1
+    if num_perm != 1 << bits:
+        raise ValueError(f"num_perm precisa ser potência de 2: {num_perm}")
+
+    shingles, owner = game_shingles(table)
+    hashed = _mix(shingles ^ SIGNATURE_SALT)
+    slot = (hashed >> np.uint64(64 - bits)).astype(np.int64) if bits else np.zeros(len(hashed), dtype=np.int64)
+    signatures = np.full(table.game_count * num_perm, EMPTY_SLOT, dtype=np.uint32)
+    np.minimum.at(signatures, owner * num_perm + slot, (hashed & np.uint64(0xFFFFFFFF)).astype(np.uint32))
+    signatures = signatures.reshape(table.game_count, num_perm)
+
+    filled = signatures != EMPTY_SLOT
+    played = filled.any(axis=1)
+    # Próxima posição preenchida à direita (circular), via mínimo acumulado da direita para a esquerda
+    columns = np.arange(2 * num_perm)
+    candidates = np.where(np.concatenate((filled, filled), axis=1), columns, 2 * num_perm)
+    following = np.minimum.accumulate(candidates[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+    rows = np.flatnonzero(played)
+    following = following[rows]
+    distance = (following - columns[:num_perm]).astype(np.uint32)
+    borrowed = signatures[rows[:, np.newaxis], following % num_perm] + distance * ROTATION_STEP
+    signatures[rows] = borrowed
+    return signatures
+
+
+def index_path(pgn_path, player_name):
+    """Índice salvo ao lado do PGN: <arquivo>.<jogador>.lsh.npz"""
+    return f"{pgn_path}.{player_name.lower()}{INDEX_SUFFIX}"
+
+
+def _file_key(pgn_path, player_name, num_perm, bands):
+    stat = os.stat(pgn_path)
+    return [INDEX_VERSION, stat.st_size, stat.st_mtime_ns, player_name.lower(), num_perm, bands]
+
+
+class LSHIndex:
+    """
+    Assinaturas MinHash das partidas e baldes LSH para achar partidas parecidas.
+
+    Cada assinatura é dividida em `bands` faixas; partidas com alguma faixa
+    idêntica são candidatas. As chaves de cada faixa ficam ordenadas, então
+    uma consulta faz uma busca binária por faixa e só compara as candidatas:
+    o custo cresce com log(n) e com o número de parecidas, não com o acervo.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) precisa ser múltiplo de bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.game_numbers = []
+        self.meta = {field: [] for field in META_FIELDS}
+        self._keys = None
+        self._order = None
+
+    def __len__(self):
+        return len(self.game_numbers)
+
+    def add(self, signatures, games, numbers):
+        """Acrescenta partidas já assinadas; `numbers` identifica cada uma no arquivo"""
+        self.signatures = np.concatenate((self.signatures, signatures))
+        self.game_numbers.extend(int(number) for number in numbers)
+        for field in META_FIELDS:
+            self.meta[field].extend(str(game.get(field, '')) for game in games)
+        self._keys = None
+
+    def add_games(self, games, numbers=None, table=None):
+        """Assina e indexa registros de partida (números padrão: posição no índice)"""
+        if not games:
+            return
+        table = table if table is not None else PlyTable.from_games(games)
+        if numbers is None:
+            numbers = range(len(self), len(self) + len(games))
+        self.add(minhash_signatures(table, self.num_perm), games, numbers)
+
+    def _band_keys(self, signatures):
+        """Chave uint64 de cada faixa de cada assinatura: (partidas, bands)"""
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+        for row in range(self.rows):
+            keys = _mix(keys ^ rows[:, :, row])
+        return keys
+
+    def _build(self):
+        # Partidas sem lances não têm assinatura: ficam fora dos baldes
+        indexed = np.flatnonzero((self.signatures != EMPTY_SLOT).any(axis=1))
+        keys = self._band_keys(self.signatures[indexed]).T
+        order = np.argsort(keys, axis=1, kind='stable')
+        self._keys = np.take_along_axis(keys, order, axis=1)
+        self._order = indexed[order]
+
+    def candidates(self, signature):
+        """Posições das partidas que dividem ao menos uma faixa com a assinatura"""
+        if self._keys is None:
+            self._build()
+        query = self._band_keys(signature[np.newaxis, :])[0]
+        found = []
+        for band in range(self.bands):
+            low = np.searchsorted(self._keys[band], query[band], 'left')
+            high = np.searchsorted(self._keys[band], query[band], 'right')
+            found.append(self._order[band, low:high])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def query(self, signature, k=SIMILAR_GAMES, exclude=None):
+        """
+        Partidas mais parecidas com a assinatura
+
+        Returns:
+            list: (posição no índice, similaridade de Jaccard estimada), da mais parecida
+        """
+        candidates = self.candidates(signature)
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        similarity = (self.signatures[candidates] == signature).mean(axis=1)
+        best = np.argsort(-similarity, kind='stable')[:k]
+        return [(int(candidates[i]), float(similarity[i])) for i in best]
+
+    def position_of(self, game_number):
+        """Posição no índice da partida de número `game_number` (None se não indexada)"""
+        try:
+            return self.game_numbers.index(game_number)
+        except ValueError:
+            return None
+
+    def entry(self, position):
+        summary = {'game_number': self.game_numbers[position]}
+        for field in META_FIELDS:
+            summary[field] = self.meta[field][position]
+        return summary
+
+    def save(self, pgn_path, player_name):
+        """Grava o índice ao lado do PGN, com a chave (tamanho, mtime, jogador) do arquivo atual"""
+        path = index_path(pgn_path, player_name)
+        buffer = io.BytesIO()
+        key = _file_key(pgn_path, player_name, self.num_perm, self.bands)
+        np.savez(buffer, key=np.array(json.dumps(key)), signatures=self.signatures,
+                 game_numbers=np.array(self.game_numbers, dtype=np.int64),
+                 **{field: np.array(values, dtype=str) for field, values in self.meta.items()})
+        try:
+            atomic_write(path, buffer.getvalue())
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar o índice de similaridade {path}: {e}")
+        return path
+
+    @classmethod
+    def load(cls, pgn_path, player_name, num_perm=NUM_PERM, bands=BANDS):
+        """Índice salvo para o PGN atual, ou None se não existir ou o arquivo tiver mudado"""
+        try:
+            with np.load(index_path(pgn_path, player_name), allow_pickle=False) as data:
+                if json.loads(str(data['key'])) != _file_key(pgn_path, player_name, num_perm, bands):
+                    return None
+                index = cls(num_perm, bands)
+                index.signatures = data['signatures']
+                index.game_numbers = data['game_numbers'].tolist()
+                index.meta = {field: data[field].tolist() for field in META_FIELDS}
+        except (OSError, ValueError, KeyError):
+            return None
+        return index
+
+
+def index_pgn_file(pgn_path, player_name, batch_size=1000):
+    """Parseia o PGN em streaming e indexa as partidas do jogador, em lotes"""
+    from pgn_io import open_pgn
+    from pgn_scan import iter_parsed_games
+    from ply_features import PlyFeatureBuilder
+    from stenio import PGNAnalyzer
+
+    analyzer = PGNAnalyzer("", player_name, parse=False)
+    errors = analyzer.parse_errors
+    index = LSHIndex()
+    batch, numbers = [], []
+    with open_pgn(pgn_path, threaded=True) as file:
+        for game in iter_parsed_games(file, errors, visitor=PlyFeatureBuilder):
+            try:
+                record = analyzer.game_to_record(game)
+            except Exception as e:
+                errors.record(game.headers, e)
+                continue
+            if record is not None and not analyzer.is_duplicate(record):
+                batch.append(record)
+                numbers.append(errors.game_number)
+                if len(batch) >= batch_size:
+                    index.add_games(batch, numbers)
+                    batch, numbers = [], []
+    index.add_games(batch, numbers)
+    errors.print_summary()
+    index.save(pgn_path, player_name)
+    return index
+
+
+def game_signature(pgn_path, num_perm=NUM_PERM):
+    """Assinatura da primeira partida de um arquivo PGN (a partida de referência da busca)"""
+    import chess.pgn
+    from ply_features import PlyFeatureBuilder
+
+    with open(pgn_path, 'r', encoding='utf-8', errors='replace') as f:
+        game = chess.pgn.read_game(f, Visitor=PlyFeatureBuilder)
+    if game is None:
+        return None
+    return minhash_signatures(PlyTable(game.plies, [len(game.plies)], [game.white_first]), num_perm)[0]
+
+
+def format_entry(entry):
+    return (f"#{entry['game_number']:<6} {entry['date']}  {entry['white']} vs {entry['black']}  "
+            f"{entry['result']}  {entry['opening']}")
+
+
+def main():
+    if len(sys.argv) < 4:
+        print("Uso: python similar_games.py <arquivo.pgn> <nome_do_jogador> "
+              "<número da partida | partida.pgn> [quantidade]")
+        sys.exit(1)
+
+    pgn_file_path, player_name, reference = sys.argv[1:4]
+    k = int(sys.argv[4]) if len(sys.argv) > 4 else SIMILAR_GAMES
+    try:
+        index = LSHIndex.load(pgn_file_path, player_name)
+        if index is None:
+            print(f"📇 Indexando as partidas de {player_name} em {index_path(pgn_file_path, player_name)}...")
+            index = index_pgn_file(pgn_file_path, player_name)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+
+    exclude = None
+    if reference.isdigit():
+        exclude = index.position_of(int(reference))
+        if exclude is None:
+            print(f"❌ Partida #{reference} não está no índice (só partidas de {player_name})")
+            return
+        signature = index.signatures[exclude]
+        print(f"🎯 Referência: {format_entry(index.entry(exclude))}")
+    else:
+        try:
+            signature = game_signature(reference, index.num_perm)
+        except FileNotFoundError:
+            print(f"❌ Arquivo não encontrado: {reference}")
+            return
+        if signature is None:
+            print(f"❌ Nenhuma partida em {reference}")
+            return
+        print(f"🎯 Referência: primeira partida de {reference}")
+
+    results = index.query(signature, k, exclude)
+    print(f"🔁 PARTIDAS PARECIDAS ({len(index)} indexadas):")
+    if not results:
+        print("• Nenhuma partida parecida encontrada")
+    for position, similarity in results:
+        print(f"• {similarity * 100:3.0f}%  {format_entry(index.entry(position))}")
+
+
+if __name__ == "__main__":
+    main()
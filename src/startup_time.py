@@ -0,0 +1,150 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STENIO = os.path.join(SRC_DIR, 'stenio.py')
+
+# Tempo máximo (ms) acima da partida do próprio interpretador
+STARTUP_BUDGET_MS = 100
+RUNS = 5
+SLOWEST_IMPORTS = 5
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| +(\S+)$')
+
+SMALL_PGN = """[Event "Live Chess"]
+[Site "Chess.com"]
+[Date "2023.11.14"]
+[White "juniorsatanas"]
+[Black "adversario"]
+[Result "1-0"]
+[WhiteElo "1500"]
+[BlackElo "1480"]
+[TimeControl "180+2"]
+
+1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+[Event "Live Chess"]
+[Site "Chess.com"]
+[Date "2023.11.15"]
+[White "adversario"]
+[Black "juniorsatanas"]
+[Result "1/2-1/2"]
+[WhiteElo "1490"]
+[BlackElo "1505"]
+[TimeControl "600"]
+
+1. d4 d5 2. c4 e6 1/2-1/2
+"""
+
+
+def _env():
+    # Sem .pyc o tempo mediria a compilação dos módulos, não a partida do programa
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def _clear_cache(cwd):
+    shutil.rmtree(os.path.join(cwd, '.checkpoints'), ignore_errors=True)
+
+
+def wall_time(args, cwd, runs=RUNS, fresh=False):
+    """Menor tempo de parede (ms) de `python <args>` em várias execuções, depois de um aquecimento"""
+    command = [sys.executable] + args
+    subprocess.run(command, cwd=cwd, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    best = float('inf')
+    for _ in range(runs):
+        if fresh:
+            _clear_cache(cwd)
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def import_times(args, cwd, fresh=False):
+    """Módulos importados em uma execução com -X importtime: {módulo: ms acumulados}"""
+    if fresh:
+        _clear_cache(cwd)
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=cwd, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            imports[match.group(2)] = int(match.group(1)) / 1000
+    return imports
+
+
+def measure(budget_ms=STARTUP_BUDGET_MS, runs=RUNS):
+    """
+    Mede a partida dos pontos de entrada e compara com o orçamento
+
+    Cada cenário é medido como tempo de parede menos o de `python -c pass`,
+    para não contar a partida do interpretador (site-packages, .pth), que
+    varia de máquina para máquina. Cenários com orçamento None só são
+    informados: um PGN sem cache precisa do python-chess e do numpy.
+
+    Returns:
+        list: (nome, ms acima do interpretador, orçamento, imports mais lentos)
+    """
+    workdir = tempfile.mkdtemp(prefix='startup_time_')
+    try:
+        small_pgn = os.path.join(workdir, 'pequeno.pgn')
+        with open(small_pgn, 'w', encoding='utf-8') as f:
+            f.write(SMALL_PGN)
+
+        scenarios = [
+            ('import stenio', ['-c', f'import sys; sys.path.insert(0, {SRC_DIR!r}); import stenio'], budget_ms, False),
+            ('stenio.py --help', [STENIO, '--help'], budget_ms, False),
+            ('stenio.py --pgn (relatório em cache)', [STENIO, '--pgn', small_pgn], budget_ms, False),
+            ('stenio.py --pgn (PGN pequeno, sem cache)', [STENIO, '--pgn', small_pgn], None, True),
+        ]
+
+        baseline = wall_time(['-c', 'pass'], workdir, runs)
+        interpreter_imports = import_times(['-c', 'pass'], workdir)
+        results = []
+        for name, args, budget, fresh in scenarios:
+            elapsed = wall_time(args, workdir, runs, fresh) - baseline
+            imports = import_times(args, workdir, fresh)
+            slowest = sorted(((ms, module) for module, ms in imports.items() if module not in interpreter_imports),
+                             reverse=True)[:SLOWEST_IMPORTS]
+            results.append((name, elapsed, budget, slowest))
+        return baseline, results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    args = sys.argv[1:]
+    budget = float(args[args.index('--budget') + 1]) if '--budget' in args else STARTUP_BUDGET_MS
+    runs = int(args[args.index('--runs') + 1]) if '--runs' in args else RUNS
+
+    baseline, results = measure(budget, runs)
+    print(f"⏱️ TEMPO DE PARTIDA (interpretador sozinho: {baseline:.0f} ms, melhor de {runs} execuções)")
+    over_budget = False
+    for name, elapsed, limit, slowest in results:
+        if limit is None:
+            status = "ℹ️"
+        elif elapsed <= limit:
+            status = "✅"
+        else:
+            status = "❌"
+            over_budget = True
+        budget_text = f" (orçamento {limit:.0f} ms)" if limit is not None else ""
+        print(f"{status} {name}: +{elapsed:.0f} ms{budget_text}")
+        for ms, module in slowest:
+            print(f"     {module}: {ms:.1f} ms")
+
+    if over_budget:
+        print("❌ Partida acima do orçamento - veja os imports mais lentos acima")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,73 @@
 import re
-import chess.pgn
 from collections import Counter, defaultdict
 import io
-import requests
+import os
 import time
-from datetime import datetime, timedelta
 import json
 
+from lazy import lazy_import
+from pgn_io import detect_compression, open_pgn
+from pgn_scan import iter_parsed_games, ParseErrorLog
+from dedup import GameDeduplicator, game_link, identity_key, record_key
+from checkpoint import DownloadCheckpoint, ParseCheckpoint, ReportCache, CHECKPOINT_INTERVAL
+from time_control import CategoryIndex, category_performance, time_control_fields
+
+# Só carregam no caminho que os usa: --help e relatórios em cache não pagam rede, tabuleiro nem numpy
+datetime = lazy_import('datetime')
+requests = lazy_import('requests')
+chess = lazy_import('chess')
+elo_stats = lazy_import('elo_stats')
+clock_stats = lazy_import('clock_stats')
+temporal_stats = lazy_import('temporal_stats')
+report = lazy_import('report')
+matrix_effect = lazy_import('matrix_effect')
+ply_features = lazy_import('ply_features')
+move_patterns = lazy_import('move_patterns')
+similar_games = lazy_import('similar_games')
+puzzle_miner = lazy_import('puzzle_miner')
+termination = lazy_import('termination')
+timelines = lazy_import('timelines')
+opening_book = lazy_import('opening_book')
+
+# Tokens do movetext que não são lances: comentários, NAGs, números de lance e resultado
+MOVETEXT_NOISE_RE = re.compile(r'\{[^}]*\}|\$\d+|\d+\.(?:\.\.)?|1-0|0-1|1/2-1/2|\*')
+PGN_HEADER_RE = re.compile(r'^\[(\w+) "(.*)"\]\s*$', re.MULTILINE)
+
+# Tamanho (em caracteres) acumulado antes de cada escrita do PGN convertido
+PGN_CHUNK_SIZE = 1 << 20
+
+CHESSCOM_API_URL = "https://api.chess.com/pub/player"
+# Pausa entre arquivos mensais baixados em sequência
+REQUEST_DELAY = 0.5
+
+
+def _json_decoders():
+    """ijson (streaming) e orjson (decodificação rápida) quando instalados; só o download os importa"""
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+    try:
+        import orjson
+        json_loads = orjson.loads
+    except ImportError:
+        json_loads = json.loads
+    return ijson, json_loads
+
 
 class ChessComDownloader:
-    def __init__(self, username):
+    def __init__(self, username, base_url=CHESSCOM_API_URL, session=None, request_delay=REQUEST_DELAY):
+        """
+        Args:
+            username (str): Nome de usuário do Chess.com
+            base_url (str): Raiz da API (outra para um servidor local de testes)
+            session: cliente HTTP com get() no formato do requests (ex.: scout.CachedHTTP)
+            request_delay (float): Pausa entre arquivos mensais (0 quando o cliente já limita a taxa)
+        """
         self.username = username.lower()
-        self.base_url = "https://api.chess.com/pub/player"
+        self.base_url = base_url.rstrip('/')
+        self.http = session if session is not None else requests
+        self.request_delay = request_delay
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json',
@@ -22,13 +78,15 @@ class ChessComDownloader:
             'Sec-Fetch-Mode': 'cors',
             'Sec-Fetch-Site': 'cross-site',
         }
+        # Bytes recebidos da API, para o progresso do download
+        self.bytes_downloaded = 0
 
     def get_available_archives(self):
         """Obtém lista de arquivos mensais disponíveis"""
         url = f"{self.base_url}/{self.username}/games/archives"
         try:
             print(f"🔗 Tentando acessar: {url}")
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http.get(url, headers=self.headers, timeout=10)
             print(f"📡 Status da resposta: {response.status_code}")
 
             if response.status_code == 200:
@@ -63,24 +121,83 @@ class ChessComDownloader:
 
     def download_month_games(self, archive_url):
         """Baixa jogos de um mês específico"""
+        games = list(self.iter_month_games(archive_url))
+        if games:
+            print(f"✅ {len(games)} jogos baixados")
+        return games
+
+    def iter_month_games(self, archive_url):
+        """
+        Gera os jogos de um mês decodificando o JSON em streaming (ijson) quando disponível
+
+        O valor de retorno do gerador (via `yield from`) indica se o mês veio inteiro.
+        """
+        ijson, json_loads = _json_decoders()
         try:
             print(f"📥 Baixando: {archive_url}")
-            response = requests.get(archive_url, headers=self.headers, timeout=15)
+            response = self.http.get(archive_url, headers=self.headers, timeout=15, stream=ijson is not None)
 
-            if response.status_code == 200:
-                data = response.json()
-                games = data.get('games', [])
-                print(f"✅ {len(games)} jogos baixados")
-                return games
-            else:
+            if response.status_code != 200:
                 print(f"❌ Erro ao baixar jogos: {response.status_code}")
-                return []
+                return False
+
+            if ijson is not None:
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, 'games.item')
+                self.bytes_downloaded += response.raw.tell()
+            else:
+                yield from json_loads(response.content).get('games', [])
+                self.bytes_downloaded += len(response.content)
+            return True
         except Exception as e:
             print(f"❌ Erro ao baixar: {e}")
-            return []
+            return False
+
+    def iter_recent_games(self, months=100, checkpoint=None, progress=None):
+        """
+        Gera os jogos dos últimos N meses, um arquivo mensal por vez
+
+        Args:
+            months (int): Número de meses
+            checkpoint (DownloadCheckpoint): se informado, cada mês concluído é
+                salvo em disco e os meses já salvos são lidos de lá, sem rede
+            progress (ProgressRenderer): recebe os arquivos mensais concluídos e os bytes baixados
+        """
+        archives = self.get_recent_archives(months)
+        if progress is not None:
+            progress.total_steps = len(archives)
+        if checkpoint is None:
+            for i, archive in enumerate(archives, 1):
+                print(f"📥 Baixando arquivo {i}/{len(archives)}...")
+                yield from self.iter_month_games(archive)
+                if progress is not None:
+                    progress.update(position=self.bytes_downloaded, steps=i)
+                time.sleep(self.request_delay)  # Rate limiting mais conservador
+            return
+
+        all_complete = True
+        for i, archive in enumerate(archives, 1):
+            if archive in checkpoint.completed:
+                yield from checkpoint.replay(archive)
+                if progress is not None:
+                    progress.update(steps=i)
+                continue
+            print(f"📥 Baixando arquivo {i}/{len(archives)}...")
+            month_games = []
+            if (yield from _collect(self.iter_month_games(archive), month_games)):
+                checkpoint.complete(archive, month_games)
+            else:
+                all_complete = False
+            if progress is not None:
+                progress.update(position=self.bytes_downloaded, steps=i)
+            time.sleep(self.request_delay)  # Rate limiting mais conservador
 
-    def download_recent_games(self, months=100):
-        """Baixa jogos dos últimos N meses"""
+        # Meses que falharam continuam pendentes para o próximo --resume
+        if all_complete and archives:
+            checkpoint.finish()
+
+    def get_recent_archives(self, months=100):
+        """Lista os arquivos mensais dos últimos N meses"""
         print(f"🔄 Baixando jogos dos últimos {months} meses para {self.username}...")
 
         archives = self.get_available_archives()
@@ -99,21 +216,16 @@ class ChessComDownloader:
         # Pegar apenas os últimos N meses
         recent_archives = archives[-months:] if len(archives) > months else archives
         print(f"📂 Processando {len(recent_archives)} arquivos mensais...")
+        return recent_archives
 
-        all_games = []
-        for i, archive in enumerate(recent_archives, 1):
-            print(f"📥 Baixando arquivo {i}/{len(recent_archives)}...")
-            games = self.download_month_games(archive)
-            all_games.extend(games)
-            time.sleep(0.5)  # Rate limiting mais conservador
-
+    def download_recent_games(self, months=100):
+        """Baixa jogos dos últimos N meses"""
+        all_games = list(self.iter_recent_games(months))
         print(f"✅ Total de jogos baixados: {len(all_games)}")
         return all_games
 
-    def convert_to_pgn(self, games):
-        """Converte jogos JSON para formato PGN"""
-        pgn_content = ""
-
+    def iter_pgn_games(self, games):
+        """Converte jogos JSON para PGN, gerando o texto de uma partida por vez"""
         for game in games:
             try:
                 # Extrair informações do jogo
@@ -130,42 +242,347 @@ class ChessComDownloader:
 
                 # Converter timestamp para data
                 end_time = game.get('end_time', 0)
-                date = datetime.fromtimestamp(end_time).strftime('%Y.%m.%d') if end_time else '????.??.??'
+                date = datetime.datetime.fromtimestamp(end_time).strftime('%Y.%m.%d') if end_time else '????.??.??'
 
                 time_control = game.get('time_control', 'unknown')
-                rules = game.get('rules', 'chess')
                 pgn_text = game.get('pgn', '')
 
+                headers = {
+                    'Event': 'Chess.com',
+                    'Site': 'Chess.com',
+                    'Date': date,
+                    'Round': '-',
+                    'White': white,
+                    'Black': black,
+                    'Result': result,
+                    'WhiteElo': white_rating,
+                    'BlackElo': black_rating,
+                    'TimeControl': time_control,
+                    'Termination': chesscom_termination(game),
+                }
+                # O PGN do Chess.com já traz o próprio bloco de cabeçalhos: os dois viram
+                # um só, com os valores do PGN original prevalecendo
+                header_end = pgn_text.find('\n\n')
+                if pgn_text.startswith('[') and header_end != -1:
+                    headers.update(PGN_HEADER_RE.findall(pgn_text[:header_end]))
+                    pgn_text = pgn_text[header_end:].lstrip('\n')
+
                 # Construir PGN
-                pgn_game = f"""[Event "Chess.com"]
-[Site "Chess.com"]
-[Date "{date}"]
-[Round "-"]
-[White "{white}"]
-[Black "{black}"]
-[Result "{result}"]
-[WhiteElo "{white_rating}"]
-[BlackElo "{black_rating}"]
-[TimeControl "{time_control}"]
-[Termination "{game.get('white', {}).get('result', 'unknown')}"]
-
-{pgn_text}
-
-"""
-                pgn_content += pgn_game
+                header_block = "\n".join(f'[{name} "{value}"]' for name, value in headers.items())
+                yield f"{header_block}\n\n{pgn_text}\n\n"
             except Exception as e:
                 print(f"⚠️ Erro ao converter jogo: {e}")
                 continue
 
-        return pgn_content
+    def write_pgn(self, games, output, chunk_size=PGN_CHUNK_SIZE):
+        """
+        Escreve os jogos em PGN no arquivo (caminho ou arquivo aberto) em blocos limitados
+
+        Returns:
+            int: número de partidas escritas
+        """
+        if isinstance(output, str):
+            with open(output, 'w', encoding='utf-8') as file:
+                return self.write_pgn(games, file, chunk_size)
+
+        buffer = []
+        buffered = 0
+        count = 0
+        for pgn_game in self.iter_pgn_games(games):
+            buffer.append(pgn_game)
+            buffered += len(pgn_game)
+            count += 1
+            if buffered >= chunk_size:
+                output.write("".join(buffer))
+                buffer = []
+                buffered = 0
+
+        if buffer:
+            output.write("".join(buffer))
+        return count
+
+    def open_pgn_stream(self, games):
+        """Abre os jogos convertidos como um arquivo de texto que o PGNAnalyzer lê sob demanda"""
+        return PGNStreamReader(self.iter_pgn_games(games))
+
+    def convert_to_pgn(self, games):
+        """Converte jogos JSON para formato PGN"""
+        return "".join(self.iter_pgn_games(games))
+
+
+def _counted(games, progress):
+    """Repassa os jogos contando cada um no progresso"""
+    for game in games:
+        progress.games += 1
+        yield game
+
+
+def _collect(generator, items):
+    """Repassa os itens de um gerador guardando-os em items; retorna o valor de retorno dele"""
+    while True:
+        try:
+            item = next(generator)
+        except StopIteration as stop:
+            return stop.value
+        items.append(item)
+        yield item
+
+
+class PGNStreamReader(io.TextIOBase):
+    """Arquivo de texto somente leitura alimentado por um gerador de trechos PGN"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _take(self, size):
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def readline(self, size=-1):
+        size = -1 if size is None else size
+        while True:
+            end = self._buffer.find("\n", self._pos)
+            available = len(self._buffer) - self._pos
+            if end != -1:
+                length = end + 1 - self._pos
+            elif 0 <= size <= available or not self._fill():
+                length = available
+            else:
+                continue
+            return self._take(length if size < 0 else min(length, size))
+
+    def read(self, size=-1):
+        """Lê até `size` caracteres (tudo se negativo), puxando do gerador só o necessário"""
+        size = -1 if size is None else size
+        parts = [self._buffer[self._pos:]]
+        available = len(parts[0])
+        while size < 0 or available < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+        data = "".join(parts)
+        # O excedente do último trecho fica para a próxima leitura
+        self._buffer = data[size:] if 0 <= size < len(data) else ""
+        self._pos = 0
+        return data if size < 0 else data[:size]
+
+
+def movetext_san(pgn_text):
+    """Lances SAN do movetext, sem números, comentários e resultado"""
+    body = pgn_text.split('\n\n', 1)[-1] if pgn_text.lstrip().startswith('[') else pgn_text
+    return MOVETEXT_NOISE_RE.sub(' ', body).split()
+
+
+def movetext_to_uci(pgn_text, max_plies=None, board=None, moves=None):
+    """
+    Converte o movetext SAN de um PGN do Chess.com em lances UCI, parando em max_plies
+
+    Com `board`, os lances são jogados nele, que termina na última posição.
+    Com `moves`, os lances vão para essa lista, que guarda os já convertidos
+    se um lance ilegal interromper a conversão.
+    """
+    board = board if board is not None else chess.Board()
+    moves = moves if moves is not None else []
+    for token in movetext_san(pgn_text):
+        if max_plies is not None and len(moves) >= max_plies:
+            break
+        moves.append(board.push_san(token).uci())
+    return moves
+
+
+class ChessComGameRecord(dict):
+    """
+    Registro de partida montado direto do JSON do Chess.com.
+
+    Cabeçalhos vêm do JSON; os campos derivados do movetext ('moves',
+    'opening', 'game_length', 'clocks', 'plies', 'final', 'white_first') só são calculados
+    quando alguém os acessa. O replay parte da posição do cabeçalho FEN, se
+    houver; um lance ilegal vai para `errors` e a partida fica com os lances
+    anteriores a ele, como no parser de PGN.
+    """
+    OPENING_PLIES = 5
+
+    def __init__(self, fields, identify_opening, errors=None):
+        super().__init__(fields)
+        self._identify_opening = identify_opening
+        self._errors = errors
+
+    def _replay(self, max_plies=None):
+        """(lances UCI, tabuleiro final, erro ou None) do movetext"""
+        board = chess.Board()
+        moves = []
+        try:
+            if dict.get(self, 'fen'):
+                board.set_fen(self['fen'])
+            movetext_to_uci(self['pgn_text'], max_plies, board, moves)
+        except ValueError as e:
+            return moves, board, e
+        return moves, board, None
+
+    def __missing__(self, key):
+        if key in ('moves', 'final'):
+            # Lances e posição final saem do mesmo replay do movetext
+            moves, board, error = self._replay()
+            self['moves'] = moves
+            if error is None:
+                self['final'] = termination.final_state(board, ply_features.material_balance(board))
+            else:
+                # A posição onde o replay parou não é a final da partida
+                self['final'] = None
+                if self._errors is not None:
+                    self._errors.record({'White': self['white'], 'Black': self['black'],
+                                         'Date': self['date']}, error)
+            return self[key]
+        elif key == 'opening':
+            if 'moves' in self:
+                opening_moves = self['moves']
+            else:
+                opening_moves, _, error = self._replay(self.OPENING_PLIES)
+                if error is not None:
+                    # O replay completo registra o erro uma vez só
+                    opening_moves = self['moves']
+            value = self._identify_opening(opening_moves)
+        elif key == 'game_length':
+            value = len(self['moves']) // 2
+        elif key == 'clocks':
+            value = clock_stats.clocks_from_movetext(self['pgn_text'])
+        elif key == 'plies':
+            value = ply_features.features_from_moves(self['moves'], dict.get(self, 'fen'))
+        elif key == 'white_first':
+            # Lado a jogar na posição de onde o replay parte
+            value = ply_features.fen_white_first(dict.get(self, 'fen'))
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def chesscom_termination(game):
+    """Código de resultado do Chess.com que diz como a partida acabou: o do perdedor, ou o das brancas no empate"""
+    white_result = game.get('white', {}).get('result', 'unknown')
+    if white_result == 'win':
+        return game.get('black', {}).get('result', 'unknown')
+    return white_result
+
+
+def chesscom_game_fields(game):
+    """Extrai os campos de análise de um jogo no formato JSON da API do Chess.com"""
+    white_info = game.get('white', {})
+    black_info = game.get('black', {})
+    pgn_text = game.get('pgn', '')
+
+    result = "1/2-1/2"
+    if white_info.get('result') == 'win':
+        result = "1-0"
+    elif black_info.get('result') == 'win':
+        result = "0-1"
+    termination = chesscom_termination(game)
+
+    end_time = int(game.get('end_time', 0) or 0)
+    headers = dict(PGN_HEADER_RE.findall(pgn_text[:pgn_text.find('\n\n')]))
+    start_time, _ = temporal_stats.header_timestamps(headers)
+    time_control = game.get('time_control', 'Unknown')
+
+    return {
+        'white': white_info.get('username', 'Unknown').lower(),
+        'black': black_info.get('username', 'Unknown').lower(),
+        'result': result,
+        'white_elo': int(white_info.get('rating', 0) or 0),
+        'black_elo': int(black_info.get('rating', 0) or 0),
+        'eco': headers.get('ECO', ''),
+        # Mesma data do caminho PGN (cabeçalho Date); sem ele, a do fim da partida
+        'date': headers.get('Date') or (datetime.datetime.fromtimestamp(end_time).strftime('%Y.%m.%d')
+                                        if end_time else '????.??.??'),
+        'start_time': start_time,
+        'end_time': end_time if end_time else float('nan'),
+        'termination': termination,
+        'time_control': time_control,
+        **time_control_fields(time_control),
+        'pgn_text': pgn_text,
+        'link': game_link(headers) or game.get('url', ''),
+        # Partidas "a partir da posição": o replay começa no FEN do cabeçalho
+        **({'fen': headers['FEN']} if headers.get('FEN') else {}),
+    }
+
+
+def chesscom_game_key(game, record):
+    """Chave de deduplicação de um jogo JSON: a mesma de record_key no PGN com [Link], ou uuid + end_time"""
+    if record.get('link'):
+        return record_key(record)
+    if game.get('uuid'):
+        return identity_key(f"{game['uuid']}\x1f{game.get('end_time', '')}")
+    return record_key(record)
 
 
 class PGNAnalyzer:
-    def __init__(self, pgn_content, player_name):
+    RATING_RANGES = {
+        'Under 1200': (0, 1199),
+        '1200-1399': (1200, 1399),
+        '1400-1599': (1400, 1599),
+        '1600-1799': (1600, 1799),
+        '1800-1999': (1800, 1999),
+        '2000+': (2000, 9999)
+    }
+
+    def __init__(self, pgn_content, player_name, parse=True, dedup=True):
+        # pgn_content pode ser uma string ou um arquivo aberto em modo texto
         self.pgn_content = pgn_content
         self.player_name = player_name.lower()
         self.games = []
-        self.parse_pgn()
+        self.parse_errors = ParseErrorLog()
+        # dedup: True (set de hashes), False, ou um GameDeduplicator (ex.: com Bloom filter)
+        self.dedup = dedup if isinstance(dedup, GameDeduplicator) else GameDeduplicator() if dedup else None
+        self.category_index = CategoryIndex()
+        self._ply_table = None
+        self._similar_index = None
+        if parse:
+            self.parse_pgn()
+
+    @classmethod
+    def from_chesscom_games(cls, games, player_name, dedup=True):
+        """Cria o analisador direto dos jogos JSON do Chess.com, sem passar por PGN"""
+        analyzer = cls("", player_name, parse=False, dedup=dedup)
+        for game in games:
+            # Chess960 e outras variantes não são replays válidos de xadrez normal
+            if game.get('rules', 'chess') != 'chess':
+                continue
+            try:
+                fields = chesscom_game_fields(game)
+                if analyzer.player_name not in fields['white'] and analyzer.player_name not in fields['black']:
+                    continue
+                record = ChessComGameRecord(fields, analyzer.identify_opening, analyzer.parse_errors)
+                # Meses repetidos entre arquivos: a chave vem da URL (ou uuid) da partida, sem
+                # converter os lances; só jogos sem identificador caem na chave pelos lances
+                if analyzer.dedup is not None and analyzer.dedup.is_duplicate(chesscom_game_key(game, record)):
+                    continue
+                analyzer.games.append(record)
+            except Exception as e:
+                print(f"⚠️ Erro ao converter jogo: {e}")
+        if analyzer.dedup is not None:
+            analyzer.dedup.print_summary()
+        return analyzer
 
     def identify_opening(self, moves):
         """Identifica a abertura pelos primeiros lances"""
@@ -303,55 +720,79 @@ class PGNAnalyzer:
 
     def parse_pgn(self):
         """Parse o conteúdo PGN e extrai informações das partidas"""
-        pgn_io = io.StringIO(self.pgn_content)
+        self.games.extend(self.iter_games())
 
-        while True:
+    def iter_games(self):
+        """Gera as partidas do jogador uma a uma, sem acumular em memória"""
+        # Partidas com erro vão para self.parse_errors; o parse segue na próxima partida
+        # As features de cada meio-lance saem do mesmo replay do parser
+        for game in iter_parsed_games(self.pgn_content, self.parse_errors, visitor=ply_features.PlyFeatureBuilder):
             try:
-                game = chess.pgn.read_game(pgn_io)
-                if game is None:
-                    break
-
-                white = game.headers.get("White", "").lower()
-                black = game.headers.get("Black", "").lower()
-                result = game.headers.get("Result", "")
-                white_elo = game.headers.get("WhiteElo", "0")
-                black_elo = game.headers.get("BlackElo", "0")
-                eco = game.headers.get("ECO", "")
-                date = game.headers.get("Date", "")
-
-                # Converter moves para lista
-                moves = []
-                node = game
-                while node.variations:
-                    next_node = node.variation(0)
-                    if next_node.move:
-                        moves.append(next_node.move.uci())
-                    node = next_node
-
-                opening = self.identify_opening(moves)
-
-                game_info = {
-                    'white': white,
-                    'black': black,
-                    'result': result,
-                    'white_elo': int(white_elo) if white_elo.isdigit() else 0,
-                    'black_elo': int(black_elo) if black_elo.isdigit() else 0,
-                    'opening': opening,
-                    'eco': eco,
-                    'moves': moves,
-                    'date': date,
-                    'game_length': len(moves) // 2,
-                    'termination': game.headers.get("Termination", "Normal"),
-                    'time_control': game.headers.get("TimeControl", "Unknown"),
-                    'pgn_text': str(game)
-                }
-
-                if self.player_name in white or self.player_name in black:
-                    self.games.append(game_info)
-
+                game_info = self.game_to_record(game)
             except Exception as e:
-                print(f"Erro ao processar partida: {e}")
+                self.parse_errors.record(game.headers, e)
                 continue
+            if game_info is not None and not self.is_duplicate(game_info):
+                yield game_info
+
+        self.parse_errors.print_summary()
+        if self.dedup is not None:
+            self.dedup.print_summary()
+
+    def is_duplicate(self, record):
+        """Diz se a partida já apareceu antes (mesmos jogadores, resultado, data e lances)"""
+        return self.dedup is not None and self.dedup.is_duplicate(record_key(record))
+
+    def game_to_record(self, game):
+        """Extrai o registro de análise de uma partida python-chess (None se o jogador não participou)"""
+        white = game.headers.get("White", "").lower()
+        black = game.headers.get("Black", "").lower()
+        if self.player_name not in white and self.player_name not in black:
+            return None
+
+        result = game.headers.get("Result", "")
+        white_elo = game.headers.get("WhiteElo", "0")
+        black_elo = game.headers.get("BlackElo", "0")
+        eco = game.headers.get("ECO", "")
+        date = game.headers.get("Date", "")
+
+        # Converter moves para lista
+        moves = []
+        node = game
+        while node.variations:
+            next_node = node.variation(0)
+            if next_node.move:
+                moves.append(next_node.move.uci())
+            node = next_node
+
+        opening = self.identify_opening(moves)
+        start_time, end_time = temporal_stats.header_timestamps(game.headers)
+        time_control = game.headers.get("TimeControl", "Unknown")
+
+        return {
+            'white': white,
+            'black': black,
+            'result': result,
+            'white_elo': int(white_elo) if white_elo.isdigit() else 0,
+            'black_elo': int(black_elo) if black_elo.isdigit() else 0,
+            'opening': opening,
+            'eco': eco,
+            'moves': moves,
+            'date': date,
+            'start_time': start_time,
+            'end_time': end_time,
+            'game_length': len(moves) // 2,
+            'termination': game.headers.get("Termination", "Normal"),
+            'time_control': time_control,
+            **time_control_fields(time_control),
+            'clocks': clock_stats.extract_clocks(game),
+            'pgn_text': str(game),
+            'link': game_link(game.headers),
+            **({'plies': game.plies} if hasattr(game, 'plies') else {}),
+            **({'final': game.final} if hasattr(game, 'final') else {}),
+            **({'white_first': game.white_first} if hasattr(game, 'white_first') else {}),
+            **({'fen': game.headers['FEN']} if game.headers.get('FEN') else {}),
+        }
 
     def is_player_white(self, game):
         return self.player_name in game['white']
@@ -454,235 +895,136 @@ class PGNAnalyzer:
 
         return white_win_rates, black_win_rates
 
-    def analyze_performance_vs_rating(self):
-        rating_ranges = {
-            'Under 1200': (0, 1199),
-            '1200-1399': (1200, 1399),
-            '1400-1599': (1400, 1599),
-            '1600-1799': (1600, 1799),
-            '1800-1999': (1800, 1999),
-            '2000+': (2000, 9999)
-        }
-
-        performance = {}
-
-        for range_name, (min_rating, max_rating) in rating_ranges.items():
-            wins = losses = draws = 0
-
-            for game in self.games:
-                is_white = self.is_player_white(game)
-                opponent_rating = game['black_elo'] if is_white else game['white_elo']
-
-                if min_rating <= opponent_rating <= max_rating:
-                    if self.did_player_win(game):
-                        wins += 1
-                    elif self.did_player_lose(game):
-                        losses += 1
-                    elif self.is_draw(game):
-                        draws += 1
-
-            total = wins + losses + draws
-            if total > 0:
-                win_rate = (wins / total) * 100
-                performance[range_name] = {
-                    'wins': wins, 'losses': losses, 'draws': draws,
-                    'total': total, 'win_rate': win_rate
-                }
+    def ply_table(self):
+        """Tabela de meio-lances de todas as partidas, montada uma vez e compartilhada pelas análises"""
+        if self._ply_table is None or self._ply_table.game_count != len(self.games):
+            self._ply_table = ply_features.PlyTable.from_games(self.games)
+        return self._ply_table
+
+    def similar_index(self):
+        """Índice MinHash/LSH das partidas (números = posição em self.games), estendido quando entram partidas"""
+        if self._similar_index is None:
+            self._similar_index = similar_games.LSHIndex()
+        index = self._similar_index
+        if len(index) < len(self.games):
+            index.add_games(self.games[len(index):])
+        return index
+
+    def find_similar_games(self, game_index, k=10):
+        """Partidas mais parecidas com self.games[game_index]: lista de (posição, similaridade)"""
+        index = self.similar_index()
+        return index.query(index.signatures[game_index], k, exclude=game_index)
+
+    def search_patterns(self, patterns):
+        """Partidas e meio-lance em que cada padrão de lances casou (ver move_patterns.parse_pattern)"""
+        return move_patterns.PatternAutomaton(patterns).search(self.games, self.player_name, self.ply_table())
+
+    def analyze_timelines(self):
+        """Viradas, derrotas com vantagem e fases das partidas (ver timelines.timeline_summary)"""
+        return timelines.timeline_summary(self.games, self.player_name, self.ply_table())
+
+    def build_opening_book(self, path, plies=30, player_only=True):
+        """Grava o repertório do jogador como livro Polyglot (ver opening_book.build_book)"""
+        return opening_book.build_book(self.games, self.player_name, path, plies, player_only)
+
+    def find_puzzles(self, processes=None, losses_only=False):
+        """Posições das partidas do jogador com mate ou ganho material decisivo (ver puzzle_miner.mine_puzzles)"""
+        return puzzle_miner.mine_puzzles(self.games, self.player_name, processes, losses_only)
+
+    def games_in_category(self, category):
+        """Partidas de uma categoria de tempo (bullet, blitz, rapid, classical, daily, unknown)"""
+        return [self.games[i] for i in self.category_index.update(self.games).ids(category)]
+
+    def analyze_time_control_performance(self):
+        return category_performance(self.games, self.player_name, self.category_index)
 
-        return performance
+    def analyze_performance_vs_rating(self):
+        return elo_stats.EloEngine.from_games(self.games, self.player_name).rating_ranges(self.RATING_RANGES)
 
-    def get_top_defeated_opponents(self):
-        defeated_opponents = []
+    def defeated_opponent_entry(self, game):
+        """Dados do oponente derrotado nesta partida (None se o jogador não venceu)"""
+        if not self.did_player_win(game):
+            return None
 
-        for game in self.games:
-            date_str = game.get('date', '')
-            year = 'N/A'
-            if date_str and '.' in date_str:
-                try:
-                    year = date_str.split('.')[0]
-                except:
-                    year = 'N/A'
+        date_str = game.get('date', '')
+        year = 'N/A'
+        if date_str and '.' in date_str:
+            year = date_str.split('.')[0]
 
-            if self.did_player_win(game):
-                is_white = self.is_player_white(game)
-                if is_white and game['black_elo'] > 0:
-                    defeated_opponents.append({
-                        'opponent': game['black'],
-                        'rating': game['black_elo'],
-                        'color': 'black',
-                        'opening': game['opening'],
-                        'year': year
-                    })
-                elif not is_white and game['white_elo'] > 0:
-                    defeated_opponents.append({
-                        'opponent': game['white'],
-                        'rating': game['white_elo'],
-                        'color': 'white',
-                        'opening': game['opening'],
-                        'year': year
-                    })
+        is_white = self.is_player_white(game)
+        if is_white and game['black_elo'] > 0:
+            return {
+                'opponent': game['black'],
+                'rating': game['black_elo'],
+                'color': 'black',
+                'opening': game['opening'],
+                'year': year
+            }
+        elif not is_white and game['white_elo'] > 0:
+            return {
+                'opponent': game['white'],
+                'rating': game['white_elo'],
+                'color': 'white',
+                'opening': game['opening'],
+                'year': year
+            }
+        return None
 
+    def get_top_defeated_opponents(self):
+        defeated_opponents = [entry for entry in map(self.defeated_opponent_entry, self.games) if entry]
         defeated_opponents.sort(key=lambda x: x['rating'], reverse=True)
         return defeated_opponents[:20]
 
-    def generate_report(self):
-        """Gera relatório completo da análise"""
-        print("=" * 80)
-        print(f"📊 RELATÓRIO COMPLETO DE ANÁLISE - {self.player_name.upper()}")
-        print("=" * 80)
-        print(f"Total de partidas analisadas: {len(self.games)}")
-        print()
-
-        # 1. Estatísticas básicas
-        wins = losses = draws = 0
-        for game in self.games:
-            if self.did_player_win(game):
-                wins += 1
-            elif self.did_player_lose(game):
-                losses += 1
-            elif self.is_draw(game):
-                draws += 1
-
-        total_decided = wins + losses + draws
-        if total_decided > 0:
-            print("📈 ESTATÍSTICAS GERAIS:")
-            print(f"• Vitórias: {wins} ({wins / total_decided * 100:.1f}%)")
-            print(f"• Derrotas: {losses} ({losses / total_decided * 100:.1f}%)")
-            print(f"• Empates: {draws} ({draws / total_decided * 100:.1f}%)")
-            print(f"• Win Rate: {wins / total_decided * 100:.1f}%")
-            print()
-
-        # 2. Performance vs Rating
-        perf_vs_rating = self.analyze_performance_vs_rating()
-        print("🎯 PERFORMANCE VS RATING DOS OPONENTES:")
-        for rating_range, stats in perf_vs_rating.items():
-            print(f"• {rating_range}: {stats['wins']}/{stats['total']} "
-                  f"({stats['win_rate']:.1f}% win rate)")
-        print()
-
-        # 3. Aberturas mais jogadas
-        white_openings, black_openings = self.get_opening_stats()
-
-        print("🔸 TOP 5 ABERTURAS MAIS JOGADAS DE BRANCAS:")
-        for i, (opening, count) in enumerate(white_openings.most_common(5), 1):
-            print(f"{i}. {opening}: {count} partidas")
-        print()
-
-        print("🔹 TOP 5 ABERTURAS MAIS JOGADAS DE PRETAS:")
-        for i, (opening, count) in enumerate(black_openings.most_common(5), 1):
-            print(f"{i}. {opening}: {count} partidas")
-        print()
-
-        # 4. Aberturas que mais ganharam
-        white_wins, black_wins = self.get_winning_openings()
-
-        print("🏆 TOP 3 ABERTURAS QUE MAIS GANHARAM DE BRANCAS:")
-        for opening, wins_count in sorted(white_wins.items(), key=lambda x: x[1], reverse=True)[:3]:
-            print(f"• {opening}: {wins_count} vitórias")
-        print()
-
-        print("🏆 TOP 3 ABERTURAS QUE MAIS GANHARAM DE PRETAS:")
-        for opening, wins_count in sorted(black_wins.items(), key=lambda x: x[1], reverse=True)[:3]:
-            print(f"• {opening}: {wins_count} vitórias")
-        print()
-
-        # 5. NOVA SEÇÃO: Aberturas que mais perdeu
-        white_losses, black_losses = self.get_losing_openings()
-
-        print("💔 TOP 3 ABERTURAS QUE MAIS PERDEU DE BRANCAS:")
-        if white_losses:
-            for opening, loss_count in sorted(white_losses.items(), key=lambda x: x[1], reverse=True)[:3]:
-                print(f"• {opening}: {loss_count} derrotas")
-        else:
-            print("• Nenhuma derrota significativa encontrada")
-        print()
-
-        print("💔 TOP 3 ABERTURAS QUE MAIS PERDEU DE PRETAS:")
-        if black_losses:
-            for opening, loss_count in sorted(black_losses.items(), key=lambda x: x[1], reverse=True)[:3]:
-                print(f"• {opening}: {loss_count} derrotas")
-        else:
-            print("• Nenhuma derrota significativa encontrada")
-        print()
-
-        # 6. NOVA SEÇÃO: Win rate por abertura
-        white_rates, black_rates = self.get_opening_win_rates()
-
-        print("📊 MELHORES WIN RATES DE BRANCAS (min 3 jogos):")
-        if white_rates:
-            sorted_rates = sorted(white_rates.items(), key=lambda x: x[1]['win_rate'], reverse=True)[:5]
-            for opening, stats in sorted_rates:
-                print(f"• {opening}: {stats['win_rate']:.1f}% ({stats['wins']}/{stats['total_games']})")
-        print()
-
-        print("📊 MELHORES WIN RATES DE PRETAS (min 3 jogos):")
-        if black_rates:
-            sorted_rates = sorted(black_rates.items(), key=lambda x: x[1]['win_rate'], reverse=True)[:5]
-            for opening, stats in sorted_rates:
-                print(f"• {opening}: {stats['win_rate']:.1f}% ({stats['wins']}/{stats['total_games']})")
-        print()
-
-        print("📉 PIORES WIN RATES DE BRANCAS (min 3 jogos):")
-        if white_rates:
-            sorted_rates = sorted(white_rates.items(), key=lambda x: x[1]['win_rate'])[:5]
-            for opening, stats in sorted_rates:
-                print(f"• {opening}: {stats['win_rate']:.1f}% ({stats['wins']}/{stats['total_games']})")
-        print()
-
-        print("📉 PIORES WIN RATES DE PRETAS (min 3 jogos):")
-        if black_rates:
-            sorted_rates = sorted(black_rates.items(), key=lambda x: x[1]['win_rate'])[:5]
-            for opening, stats in sorted_rates:
-                print(f"• {opening}: {stats['win_rate']:.1f}% ({stats['wins']}/{stats['total_games']})")
-        print()
+    def build_report(self):
+        """Calcula o modelo imutável do relatório, reaproveitável por todos os formatos"""
+        return report.build_report(self)
 
-        # 7. Top oponentes derrotados
-        top_defeated = self.get_top_defeated_opponents()
-        print("👑 TOP 10 MAIORES RATINGS DERROTADOS:")
-        for i, opponent in enumerate(top_defeated[:10], 1):
-            year_info = f"({opponent['year']}) - " if opponent['year'] != 'N/A' else ""
-            print(f"{i:2d}. {opponent['opponent']} - {opponent['rating']} {year_info}{opponent['opening']}")
-        print()
+    def generate_report(self, fmt='text'):
+        """Gera relatório completo da análise"""
+        print(report.render_report(self.build_report(), fmt), end='')
 
-        print("=" * 80)
-        print("📝 RELATÓRIO COMPLETO FINALIZADO!")
-        print("=" * 80)
+    def save_reports(self, output_prefix, formats=('text', 'markdown', 'html', 'json')):
+        """Grava o relatório em vários formatos a partir de uma única análise"""
+        paths = report.write_reports(self.build_report(), output_prefix, formats)
+        for path in paths:
+            print(f"📝 Relatório salvo: {path}")
+        return paths
 
 
-def analyze_player_from_chesscom(username, months=100):
+def analyze_player_from_chesscom(username, months=100, resume=False, via_pgn=False):
     """
     Baixa e analisa partidas de um jogador do Chess.com
 
     Args:
         username (str): Nome de usuário do Chess.com
         months (int): Número de meses para baixar (padrão: 6)
+        resume (bool): Continua um download interrompido do último checkpoint
+        via_pgn (bool): Converte os jogos para PGN e usa o parser completo do python-chess
     """
     print(f"🚀 Iniciando análise completa do jogador: {username}")
     print(f"📥 Baixando partidas dos últimos {months} meses...")
     print("-" * 60)
 
-    # 1. Baixar partidas
+    # 1. Baixar e analisar direto do JSON (sem converter para PGN)
     downloader = ChessComDownloader(username)
-    games = downloader.download_recent_games(months)
-
-    if not games:
-        print("❌ Nenhuma partida encontrada!")
-        return None
-
-    # 2. Converter para PGN
-    print("🔄 Convertendo para formato PGN...")
-    pgn_content = downloader.convert_to_pgn(games)
-
-    # 3. Analisar
-    print("📊 Analisando partidas...")
-    analyzer = PGNAnalyzer(pgn_content, username)
+    checkpoint = DownloadCheckpoint(username, resume)
+    with matrix_effect.ProgressRenderer(f"Baixando partidas de {username}") as progress:
+        games = _counted(downloader.iter_recent_games(months, checkpoint, progress), progress)
+        if via_pgn:
+            # Conversão e parse em streaming: o PGN convertido nunca fica inteiro em memória
+            analyzer = PGNAnalyzer(downloader.open_pgn_stream(games), username)
+        else:
+            analyzer = PGNAnalyzer.from_chesscom_games(games, username)
 
     if not analyzer.games:
-        print("❌ Nenhuma partida válida encontrada!")
+        print("❌ Nenhuma partida encontrada!")
         return None
 
-    # 4. Gerar relatório
+    # 2. Gerar relatório
     analyzer.generate_report()
+    if not via_pgn:
+        # Os lances só são convertidos durante o relatório: os erros aparecem depois dele
+        analyzer.parse_errors.print_summary()
 
     return analyzer
 
@@ -696,10 +1038,9 @@ def analyze_from_pgn_file(pgn_file_path, player_name):
         player_name (str): Nome do jogador para filtrar
     """
     try:
-        with open(pgn_file_path, 'r', encoding='utf-8') as file:
-            pgn_content = file.read()
-
-        analyzer = PGNAnalyzer(pgn_content, player_name)
+        # Aceita .pgn ou .pgn.gz/.bz2/.xz/.zst, lido em streaming
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
         analyzer.generate_report()
         return analyzer
 
@@ -709,13 +1050,153 @@ def analyze_from_pgn_file(pgn_file_path, player_name):
         print(f"❌ Erro durante análise: {e}")
 
 
+def analyze_large_pgn_file(pgn_file_path, player_name, resume=False, fmt='text',
+                           checkpoint_interval=CHECKPOINT_INTERVAL, batch_size=1000):
+    """
+    Analisa um PGN grande guardando só os agregados, com checkpoints periódicos
+
+    Args:
+        pgn_file_path (str): Caminho para o arquivo PGN (comprimido ou não)
+        player_name (str): Nome do jogador para filtrar
+        resume (bool): Continua do último checkpoint (offset + agregados parciais)
+        fmt (str): Formato do relatório impresso
+        checkpoint_interval (float): Segundos entre checkpoints
+        batch_size (int): Partidas acumuladas antes de somar aos agregados
+
+    Returns:
+        ReportModel: modelo do relatório, ou None se a análise foi interrompida
+    """
+    analyzer = PGNAnalyzer("", player_name, parse=False)
+    errors = analyzer.parse_errors
+    checkpoint = ParseCheckpoint(pgn_file_path, player_name)
+    state = checkpoint.load() if resume else None
+
+    if state:
+        aggregates = state['aggregates']
+        aggregates.analyzer = analyzer
+        analyzer.dedup = state.get('dedup') or analyzer.dedup
+        similar = state.get('similar') or similar_games.LSHIndex()
+        offset, game_number = state['offset'], state['game_number']
+        print(f"♻️ Retomando do byte {offset} (partida #{game_number}, "
+              f"{aggregates.total_games} partidas do jogador já agregadas)")
+    else:
+        aggregates = report.ReportAggregates(analyzer)
+        similar = similar_games.LSHIndex()
+        offset, game_number = 0, 0
+
+    # Assinaturas de similaridade calculadas junto com os agregados, lote a lote
+    batch, numbers = [], []
+    chunk_offset = offset
+    last_save = time.monotonic()
+    try:
+        # Arquivos comprimidos não têm o tamanho descomprimido conhecido: o progresso fica sem ETA
+        total_bytes = os.path.getsize(pgn_file_path) if detect_compression(pgn_file_path) is None else None
+        # A thread de descompressão não permite seek; ao retomar, lê sem ela
+        with open_pgn(pgn_file_path, threaded=offset == 0) as file, \
+                matrix_effect.ProgressRenderer(os.path.basename(pgn_file_path), total_bytes) as progress:
+            progress.update(game_number, offset)
+            for game in iter_parsed_games(file, errors, offset, game_number, ply_features.PlyFeatureBuilder):
+                progress.update(errors.game_number, errors.offset)
+                # Primeira partida de um novo trecho: tudo antes dele já foi processado
+                if errors.offset != chunk_offset:
+                    chunk_offset = errors.offset
+                    if time.monotonic() - last_save >= checkpoint_interval:
+                        aggregates.add_games(batch)
+                        similar.add_games(batch, numbers)
+                        batch, numbers = [], []
+                        checkpoint.save(chunk_offset, errors.game_number, aggregates, analyzer.dedup, similar)
+                        last_save = time.monotonic()
+
+                try:
+                    record = analyzer.game_to_record(game)
+                except Exception as e:
+                    errors.record(game.headers, e)
+                    continue
+                if record is not None and not analyzer.is_duplicate(record):
+                    batch.append(record)
+                    numbers.append(errors.game_number)
+                    if len(batch) >= batch_size:
+                        aggregates.add_games(batch)
+                        similar.add_games(batch, numbers)
+                        batch, numbers = [], []
+            aggregates.add_games(batch)
+            similar.add_games(batch, numbers)
+            progress.update(position=total_bytes)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return None
+    except KeyboardInterrupt:
+        print("\n⏸️ Análise interrompida - use --resume para continuar do último checkpoint")
+        return None
+
+    errors.print_summary()
+    if analyzer.dedup is not None:
+        analyzer.dedup.print_summary()
+    checkpoint.finish()
+    model = aggregates.to_model()
+    rendered = report.render_report(model, fmt)
+    print(rendered, end='')
+    # A próxima execução sobre o mesmo arquivo imprime direto do cache
+    ReportCache(pgn_file_path, player_name, fmt).save(rendered)
+    similar.save(pgn_file_path, player_name)
+    return model
+
+
+USAGE = """Uso:
+  python stenio.py [usuario] [meses] [--resume] [--via-pgn]
+                                                      baixa e analisa as partidas do Chess.com
+  python stenio.py --pgn <arquivo.pgn> [jogador] [--resume]
+                                                      analisa um PGN (também .gz/.bz2/.xz/.zst)
+  python stenio.py --watch <arquivo.pgn> [jogador]    acompanha um PGN que cresce
+  python stenio.py --scout <usuario> [usuario ...]    perfil dos adversários (veja python scout.py)
+  python stenio.py --help                             mostra esta ajuda
+
+--resume continua um download ou parse interrompido do último checkpoint.
+--via-pgn converte os jogos baixados para PGN em streaming e os analisa com o
+parser completo do python-chess (em vez de montar os registros direto do JSON).
+Relatórios de --pgn ficam em cache até o arquivo mudar.
+--pgn também grava <arquivo>.<jogador>.lsh.npz, o índice de partidas parecidas
+consultado por: python similar_games.py <arquivo.pgn> <jogador> <número da partida>"""
+
+
 # Execução principal
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) > 1:
-        username = sys.argv[1]
-        months = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    if '--help' in sys.argv or '-h' in sys.argv:
+        print(USAGE)
+        sys.exit(0)
+
+    # Modo watch: python stenio.py --watch <arquivo.pgn> [jogador]
+    if len(sys.argv) > 2 and sys.argv[1] == '--watch':
+        from watch import watch_pgn_file
+        watch_pgn_file(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "juniorsatanas")
+        sys.exit(0)
+
+    # Preparação contra adversários: python stenio.py --scout <usuario> [usuario ...] [opções]
+    if len(sys.argv) > 2 and sys.argv[1] == '--scout':
+        from scout import main as scout_main
+        scout_main(sys.argv[2:])
+        sys.exit(0)
+
+    # --resume continua o download ou o parse do último checkpoint
+    resume = '--resume' in sys.argv
+    via_pgn = '--via-pgn' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--resume', '--via-pgn')]
+
+    # Arquivo grande: python stenio.py --pgn <arquivo.pgn> [jogador] [--resume]
+    if len(args) > 1 and args[0] == '--pgn':
+        player = args[2] if len(args) > 2 else "juniorsatanas"
+        cached = None if resume or not os.path.exists(args[1]) else ReportCache(args[1], player).load()
+        if cached is not None:
+            print(cached, end='')
+        else:
+            analyze_large_pgn_file(args[1], player, resume)
+        sys.exit(0)
+
+    if args:
+        username = args[0]
+        months = int(args[1]) if len(args) > 1 else 100
     else:
         username = "juniorsatanas"  # Padrão
         months = 100
@@ -728,7 +1209,7 @@ if __name__ == "__main__":
 
     # Tentar download automático primeiro
     print("🤖 TENTANDO DOWNLOAD AUTOMÁTICO...")
-    analyzer = analyze_player_from_chesscom(username, months)
+    analyzer = analyze_player_from_chesscom(username, months, resume, via_pgn)
 
     if not analyzer:
         print("\n" + "=" * 60)
@@ -750,8 +1231,6 @@ if __name__ == "__main__":
         print("=" * 60)
 
         # Tentar com arquivo local se existir
-        import os
-
         possible_files = [f'{username}.pgn', 'games.pgn', f'{username}_games.pgn']
 
         for filename in possible_files:
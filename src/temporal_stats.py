@@ -0,0 +1,239 @@
+import calendar
+import math
+import time
+
+import numpy as np
+
+from time_control import CATEGORIES, CATEGORY_INDEX, record_category
+
+WEEKDAYS = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+
+
+def _to_epoch(date_str, time_str):
+    """Converte 'AAAA.MM.DD' + 'HH:MM:SS' (UTC) em segundos desde a época; NaN se incompleto"""
+    if not date_str or not time_str or '?' in date_str or '?' in time_str:
+        return math.nan
+    try:
+        return float(calendar.timegm(time.strptime(f"{date_str} {time_str}", "%Y.%m.%d %H:%M:%S")))
+    except ValueError:
+        return math.nan
+
+
+def header_timestamps(headers):
+    """
+    Lê início e fim da partida dos cabeçalhos UTCDate/UTCTime, Date/StartTime e EndDate/EndTime
+
+    Returns:
+        tuple: (início, fim) em segundos desde a época (UTC), NaN quando ausentes
+    """
+    start_date = headers.get("UTCDate") or headers.get("Date", "")
+    start_clock = headers.get("UTCTime") or headers.get("StartTime", "")
+    start = _to_epoch(start_date, start_clock)
+
+    end = _to_epoch(headers.get("EndDate") or start_date, headers.get("EndTime", ""))
+    if end < start:
+        # EndTime sem EndDate depois da meia-noite
+        end += 86400
+    return start, end
+
+
+class TemporalCube:
+    """
+    Cubo de desempenho hora do dia × dia da semana × categoria de tempo.
+
+    Cada contador é um array (24, 7, len(CATEGORIES)) montado com np.bincount,
+    então qualquer recorte é só uma soma sobre eixos.
+    """
+
+    def __init__(self, games, player_name, utc_offset_hours=0):
+        player_name = player_name.lower()
+        start = np.array([g.get('start_time', math.nan) for g in games], dtype=np.float64)
+        valid = np.isfinite(start)
+        games = [g for g, ok in zip(games, valid) if ok]
+        local = start[valid].astype(np.int64) + int(utc_offset_hours * 3600)
+
+        hour = (local // 3600) % 24
+        # 1970-01-01 foi quinta-feira (weekday 3)
+        weekday = (local // 86400 + 3) % 7
+        category = np.array([CATEGORY_INDEX[record_category(g)] for g in games],
+                            dtype=np.int64)
+
+        is_white = np.array([player_name in g['white'] for g in games], dtype=bool)
+        result = np.array([g['result'] for g in games], dtype=str)
+        won = np.where(is_white, result == '1-0', result == '0-1')
+        lost = np.where(is_white, result == '0-1', result == '1-0')
+        drawn = result == '1/2-1/2'
+
+        self.shape = (24, 7, len(CATEGORIES))
+        cell = np.ravel_multi_index((hour, weekday, category), self.shape)
+        size = int(np.prod(self.shape))
+        self.games = np.bincount(cell, minlength=size).reshape(self.shape)
+        self.wins = np.bincount(cell[won], minlength=size).reshape(self.shape)
+        self.losses = np.bincount(cell[lost], minlength=size).reshape(self.shape)
+        self.draws = np.bincount(cell[drawn], minlength=size).reshape(self.shape)
+
+    def merge(self, other):
+        """Soma outro cubo (ex.: de partidas novas) a este, no lugar"""
+        self.games += other.games
+        self.wins += other.wins
+        self.losses += other.losses
+        self.draws += other.draws
+        return self
+
+    def select(self, categories=None):
+        """Restringe o cubo a algumas categorias de tempo (ex.: ['blitz'])"""
+        if categories is None:
+            return slice(None)
+        return [CATEGORY_INDEX[c] for c in categories]
+
+    def score_rate(self, axis, categories=None):
+        """Pontuação percentual (vitória=1, empate=0.5) marginalizada no eixo pedido"""
+        cats = self.select(categories)
+        other = tuple(a for a in range(3) if a != axis)
+        games = self.games[:, :, cats].sum(axis=other)
+        points = (self.wins[:, :, cats] + 0.5 * self.draws[:, :, cats]).sum(axis=other)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return games, np.where(games > 0, points / games * 100, np.nan)
+
+    def by_hour(self, categories=None):
+        return self.score_rate(0, categories)
+
+    def by_weekday(self, categories=None):
+        return self.score_rate(1, categories)
+
+    def by_category(self):
+        return self.score_rate(2)
+
+    def worst_slots(self, min_games=10, top=5):
+        """Combinações (hora, dia, categoria) com pior pontuação e ao menos min_games partidas"""
+        points = self.wins + 0.5 * self.draws
+        cells = np.argwhere(self.games >= min_games)
+        rates = points[tuple(cells.T)] / self.games[tuple(cells.T)] * 100
+        order = np.argsort(rates)[:top]
+        return [
+            {'hour': int(h), 'weekday': WEEKDAYS[d], 'category': CATEGORIES[c],
+             'games': int(self.games[h, d, c]), 'score': float(rates[i])}
+            for i, (h, d, c) in zip(order, cells[order])
+        ]
+
+
+def duration_samples(games, player_name):
+    """Durações válidas (segundos) com a cor do jogador e a categoria de tempo de cada partida"""
+    player_name = player_name.lower()
+    start = np.array([g.get('start_time', math.nan) for g in games], dtype=np.float64)
+    end = np.array([g.get('end_time', math.nan) for g in games], dtype=np.float64)
+    duration = end - start
+    valid = np.isfinite(duration) & (duration >= 0)
+
+    is_white = np.array([player_name in g['white'] for g in games], dtype=bool)
+    category = np.array([CATEGORY_INDEX[record_category(g)] for g in games],
+                        dtype=np.int8)
+    return duration[valid].astype(np.float32), is_white[valid], category[valid]
+
+
+def summarize_durations(duration, is_white, category):
+    """Média, mediana, mínimo e máximo das durações por cor e por categoria de tempo"""
+    if duration.size == 0:
+        return {}
+
+    def summarize(mask):
+        values = duration[mask]
+        if values.size == 0:
+            return {}
+        return {'games': int(values.size), 'avg': float(values.mean()), 'median': float(np.median(values)),
+                'min': float(values.min()), 'max': float(values.max())}
+
+    return {
+        'white': summarize(is_white),
+        'black': summarize(~is_white),
+        'by_category': {name: s for i, name in enumerate(CATEGORIES) if (s := summarize(category == i))},
+    }
+
+
+def analyze_duration_stats(games, player_name):
+    """Duração real (segundos) das partidas por cor e por categoria de tempo"""
+    return summarize_durations(*duration_samples(games, player_name))
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def temporal_summary(games, player_name, utc_offset_hours=0, min_games=10):
+    """Resumo serializável da duração real e do desempenho por horário"""
+    return summarize_temporal(TemporalCube(games, player_name, utc_offset_hours),
+                              analyze_duration_stats(games, player_name), min_games)
+
+
+def summarize_temporal(cube, durations, min_games=10):
+    """
+    Monta o resumo temporal a partir de um cubo e das estatísticas de duração já calculados
+
+    Cada parte sai sozinha: partidas só com horário de início (sem EndTime)
+    ainda têm desempenho por horário, e vice-versa.
+    """
+    summary = {}
+    if durations:
+        summary['durations'] = durations
+    if cube.games.sum() > 0:
+        games_by_hour, score_by_hour = cube.by_hour()
+        games_by_day, score_by_day = cube.by_weekday()
+        summary['by_hour'] = [{'hour': h, 'games': int(games_by_hour[h]), 'score': float(score_by_hour[h])}
+                              for h in range(24) if games_by_hour[h] > 0]
+        summary['by_weekday'] = [{'weekday': name, 'games': int(games_by_day[d]), 'score': float(score_by_day[d])}
+                                 for d, name in enumerate(WEEKDAYS) if games_by_day[d] > 0]
+        summary['worst_slots'] = cube.worst_slots(min_games)
+        frequent = [h for h in summary['by_hour'] if h['games'] >= min_games]
+        if frequent:
+            summary['best_hour'] = max(frequent, key=lambda h: h['score'])
+            summary['worst_hour'] = min(frequent, key=lambda h: h['score'])
+    return summary
+
+
+def format_duration_lines(summary):
+    """Linhas da seção de duração real das partidas"""
+    if not summary.get('durations'):
+        return ["• Horários de início/fim não disponíveis"]
+
+    durations = summary['durations']
+    lines = []
+    for color, label in (('white', 'Como brancas'), ('black', 'Como pretas')):
+        if durations[color]:
+            lines.append(f"• {label} - Média: {format_duration(durations[color]['avg'])}, "
+                         f"mediana: {format_duration(durations[color]['median'])}")
+    for category, stats in durations['by_category'].items():
+        lines.append(f"  {category}: {format_duration(stats['avg'])} em média ({stats['games']} partidas)")
+    return lines
+
+
+def format_time_of_day_lines(summary):
+    """Linhas da seção de desempenho por horário"""
+    lines = []
+    if 'best_hour' in summary:
+        best, worst = summary['best_hour'], summary['worst_hour']
+        lines.append(f"• Melhor hora: {best['hour']:02d}h ({best['score']:.1f}% em {best['games']} jogos)")
+        lines.append(f"• Pior hora: {worst['hour']:02d}h ({worst['score']:.1f}% em {worst['games']} jogos)")
+    for day in summary.get('by_weekday', []):
+        lines.append(f"  {day['weekday']}: {day['score']:.1f}% ({day['games']} jogos)")
+    for slot in summary.get('worst_slots', []):
+        lines.append(f"  ⚠️ {slot['weekday']} {slot['hour']:02d}h {slot['category']}: "
+                     f"{slot['score']:.1f}% ({slot['games']} jogos)")
+    return lines
+
+
+def print_temporal_report(games, player_name, utc_offset_hours=0):
+    """Imprime a duração real das partidas e os piores horários para jogar"""
+    summary = temporal_summary(games, player_name, utc_offset_hours)
+    print("🕒 DURAÇÃO REAL DAS PARTIDAS (StartTime/EndTime):")
+    for line in format_duration_lines(summary):
+        print(line)
+    print()
+    if 'by_hour' not in summary:
+        return
+
+    print("📅 DESEMPENHO POR HORÁRIO:")
+    for line in format_time_of_day_lines(summary):
+        print(line)
+    print()
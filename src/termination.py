@@ -0,0 +1,170 @@
+import re
+
+import chess
+
+# Material (pontos, do ponto de vista de quem abandonou) que separa "com menos"/"igual"/"com mais"
+# Mesma escala de ply_features.WINNING_ADVANTAGE
+RESIGN_MATERIAL = 3
+
+# Em ordem de exibição
+ENDING_LABELS = {
+    'mate_back_rank': 'Mate na última fileira',
+    'mate_smothered': 'Mate abafado',
+    'mate_double_check': 'Mate com xeque duplo',
+    'mate_queen': 'Mate de dama',
+    'mate_rook': 'Mate de torre',
+    'mate_minor': 'Mate de bispo ou cavalo',
+    'mate_pawn': 'Mate de peão',
+    'mate': 'Xeque-mate',
+    'resigned_behind': 'Abandono com material a menos',
+    'resigned_even': 'Abandono com material igual',
+    'resigned_ahead': 'Abandono com material a mais',
+    'resigned': 'Abandono',
+    'timeout': 'Tempo esgotado',
+    'timeout_insufficient': 'Tempo esgotado contra material insuficiente',
+    'abandoned': 'Partida abandonada',
+    'stalemate': 'Afogamento',
+    'repetition': 'Repetição',
+    'insufficient': 'Material insuficiente',
+    'fifty_moves': 'Regra dos 50 lances',
+    'agreed': 'Empate por acordo',
+    'unknown': 'Motivo desconhecido',
+}
+
+# Códigos de resultado da API do Chess.com (o do perdedor, ou o de qualquer lado no empate)
+CHESSCOM_CODES = {
+    'checkmated': 'mate',
+    'resigned': 'resigned',
+    'timeout': 'timeout',
+    'abandoned': 'abandoned',
+    'stalemate': 'stalemate',
+    'repetition': 'repetition',
+    'insufficient': 'insufficient',
+    'timevsinsufficient': 'timeout_insufficient',
+    '50move': 'fifty_moves',
+    'agreed': 'agreed',
+}
+
+# Texto do cabeçalho Termination (Chess.com: "X won by resignation", Lichess: "Time forfeit", ...)
+TERMINATION_TEXT = [
+    (re.compile(r'checkmate', re.I), 'mate'),
+    (re.compile(r'resign', re.I), 'resigned'),
+    (re.compile(r'abandon', re.I), 'abandoned'),
+    (re.compile(r'time(out)? vs\.? insufficient', re.I), 'timeout_insufficient'),
+    (re.compile(r'on time|time forfeit|timeout', re.I), 'timeout'),
+    (re.compile(r'stalemate', re.I), 'stalemate'),
+    (re.compile(r'repetition', re.I), 'repetition'),
+    (re.compile(r'insufficient material', re.I), 'insufficient'),
+    (re.compile(r'50[- ]move', re.I), 'fifty_moves'),
+    (re.compile(r'agree', re.I), 'agreed'),
+]
+
+CHECKER_PATTERNS = {
+    chess.QUEEN: 'mate_queen',
+    chess.ROOK: 'mate_rook',
+    chess.BISHOP: 'mate_minor',
+    chess.KNIGHT: 'mate_minor',
+    chess.PAWN: 'mate_pawn',
+}
+
+
+def mate_pattern(board):
+    """Padrão do xeque-mate em `board` (o lado a jogar está em mate)"""
+    checkers = board.checkers()
+    if len(checkers) > 1:
+        return 'mate_double_check'
+    checker = checkers.pop()
+    piece = board.piece_type_at(checker)
+    king = board.king(board.turn)
+    own = board.occupied_co[board.turn]
+    around = chess.BB_KING_ATTACKS[king]
+
+    if piece == chess.KNIGHT and around & ~own == 0:
+        return 'mate_smothered'
+    home = 0 if board.turn == chess.WHITE else 7
+    if piece in (chess.ROOK, chess.QUEEN) and chess.square_rank(king) == home == chess.square_rank(checker):
+        # As casas de fuga na frente do rei estão tomadas pelas próprias peças
+        forward = around & chess.BB_RANKS[home + (1 if board.turn == chess.WHITE else -1)]
+        if forward & own == forward:
+            return 'mate_back_rank'
+    return CHECKER_PATTERNS[piece]
+
+
+def final_state(board, material):
+    """
+    Avaliação única da posição final de uma partida
+
+    Args:
+        board: tabuleiro na última posição da linha principal
+        material (int): balanço material das brancas nessa posição
+
+    Returns:
+        tuple: (estado, material), estado sendo um padrão de mate, 'stalemate',
+        'insufficient', 'repetition', 'fifty_moves' ou '' se nada disso
+    """
+    if board.is_checkmate():
+        status = mate_pattern(board)
+    elif board.is_stalemate():
+        status = 'stalemate'
+    elif board.is_insufficient_material():
+        status = 'insufficient'
+    elif board.is_repetition(3):
+        status = 'repetition'
+    elif board.is_fifty_moves():
+        status = 'fifty_moves'
+    else:
+        status = ''
+    return status, material
+
+
+def termination_reason(termination):
+    """Motivo do fim pelo código do Chess.com ou pelo texto do cabeçalho Termination (None se não disser)"""
+    if not termination:
+        return None
+    if termination in CHESSCOM_CODES:
+        return CHESSCOM_CODES[termination]
+    for pattern, reason in TERMINATION_TEXT:
+        if pattern.search(termination):
+            return reason
+    return None
+
+
+def classify_ending(termination, result, final=None):
+    """
+    Como a partida terminou, combinando o tabuleiro final e o motivo declarado
+
+    O tabuleiro decide mate e afogamento (e dá o padrão do mate mesmo com
+    Termination "Normal"); o texto decide tempo, abandono e acordo. Uma vitória
+    sem motivo declarado e sem mate no tabuleiro conta como abandono.
+
+    Returns:
+        str: chave de ENDING_LABELS
+    """
+    status, material = final if final is not None else ('', None)
+    if status.startswith('mate') or status == 'stalemate':
+        return status
+
+    reason = termination_reason(termination)
+    decisive = result in ('1-0', '0-1')
+    if reason is None and final is not None:
+        if decisive:
+            reason = 'resigned'
+        elif result == '1/2-1/2' and status:
+            return status
+    if reason == 'resigned' and decisive and material is not None:
+        loser_material = material if result == '0-1' else -material
+        if loser_material <= -RESIGN_MATERIAL:
+            return 'resigned_behind'
+        if loser_material >= RESIGN_MATERIAL:
+            return 'resigned_ahead'
+        return 'resigned_even'
+    return reason or 'unknown'
+
+
+def record_ending(record):
+    """classify_ending de um registro de partida (usa 'final' quando o parse o calculou)"""
+    return classify_ending(record.get('termination'), record.get('result'), record.get('final'))
+
+
+def ending_label(ending):
+    return ENDING_LABELS.get(ending, ending)
@@ -0,0 +1,132 @@
+import math
+
+# Categorias na ordem usada pelos índices e cubos de desempenho
+CATEGORIES = ['bullet', 'blitz', 'rapid', 'classical', 'daily', 'unknown']
+CATEGORY_INDEX = {name: i for i, name in enumerate(CATEGORIES)}
+
+# Duração estimada (base + 40 * incremento) abaixo da qual cada categoria se aplica
+CATEGORY_LIMITS = [('bullet', 180), ('blitz', 480), ('rapid', 1500)]
+
+
+def parse_time_control(time_control):
+    """
+    Interpreta um TimeControl do PGN ('180+2', '600', '1/86400', '-')
+
+    Returns:
+        tuple: (base em segundos, incremento em segundos, segundos por lance em
+        partidas por correspondência); valores desconhecidos são NaN
+    """
+    tc = str(time_control or '').strip()
+    try:
+        if tc.startswith('1/'):
+            return math.nan, 0.0, float(tc[2:])
+        base, _, increment = tc.partition('+')
+        return float(base), float(increment or 0), math.nan
+    except ValueError:
+        return math.nan, 0.0, math.nan
+
+
+def _category(base, increment, daily):
+    if not math.isnan(daily):
+        return 'daily'
+    if math.isnan(base):
+        return 'unknown'
+
+    estimated = base + 40 * increment
+    for category, limit in CATEGORY_LIMITS:
+        if estimated < limit:
+            return category
+    return 'classical'
+
+
+def classify_time_control(time_control):
+    """Classifica um TimeControl em bullet/blitz/rapid/classical/daily/unknown"""
+    return _category(*parse_time_control(time_control))
+
+
+def time_control_fields(time_control):
+    """
+    Campos de controle de tempo de um registro de partida, interpretados uma única vez
+
+    Returns:
+        dict: tc_base, tc_increment e tc_daily (segundos, NaN se desconhecido) e tc_category
+    """
+    base, increment, daily = parse_time_control(time_control)
+    return {
+        'tc_base': base,
+        'tc_increment': increment,
+        'tc_daily': daily,
+        'tc_category': _category(base, increment, daily),
+    }
+
+
+def record_category(game):
+    """Categoria de um registro; registros antigos sem tc_category são classificados na hora"""
+    return game.get('tc_category') or classify_time_control(game.get('time_control'))
+
+
+class CategoryIndex:
+    """
+    Ids das partidas (posição na lista de jogos) de cada categoria de tempo.
+
+    update() só indexa as partidas acrescentadas desde a última chamada, então
+    o índice acompanha uma lista que cresce (modo watch, parse em lotes).
+    """
+
+    def __init__(self, games=None):
+        self.game_ids = {name: [] for name in CATEGORIES}
+        self.size = 0
+        if games is not None:
+            self.update(games)
+
+    def update(self, games):
+        for game_id in range(self.size, len(games)):
+            self.game_ids[record_category(games[game_id])].append(game_id)
+        self.size = len(games)
+        return self
+
+    def ids(self, category):
+        import numpy as np
+        return np.array(self.game_ids[category], dtype=np.int64)
+
+    def counts(self):
+        return {name: len(ids) for name, ids in self.game_ids.items() if ids}
+
+
+def category_performance(games, player_name, index=None):
+    """
+    Vitórias, derrotas e empates do jogador em cada categoria de tempo
+
+    Os resultados são calculados uma vez em um array; cada categoria é só um
+    filtro pelos ids do índice.
+
+    Returns:
+        dict: categoria -> {'wins', 'losses', 'draws', 'total', 'win_rate'}
+    """
+    import numpy as np
+
+    index = (index or CategoryIndex()).update(games)
+    player_name = player_name.lower()
+    is_white = np.array([player_name in g['white'] for g in games], dtype=bool)
+    result = np.array([g['result'] for g in games], dtype=str)
+    won = np.where(is_white, result == '1-0', result == '0-1')
+    lost = np.where(is_white, result == '0-1', result == '1-0')
+    drawn = result == '1/2-1/2'
+
+    performance = {}
+    for category in CATEGORIES:
+        ids = index.ids(category)
+        if not len(ids):
+            continue
+        wins = int(np.count_nonzero(won[ids]))
+        losses = int(np.count_nonzero(lost[ids]))
+        draws = int(np.count_nonzero(drawn[ids]))
+        total = wins + losses + draws
+        performance[category] = {
+            'wins': wins,
+            'losses': losses,
+            'draws': draws,
+            'total': total,
+            'win_rate': wins / total * 100 if total else 0.0,
+        }
+    return performance
@@ -0,0 +1,170 @@
+import sys
+
+import numpy as np
+
+from ply_features import ENDGAME, MIDDLEGAME, PHASE_NAMES, WINNING_ADVANTAGE, PlyTable
+
+# Desvantagem/vantagem (pontos) que conta como "uma peça a menos/a mais"
+PIECE_DOWN = WINNING_ADVANTAGE
+
+
+class GameTimelines:
+    """
+    Linha do tempo de material e fases de cada partida, do ponto de vista do jogador
+
+    `material` (int16) e `phase` (int8) têm uma entrada por meio-lance, nas
+    mesmas linhas da PlyTable; os arrays por partida (resultado, fronteiras
+    das fases, pior e melhor material) têm uma entrada por partida. As
+    estatísticas são reduções vetorizadas sobre esses arrays.
+    """
+
+    def __init__(self, games, player_name, table=None):
+        player_name = player_name.lower()
+        self.table = table if table is not None else PlyTable.from_games(games)
+        is_white = np.array([player_name in g['white'].lower() for g in games], dtype=bool)
+        result = np.array([g['result'] for g in games], dtype=str)
+        self.won = np.where(is_white, result == '1-0', result == '0-1')
+        self.lost = np.where(is_white, result == '0-1', result == '1-0')
+        self.drawn = result == '1/2-1/2'
+
+        table = self.table
+        self.material = np.where(is_white[table.game], table['material'], -table['material']).astype(np.int16)
+        self.phase = table['phase']
+        # Primeiro meio-lance de cada fase (-1 se a partida não chegou nela)
+        self.middlegame_start = table.first_ply(self.phase >= MIDDLEGAME)
+        self.endgame_start = table.first_ply(self.phase == ENDGAME)
+        self.best = table.max_per_game(self.material).astype(np.int16)
+        self.worst = (-table.max_per_game(-self.material.astype(np.int32))).astype(np.int16)
+
+    def game_timeline(self, index):
+        """(material, fase) de cada meio-lance da partida `index`"""
+        rows = slice(self.table.offsets[index], self.table.offsets[index + 1])
+        return self.material[rows], self.phase[rows]
+
+    def phase_lengths(self):
+        """Meios-lances jogados em cada fase, por partida: array (partidas, 3)"""
+        lengths = self.table.lengths
+        middlegame = np.where(self.middlegame_start >= 0, self.middlegame_start, lengths)
+        endgame = np.where(self.endgame_start >= 0, self.endgame_start, lengths)
+        return np.stack((middlegame, endgame - middlegame, lengths - endgame), axis=1)
+
+    def final_phase(self):
+        """Fase em que cada partida terminou (abertura para partidas sem lances)"""
+        last = np.maximum(self.table.offsets[1:] - 1, 0)
+        phase = self.phase[last] if len(self.phase) else np.zeros(len(last), dtype=np.int8)
+        return np.where(self.table.lengths > 0, phase, 0)
+
+    def turning_phase(self, threshold=PIECE_DOWN):
+        """Fase em que o jogador ficou `threshold` pontos atrás pela primeira vez (-1 se nunca ficou)"""
+        first = self.table.first_ply(self.material <= -threshold)
+        rows = self.table.offsets[:-1] + np.maximum(first, 0)
+        phase = self.phase[np.minimum(rows, max(len(self.phase) - 1, 0))] if len(self.phase) else first
+        return np.where(first >= 0, phase, -1)
+
+
+def _rate(wins, total):
+    return float(wins / total * 100) if total else None
+
+
+def timeline_summary(games, player_name, table=None):
+    """
+    Viradas, derrotas com vantagem e duração das fases
+
+    Returns:
+        dict: partidas com uma peça a menos/a mais e seus resultados, duração
+        média de cada fase (em lances) e resultados pela fase final e pela fase
+        em que a desvantagem decisiva apareceu
+    """
+    if not games:
+        return {'games': 0}
+    timelines = GameTimelines(games, player_name, table)
+    won, lost, drawn = timelines.won, timelines.lost, timelines.drawn
+    down = timelines.worst <= -PIECE_DOWN
+    up = timelines.best >= PIECE_DOWN
+
+    lengths = timelines.phase_lengths()
+    reached = lengths > 0
+    average = [float(lengths[reached[:, phase], phase].mean()) / 2 if reached[:, phase].any() else None
+               for phase in range(len(PHASE_NAMES))]
+
+    final = timelines.final_phase()
+    turning = timelines.turning_phase()
+    by_final = [{'games': int(np.count_nonzero(final == phase)),
+                 'wins': int(np.count_nonzero(won & (final == phase))),
+                 'losses': int(np.count_nonzero(lost & (final == phase))),
+                 'draws': int(np.count_nonzero(drawn & (final == phase)))}
+                for phase in range(len(PHASE_NAMES))]
+
+    return {
+        'games': len(games),
+        'down_games': int(np.count_nonzero(down)),
+        'down_win_rate': _rate(np.count_nonzero(down & won), np.count_nonzero(down)),
+        'comebacks': int(np.count_nonzero(down & won)),
+        'up_games': int(np.count_nonzero(up)),
+        'up_win_rate': _rate(np.count_nonzero(up & won), np.count_nonzero(up)),
+        'collapses': int(np.count_nonzero(up & lost)),
+        'phase_moves': average,
+        'reached': [int(np.count_nonzero(reached[:, phase])) for phase in range(len(PHASE_NAMES))],
+        'by_final_phase': by_final,
+        # Derrotas pela fase em que o jogador ficou uma peça atrás (-1: perdeu sem ficar)
+        'losses_by_turning_phase': {phase: int(np.count_nonzero(lost & (turning == phase)))
+                                    for phase in range(-1, len(PHASE_NAMES))},
+    }
+
+
+def format_timeline_lines(summary):
+    if not summary.get('games'):
+        return ["• Nenhuma partida com lances"]
+
+    def rate(value):
+        return f"{value:.1f}%" if value is not None else "-"
+
+    lines = [
+        f"• Com uma peça a menos em algum momento: {summary['down_games']} partidas, "
+        f"{rate(summary['down_win_rate'])} de vitórias ({summary['comebacks']} viradas)",
+        f"• Com uma peça a mais em algum momento: {summary['up_games']} partidas, "
+        f"{rate(summary['up_win_rate'])} de vitórias ({summary['collapses']} derrotas)",
+    ]
+    durations = [f"{name} {moves:.1f}" for name, moves in zip(PHASE_NAMES, summary['phase_moves'])
+                 if moves is not None]
+    lines.append(f"• Duração média (lances): {', '.join(durations)}")
+    reached = [f"{name} {count}" for name, count in zip(PHASE_NAMES, summary['reached'])]
+    lines.append(f"• Partidas que chegaram a cada fase: {', '.join(reached)}")
+    for name, stats in zip(PHASE_NAMES, summary['by_final_phase']):
+        if stats['games']:
+            lines.append(f"• Terminadas na fase {name}: {stats['games']} "
+                         f"({stats['wins']}V/{stats['losses']}D/{stats['draws']}E)")
+    turning = summary['losses_by_turning_phase']
+    where = [f"{name} {turning[phase]}" for phase, name in enumerate(PHASE_NAMES)]
+    lines.append(f"• Derrotas por fase em que ficou uma peça atrás: {', '.join(where)}; "
+                 f"sem ficar atrás {turning[-1]}")
+    return lines
+
+
+def print_timeline_report(games, player_name, table=None):
+    print("📉 MATERIAL E FASES DAS PARTIDAS:")
+    for line in format_timeline_lines(timeline_summary(games, player_name, table)):
+        print(line)
+    print()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python timelines.py <arquivo.pgn> <nome_do_jogador>")
+        sys.exit(1)
+
+    from pgn_io import open_pgn
+    from stenio import PGNAnalyzer
+
+    pgn_file_path, player_name = sys.argv[1:3]
+    try:
+        with open_pgn(pgn_file_path, threaded=True) as file:
+            analyzer = PGNAnalyzer(file, player_name)
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return
+    print_timeline_report(analyzer.games, player_name, analyzer.ply_table())
+
+
+if __name__ == "__main__":
+    main()
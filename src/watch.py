@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+from game_store import GameStore
+from report import render_report
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Intervalo de verificação quando inotify não está disponível
+POLL_INTERVAL = 0.25
+
+
+class FileTail:
+    """Espera o arquivo crescer, via inotify (Linux) quando disponível ou por polling do tamanho"""
+
+    def __init__(self, path, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.inotify = None
+        if INotify is not None:
+            try:
+                self.inotify = INotify()
+                self.inotify.add_watch(path, inotify_flags.MODIFY | inotify_flags.CLOSE_WRITE)
+            except OSError:
+                self.inotify = None
+
+    def stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self, last_stat, timeout=1.0):
+        """Bloqueia até o arquivo mudar (ou até o timeout); retorna True se mudou"""
+        if self.inotify is not None:
+            if self.inotify.read(timeout=int(timeout * 1000)):
+                # Agrupa rajadas de escrita em uma única atualização
+                while self.inotify.read(timeout=50):
+                    pass
+                return True
+            return False
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.stat() != last_stat:
+                return True
+            time.sleep(self.poll_interval)
+        return False
+
+
+class PGNWatcher:
+    """
+    Modo --watch: acompanha um PGN que só cresce e atualiza o relatório.
+
+    Lembra o offset da última partida completa, lê só as partidas
+    acrescentadas e as soma aos agregados já calculados.
+    """
+
+    def __init__(self, pgn_path, player_name, fmt='text', on_update=None):
+        self.store = GameStore(pgn_path, player_name)
+        self.tail = FileTail(pgn_path)
+        self.fmt = fmt
+        self.on_update = on_update or self.print_report
+        self.last_stat = None
+
+    def print_report(self, model, added, elapsed):
+        sys.stdout.write("\033[2J\033[H")  # Limpa a tela
+        sys.stdout.write(render_report(model, self.fmt))
+        print(f"👀 Observando {self.store.pgn_path} - +{added} partidas em {elapsed * 1000:.0f} ms "
+              f"(offset {self.store.offset}). Ctrl+C para sair.")
+        sys.stdout.flush()
+
+    def update(self):
+        started = time.perf_counter()
+        self.last_stat = self.tail.stat()
+        added = self.store.refresh()
+        if added or self.store.version == 0:
+            self.on_update(self.store.report(), added, time.perf_counter() - started)
+        return added
+
+    def run(self):
+        print(f"📂 Carregando {self.store.pgn_path}...")
+        self.update()
+        mode = 'inotify' if self.tail.inotify is not None else f"polling a cada {POLL_INTERVAL}s"
+        print(f"🔁 Aguardando novas partidas ({mode})...")
+        while True:
+            if self.tail.wait(self.last_stat):
+                self.update()
+
+
+def watch_pgn_file(pgn_file_path, player_name, fmt='text'):
+    """Analisa o arquivo e mantém o relatório atualizado enquanto novas partidas são acrescentadas"""
+    if not os.path.exists(pgn_file_path):
+        print(f"❌ Arquivo não encontrado: {pgn_file_path}")
+        return None
+
+    watcher = PGNWatcher(pgn_file_path, player_name, fmt)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n👋 Modo watch encerrado")
+    return watcher
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python watch.py <arquivo.pgn> <nome_do_jogador>")
+        sys.exit(1)
+    watch_pgn_file(sys.argv[1], sys.argv[2])